@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Measure the cost of hovering over the timeline: get_chunk_size() for every minute of
+a day with @hours of activity, compared to the former implementation which sorted all
+minutes on each call
+
+Run from the repository root: `python3 benchmarks/bench_chunk_size.py`
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pylint: disable=wrong-import-position
+from track.core import ActiveApplications, AppInfo
+
+
+def legacy_chunk_size(apps: ActiveApplications, minute: int) -> Tuple[int, int]:
+    """get_chunk_size() before the segment index (see MainAppRuns)"""
+    _begin, _end = minute, minute
+    _a = apps._minutes[minute].main_app() if apps.is_active(minute) else None
+    _minutes = sorted(apps._minutes.keys())
+    _lower_range = [i for i in _minutes if i < minute]
+    _upper_range = [i for i in _minutes if i > minute]
+    if _a is None:
+        return (
+            _lower_range[-1] if _lower_range != [] else _begin,
+            _upper_range[0] if _upper_range != [] else _end,
+        )
+    for i in reversed(_lower_range):
+        if _begin - i > 1:
+            break
+        if apps._minutes[i].main_app() == _a:
+            _begin = i
+    for i in _upper_range:
+        if i - _end > 1:
+            break
+        if apps._minutes[i].main_app() == _a:
+            _end = i
+    return _begin, _end
+
+
+def generate_day(hours: int, rng: random.Random) -> ActiveApplications:
+    """A day with @hours of activity, switching apps every few minutes, with some gaps"""
+    apps = ActiveApplications()
+    names = ["Window %d" % n for n in range(30)]
+    current = names[0]
+    for minute in range(360, 360 + hours * 60):
+        if rng.random() < 0.05:
+            continue
+        if rng.random() < 0.2:
+            current = rng.choice(names)
+        for _ in range(rng.randrange(1, 60)):
+            apps.update(minute, AppInfo(current, "/usr/bin/app"))
+    return apps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    apps = generate_day(args.hours, random.Random(args.seed))
+    hovered = range(apps.begin_index(), apps.end_index() + 1)
+    print("%d active minutes, %d runs" % (apps.time_active(), len(apps._runs)))
+    for minute in hovered:
+        assert apps.get_chunk_size(minute) == legacy_chunk_size(apps, minute)
+
+    print("%-10s %14s %14s" % ("", "sweep [ms]", "per hover [us]"))
+    for name, func in (
+        ("legacy", lambda m: legacy_chunk_size(apps, m)),
+        ("indexed", apps.get_chunk_size),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for minute in hovered:
+                func(minute)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print("%-10s %14.2f %14.2f" % (name, elapsed * 1000, elapsed / len(hovered) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Measure encode and decode cost of all available codecs (see `track.core.codec`) on
+synthetic days of realistic size, compared to the formerly used pretty printed JSON
+
+Run from the repository root: `python3 benchmarks/bench_codec.py`
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pylint: disable=wrong-import-position
+from track.core import ActiveApplications, AppInfo, codec
+
+
+def generate_day(hours: int, titles: int, rng: random.Random) -> Dict[str, Any]:
+    """A day snapshot with @hours of activity sampled every second (as TimeTracker does)
+    spread over @titles window titles"""
+    apps = ActiveApplications()
+    names = ["Window %d - Some Application — ümlaut" % n for n in range(titles)]
+    for minute in range(480, 480 + hours * 60):
+        current = rng.choice(names)
+        for _ in range(60):
+            if rng.random() < 0.1:
+                current = rng.choice(names)
+            apps.update(minute, AppInfo(current, "/usr/bin/app --some-option"))
+    return {"tracker_data": apps.__data__(), "daily_note": "did some things"}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=int, default=10)
+    parser.add_argument("--titles", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    day = generate_day(args.hours, args.titles, random.Random(args.seed))
+    pretty = json.dumps(day, sort_keys=True, indent=4)
+    print(
+        "%d apps, %d minutes, %d kB pretty printed"
+        % (
+            len(day["tracker_data"]["apps"]),
+            len(day["tracker_data"]["minutes"]),
+            len(pretty) // 1024,
+        )
+    )
+    print("%-16s %8s %12s %12s" % ("codec", "size kB", "encode [ms]", "decode [ms]"))
+    print(
+        "%-16s %8d %12.2f %12.2f"
+        % (
+            "json (indent=4)",
+            len(pretty) // 1024,
+            measure(lambda: json.dumps(day, sort_keys=True, indent=4), args.repeat),
+            measure(lambda: json.loads(pretty), args.repeat),
+        )
+    )
+    for name, current in codec.CODECS.items():
+        raw = current.encode(day)
+        assert current.decode(raw) == json.loads(pretty)
+        print(
+            "%-16s %8d %12.2f %12.2f"
+            % (
+                name + (" (default)" if current is codec.DEFAULT else ""),
+                len(raw) // 1024,
+                measure(
+                    lambda: current.encode(day), args.repeat
+                ),  # pylint: disable=cell-var-from-loop
+                measure(
+                    lambda: current.decode(raw), args.repeat
+                ),  # pylint: disable=cell-var-from-loop
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Measure memory allocated (via tracemalloc) for keeping a year of synthetic days loaded,
+with the slotted `AppInfo` / `Minute` compared to dict-backed copies of both classes
+and to `dense.DenseDay` (the model used for recorded days)
+
+__slots__ alone don't reach a 2x reduction (about 1.1x with Python 3.11's compact
+instance dicts) - the per-minute counter dicts of ActiveApplications dominate. Only
+DenseDay, which doesn't keep a Minute per minute, gets there.
+
+Run from the repository root: `python3 benchmarks/bench_memory.py`
+"""
+
+import argparse
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pylint: disable=wrong-import-position
+from track.core import ActiveApplications, common, dense
+
+
+def dict_backed(cls: type) -> type:
+    """Return a copy of @cls without __slots__, i.e. with a __dict__ per instance"""
+    members = {
+        name: value
+        for name, value in vars(cls).items()
+        if name not in ("__slots__", "__dict__", "__weakref__", *cls.__slots__)
+    }
+    return type(cls.__name__, (), members)
+
+
+def generate_days(count: int, hours: int, titles: int, rng: random.Random) -> List[Dict]:
+    """@count day snapshots with @hours of activity each, switching between @titles apps"""
+    names = [sys.intern("Window %d - Some Application" % n) for n in range(titles)]
+    cmdline = sys.intern("/usr/bin/app --some-option")
+    days = []
+    for _ in range(count):
+        apps = rng.sample(names, 40)
+        minutes = {}
+        for minute in range(480, 480 + hours * 60):
+            if rng.random() < 0.1:
+                continue
+            used = rng.sample(range(len(apps)), rng.randrange(1, 4))
+            minutes[minute] = [(app, rng.randrange(1, 60)) for app in used]
+        days.append(
+            {"apps": [(title, 2, 60, cmdline) for title in apps], "minutes": minutes},
+        )
+    return days
+
+
+def measure(load: Callable[[Dict], Any], days: List[Dict]) -> int:
+    """Return the number of bytes still allocated after loading all @days"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    loaded = [load(day) for day in days]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del loaded
+    return allocated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--hours", type=int, default=9)
+    parser.add_argument("--titles", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    days = generate_days(args.days, args.hours, args.titles, random.Random(args.seed))
+    n_minutes = sum(len(day["minutes"]) for day in days)
+    n_apps = sum(len(day["apps"]) for day in days)
+    print("%d days, %d active minutes, %d apps" % (len(days), n_minutes, n_apps))
+
+    slotted = (common.AppInfo, common.Minute)
+    rows = []
+    for name, classes, model in (
+        ("ActiveApplications, dict-backed", tuple(map(dict_backed, slotted)), ActiveApplications),
+        ("ActiveApplications, slotted", slotted, ActiveApplications),
+        ("DenseDay", slotted, dense.DenseDay),
+    ):
+        # models create their instances via the common module
+        common.AppInfo, common.Minute = classes
+        try:
+            total = measure(model, days)
+            apps = measure(lambda day: [common.AppInfo().load(a) for a in day["apps"]], days)
+        finally:
+            common.AppInfo, common.Minute = slotted
+        rows.append((name, total, apps))
+
+    print("%-32s %10s %14s %12s" % ("model", "total MB", "bytes/minute", "bytes/app"))
+    for name, total, apps in rows:
+        print(
+            "%-32s %10.1f %14.1f %12.1f"
+            % (name, total / 2**20, (total - apps) / n_minutes, apps / n_apps)
+        )
+    # like for like: the same model, only AppInfo / Minute differ
+    print("__slots__ (ActiveApplications): %.2fx less memory" % (rows[0][1] / rows[1][1]))
+    print(
+        "DenseDay vs. dict-backed ActiveApplications: %.1fx less memory" % (rows[0][1] / rows[2][1])
+    )
+
+
+if __name__ == "__main__":
+    main()
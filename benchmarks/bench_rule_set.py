@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Compare rule matching via `common.RuleSet` with the former uncompiled implementation
+of `common.get_category` and measure incremental re-categorization after a rule edit
+
+Run from the repository root: `python3 benchmarks/bench_rule_set.py`
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from track.core import common  # pylint: disable=wrong-import-position
+
+
+def legacy_get_category(string: str, rules: common.Rules) -> common.Category:
+    """The implementation `common.get_category` used to have"""
+    for rule, category in rules:
+        if re.search(rule, string, flags=re.IGNORECASE):
+            return category
+    return common.Category.UNASSIGNED
+
+
+def generate_rules(count: int, rng: random.Random) -> List[common.Rule]:
+    """Rules shaped like the ones found in real world category_rules.json files"""
+    templates = (
+        r"^project-{n} ",
+        r"\[jenkins-{n}\]",
+        r".*ticket #{n}.*",
+        r"^gerrit/repo{n}",
+        r"Meeting {n}",
+        r"^(mail|chat) {n}:",
+    )
+    return [(rng.choice(templates).format(n=n), rng.choice((2, 3))) for n in range(count)]
+
+
+def generate_titles(count: int, rule_count: int, rng: random.Random) -> List[str]:
+    """Window titles of which roughly half are matched by some rule"""
+    templates = (
+        "project-{n} - main.py - Visual Studio Code",
+        "[jenkins-{n}] build #1234 failed",
+        "Review ticket #{n} - Mozilla Firefox",
+        "gerrit/repo{n} - Change 4711",
+        "Meeting {n} - Zoom",
+        "chat {n}: hi there",
+        "Terminal - user@host:~/src/something-{n}",
+        "DER SPIEGEL - Nachrichten {n} — Mozilla Firefox",
+    )
+    return [rng.choice(templates).format(n=rng.randrange(2 * rule_count)) for _ in range(count)]
+
+
+def measure(name: str, func: Callable[[str], object], titles: Sequence[str]) -> float:
+    start = time.perf_counter()
+    for title in titles:
+        func(title)
+    duration = time.perf_counter() - start
+    print("%-12s %8.3fs  (%6.1fµs per title)" % (name, duration, duration / len(titles) * 1e6))
+    return duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=300)
+    parser.add_argument("--titles", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = generate_rules(args.rules, rng)
+    titles = generate_titles(args.titles, args.rules, rng)
+    print("%d rules, %d window titles" % (len(rules), len(titles)))
+
+    rule_set = common.RuleSet(rules)
+    assert all(legacy_get_category(t, rules) == rule_set.category(t) for t in titles)
+
+    legacy = measure("legacy", lambda t: legacy_get_category(t, rules), titles)
+    compiled = measure("RuleSet", rule_set.category, titles)
+    print("speedup: %.1fx" % (legacy / compiled))
+
+    print("\nre-categorize %d days with 300 apps each after editing one rule" % args.days)
+    history = [[common.AppInfo(t) for t in rng.sample(titles, 300)] for _ in range(args.days)]
+    start = time.perf_counter()
+    for apps in history:
+        common.recategorize(apps, rule_set)
+    full = time.perf_counter() - start
+    print("%-12s %8.3fs" % ("full", full))
+
+    rules[len(rules) // 2] = (r"^nothing matches this", 3)
+    edited = rule_set.updated(rules)
+    start = time.perf_counter()
+    for apps in history:
+        common.recategorize(apps, edited)
+    incremental = time.perf_counter() - start
+    print(
+        "%-12s %8.3fs  (%.0f%% of a full pass)"
+        % ("incremental", incremental, incremental / full * 100)
+    )
+    # only the edited rule has to be evaluated for most apps
+    assert incremental < full / 4, "one-rule edit costs more than a quarter of a full pass"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Fixtures shared by the tests"""
+
+import argparse
+import random
+
+import pytest
+
+from track.core import ActiveApplications, AppInfo, common, desktop_usage_info
+
+
+def _random_day(seed=1):
+    rng = random.Random(seed)
+    apps = ActiveApplications()
+    titles = ["Slack", "Terminal", "Zoom Meeting", "Firefox — ümlaut", ""]
+    minute = 480
+    while minute < 1000:
+        for _ in range(rng.randrange(1, 60)):
+            apps.update(minute, AppInfo(rng.choice(titles), "cmd %d" % rng.randrange(3)))
+        minute += rng.choice((1, 1, 1, 2, 5))
+    apps.recategorize([(r"Slack|Zoom", 2), (r"Firefox", 3)])
+    return apps
+
+
+@pytest.fixture
+def random_day():
+    """random_day(seed) returns a reproducible ActiveApplications instance"""
+    return _random_day
+
+
+@pytest.fixture
+def fake_desktop(monkeypatch):
+    """fake_desktop(samples) makes TimeTracker.update() see (minute, title[, cmdline])
+    @samples and returns a function switching to the next sample"""
+    state = {}
+    monkeypatch.setattr(common, "minutes_since_midnight", lambda: state["minute"])
+    monkeypatch.setattr(
+        desktop_usage_info.applicationinfo,
+        "get_active_window_information",
+        lambda: {"TITLE": state["title"], "COMMAND": state["cmdline"]},
+    )
+    monkeypatch.setattr(desktop_usage_info.idle, "getIdleSec", lambda: 0)
+
+    def feed(samples):
+        samples = list(samples)
+
+        def next_sample():
+            minute, title, *cmdline = samples.pop(0)
+            state.update(minute=minute, title=title, cmdline=cmdline[0] if cmdline else "cmd")
+
+        return next_sample
+
+    return feed
+
+
+@pytest.fixture
+def track_server(tmp_path):
+    """track_server(journal=False) returns a TrackServer on data directory @tmp_path
+    without starting it"""
+    # imported here since the server depends on zmq
+    from track.server import TrackServer  # pylint: disable=import-outside-toplevel
+
+    def create(journal=False):
+        return TrackServer(
+            argparse.Namespace(
+                data_dir=str(tmp_path),
+                category_cache_size=16,
+                journal=journal,
+                verify_persistence=False,
+                storage="json",
+            )
+        )
+
+    return create
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from track.core import ActiveApplications, archive, columnar, common, history, storage
+
+
+def write_days(random_day, directory, days):
+    for seed, day in enumerate(days, 1):
+        with open(os.path.join(directory, "track-%s.json" % day), "w") as file:
+            json.dump(
+                {"tracker_data": random_day(seed).__data__(), "daily_note": day}, file, indent=4
+            )
+
+
+def test_parse_age():
+    assert archive.parse_age("30d") == 30
+    assert archive.parse_age("6w") == 42
+    assert archive.parse_age("7") == 7
+    with pytest.raises(ValueError):
+        archive.parse_age("one month")
+
+
+@pytest.mark.parametrize("method", ["gzip", "lzma", "zip"])
+def test_archived_days_are_read_transparently(random_day, tmp_path, method):
+    directory = str(tmp_path)
+    recent = (date.today() - timedelta(days=3)).strftime("%Y%m%d")
+    write_days(random_day, directory, ["20200131", "20200201", recent])
+    columnar.write(os.path.join(directory, "track-20200202.bin"), random_day(4), "bin")
+    open(os.path.join(directory, "track-backup-20200201.json"), "w").write("{}")
+
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    assert archive.archive(directory, older_than=30, method=method) == 4
+    assert sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory)) < size
+
+    names = common.log_files(directory)
+    assert len(names) == 4
+    assert names[-1] == "track-%s.json" % recent
+    assert [storage.plain_path(name) for name in names[:3]] == [
+        "track-20200131.json",
+        "track-20200201.json",
+        "track-20200202.json",
+    ]
+
+    store = storage.open_store(directory, "json")
+    assert store.days() == names
+    for seed, name in zip((1, 2, 4), names[:3]):
+        data = store.load(name)
+        assert ActiveApplications(data["tracker_data"]) == random_day(seed)
+        # archived days can still be addressed by their original name
+        assert store.load(storage.plain_path(name)) == data
+        assert history.sidecar_path(store.path(name)) == os.path.join(
+            directory, storage.plain_path(name)[:-5] + history.SIDECAR_SUFFIX
+        )
+    assert store.open_day("track-20200202.json")[1] == "bin"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
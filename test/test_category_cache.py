@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from track.core import TimeTracker
+
+
+def test_category_cache(tmp_path, fake_desktop):
+    next_sample = fake_desktop(
+        [(600, "Slack - general", "slack")] * 3 + [(601, "Terminal", "bash")]
+    )
+    tracker = TimeTracker(data_dir=str(tmp_path), category_cache_size=8)
+    tracker.set_rules([(r"^Slack", 3)])
+    for _ in range(4):
+        next_sample()
+        tracker.update()
+
+    info = tracker.category_cache_info()
+    assert (info["hits"], info["misses"], info["currsize"]) == (2, 2, 2)
+    slack = tracker.get_applications_model().app("Slack - general")
+    assert slack._count == 3 and slack._category == 3
+    assert tracker.current_state()["category"] == 1
+
+    tracker.set_rules([(r"^Slack", 2)])
+    assert tracker.category_cache_info()["currsize"] == 0
+    assert slack._category == 2
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
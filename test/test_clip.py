@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from track.core import ActiveApplications, AppInfo, TimeTracker, codec
+
+
+def test_clip_everything(random_day):
+    apps = random_day(7)
+    apps.clip_from(2000)
+    assert (apps.begin_index(), apps.end_index(), apps.time_active()) == (0, 0, 0)
+    assert apps.get_chunk_size(500) == (0, 0)
+    apps.clip_to(100)
+    assert apps.undo_clip()
+    assert apps.time_active() > 0
+
+
+def test_undo_clip_restores_minutes(random_day):
+    apps = random_day(8)
+    original = ActiveApplications(apps.__data__())
+    begin, end = apps.begin_index(), apps.end_index()
+
+    apps.clip_from(begin + 30)
+    apps.clip_to(end - 30)
+    assert (apps.begin_index(), apps.end_index()) != (begin, end)
+    recorded = min(m for m in original._minutes if m > end - 30)
+    apps.update(recorded, AppInfo("Slack", "cmd 1"))  # recorded again after the clip
+    assert apps.undo_clip() and apps.undo_clip()
+    assert not apps.undo_clip()
+
+    assert (apps.begin_index(), apps.end_index()) == (begin, end)
+    assert apps.time_active() == original.time_active()
+    assert apps.time_in_category(2) == ActiveApplications(apps.__data__()).time_in_category(2)
+    reloaded = ActiveApplications(apps.__data__())
+    for minute in range(begin, end + 1):
+        assert apps.get_chunk_size(minute) == reloaded.get_chunk_size(minute)
+    assert apps._minutes[recorded] != original._minutes[recorded]
+    del apps._minutes[recorded], original._minutes[recorded]
+    assert apps._minutes == original._minutes
+
+
+def test_undo_log_is_bounded(random_day):
+    apps = random_day(9)
+    for _ in range(ActiveApplications.UNDO_DEPTH + 5):
+        apps.clip_from(apps.begin_index() + 1)
+    undone = 0
+    while apps.undo_clip():
+        undone += 1
+    assert undone == ActiveApplications.UNDO_DEPTH
+
+
+def test_server_undo_clip_is_journaled(tmp_path, fake_desktop, track_server):
+    next_sample = fake_desktop([(600, "Slack"), (601, "Terminal"), (602, "Zoom")])
+    server = track_server(journal=True)
+
+    def request(cmd, **data):
+        return codec.decode(server.encoded_reply(codec.encode({"cmd": cmd, "data": data})))
+
+    for _ in range(3):
+        next_sample()
+        server._tracker.update()
+    assert request("clip_to", index=600) == {"type": "ok"}
+    assert request("undo_clip") == {"data": {"undone": True}}
+    assert request("undo_clip") == {"data": {"undone": False}}
+    server._tracker.sync("unused")
+    assert len(request("apps")["data"]["apps"]["minutes"]) == 3
+
+    restored = TimeTracker(data_dir=str(tmp_path), journal=True)
+    assert restored.get_applications_model().time_active() == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from track.core import AppInfo, codec, storage
+
+
+@pytest.mark.parametrize("name", sorted(codec.CODECS))
+def test_codecs_are_interchangeable(random_day, name):
+    data = {"tracker_data": random_day().__data__(), "daily_note": "ümlaut\n"}
+    raw = codec.get(name).encode(data)
+    expected = json.loads(json.dumps(data))
+    for other in codec.CODECS.values():
+        assert other.decode(raw) == expected
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        codec.get("xml")
+
+
+def test_day_files_record_codec(random_day, tmp_path):
+    store = storage.open_store(str(tmp_path), "json")
+    apps = random_day()
+    store.save("track-20200101.json", {"tracker_data": apps.__data__(), "daily_note": None})
+    with open(os.path.join(str(tmp_path), "track-20200101.json")) as file:
+        assert json.load(file)["codec"] == codec.DEFAULT.name
+    assert "codec" not in store.load("track-20200101.json")
+
+
+def test_server_reuses_encoded_apps_reply(track_server):
+    server = track_server()
+    request = codec.encode({"cmd": "apps"})
+    reply = server.encoded_reply(request)
+    assert server.encoded_reply(request) is reply
+    server._tracker.get_applications_model().update(600, AppInfo("Terminal"))
+    reply = server.encoded_reply(request)
+    assert codec.decode(reply)["data"]["apps"]["apps"][0][0] == "Terminal"
+    assert server.encoded_reply(request) is reply
+
+    assert codec.decode(server.encoded_reply(b"[1]"))["error_type"] == "request_malformed"
+    assert codec.decode(server.encoded_reply(b"{"))["error_type"] == "request_malformed"
+    assert codec.decode(server.encoded_reply(codec.encode({"cmd": "note"}))) == {
+        "data": {"note": None}
+    }
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
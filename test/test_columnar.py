@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+from track.core import ActiveApplications, columnar, common, storage
+
+
+def test_columnar_matches_active_applications(random_day, tmp_path):
+    apps = random_day()
+    filename = os.path.join(str(tmp_path), "track-20200101.bin")
+    columnar.write(filename, apps, "note")
+    day = columnar.ColumnarDay(filename)
+
+    assert day.note() == "note"
+    assert (day.begin_index(), day.end_index()) == (apps.begin_index(), apps.end_index())
+    assert day.time_active() == apps.time_active()
+    for category in range(5):
+        assert day.time_in_category(category) == apps.time_in_category(category)
+    for minute in range(400, 1100):
+        assert day.is_active(minute) == apps.is_active(minute)
+        assert day.category_at(minute) == apps.category_at(minute)
+        assert day.get_chunk_size(minute) == apps.get_chunk_size(minute)
+        assert str(day.info_at(minute)[1]) == str(apps.info_at(minute)[1])
+
+    assert ActiveApplications(day.to_dict()["tracker_data"]) == apps
+
+    day.clip_from(600)
+    day.clip_to(800)
+    apps.clip_from(600)
+    apps.clip_to(800)
+    assert (day.begin_index(), day.end_index()) == (apps.begin_index(), apps.end_index())
+    assert day.time_in_category(2) == apps.time_in_category(2)
+    day.close()
+
+
+def test_convert_day_file(random_day, tmp_path):
+    apps = random_day(2)
+    json_file = os.path.join(str(tmp_path), "track-20200101.json")
+    with open(json_file, "w") as file:
+        json.dump({"tracker_data": apps.__data__(), "daily_note": "hello"}, file)
+    open(os.path.join(str(tmp_path), "track-20200102.json"), "w").write("{}")
+
+    bin_file = storage.convert_day_file(json_file, "columnar")
+    assert bin_file.endswith("track-20200101.bin")
+    assert common.log_files(str(tmp_path)) == ["track-20200101.bin", "track-20200102.json"]
+
+    os.remove(json_file)
+    assert storage.convert_day_file(bin_file, "json") == json_file
+    data = storage.load_day_file(json_file)
+    assert data["daily_note"] == "hello"
+    assert ActiveApplications(data["tracker_data"]) == apps
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+
+import pytest
+
+from track.core import ActiveApplications, AppInfo, TimeTracker, codec
+
+
+def check_snapshot(snapshot):
+    apps, minutes = snapshot["apps"], snapshot["minutes"]
+    # each sample increments an app counter and a minute counter together
+    assert sum(app[2] for app in apps) == sum(c for m in minutes.values() for _, c in m)
+    assert all(0 <= a < len(apps) for m in minutes.values() for a, _ in m)
+    codec.encode(snapshot)
+
+
+def test_concurrent_readers_see_consistent_snapshots():
+    apps = ActiveApplications()
+    titles = ["App %d" % i for i in range(50)]
+    stop = threading.Event()
+    errors = []
+
+    def sampler():
+        rng = random.Random(1)
+        minute = 0
+        while not stop.is_set():
+            minute += rng.random() < 0.02
+            apps.update(minute % 1440, AppInfo(rng.choice(titles), "cmd"))
+
+    def reader():
+        try:
+            revision = None
+            while not stop.is_set():
+                snapshot = apps.snapshot()
+                check_snapshot(snapshot)
+                ActiveApplications(snapshot)
+                apps.time_active(), apps.main_app_minutes()
+                assert revision is None or apps.revision() >= revision
+                revision = apps.revision()
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    threads = [threading.Thread(target=sampler)]
+    threads += [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    stop.wait(1)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, errors
+    check_snapshot(apps.snapshot())
+    assert apps.snapshot() is apps.snapshot()
+
+
+def test_snapshots_stay_unchanged():
+    apps = ActiveApplications()
+    apps.update(500, AppInfo("Terminal", "cmd"))
+    snapshot = apps.snapshot()
+    apps.update(500, AppInfo("Terminal", "cmd"))
+    apps.update(501, AppInfo("Slack", "cmd"))
+    assert snapshot == {"apps": [("Terminal", 0, 1, "cmd")], "minutes": {500: [(0, 1)]}}
+    assert apps.snapshot()["minutes"] == {500: [(0, 2)], 501: [(1, 1)]}
+
+
+def test_rule_changes_while_sampling(tmp_path, fake_desktop):
+    next_sample = fake_desktop([(600, "App %d" % (i % 20)) for i in range(100000)])
+    tracker = TimeTracker(data_dir=str(tmp_path), category_cache_size=8)
+    stop = threading.Event()
+
+    def sampler():
+        while not stop.is_set():
+            next_sample()
+            tracker.update()
+
+    thread = threading.Thread(target=sampler)
+    thread.start()
+    for i in range(200):
+        tracker.set_rules([(r"^App", 2 + i % 2)])
+    stop.set()
+    thread.join()
+
+    # no sample has been categorized by outdated rules
+    assert {app._category for app in tracker.get_applications_model().apps()} == {3}
+    assert {tracker._categorize("App %d" % i, "cmd")[0] for i in range(20)} == {3}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+import pytest
+
+from track.cli import main
+from track.core import common, date_range, segments, storage, summary
+from track.ui.timegraph import FileDataprovider
+
+
+def store_with_days(random_day, directory, *days):
+    """A DirectoryStore holding random days for all (YYYYMMDD, seed) @days"""
+    store = storage.DirectoryStore(directory)
+    for day, seed in days:
+        data = {"tracker_data": random_day(seed).__data__(), "daily_note": None}
+        store.save("track-%s.json" % day, data)
+    return store
+
+
+def test_parse_date():
+    assert date_range.parse_date("2020-01-31") == date(2020, 1, 31)
+    assert date_range.parse_date("20200131") == date(2020, 1, 31)
+    with pytest.raises(ValueError):
+        date_range.parse_date("31.01.2020")
+
+
+def test_aggregate_matches_single_days(random_day, tmp_path):
+    days = [("20200101", 1), ("20200102", 2), ("20200105", 3), ("20200110", 4)]
+    store = store_with_days(random_day, str(tmp_path), *days)
+    view = date_range.DateRangeView(store, date(2020, 1, 2), date(2020, 1, 9))
+    assert view.days() == ["track-20200102.json", "track-20200105.json"]
+
+    stats = view.aggregate()
+    models = [random_day(2), random_day(3)]
+    assert stats.days == 2
+    assert stats.active == sum(model.time_active() for model in models)
+    for category in (common.Category.WORK, common.Category.PRIVATE):
+        expected = sum(model.time_in_category(category) for model in models)
+        assert stats.time_in_category(category) == expected
+    breaks = sum(segments.segment(model).time_in_breaks() for model in models)
+    assert stats.time_in_category(common.Category.BREAK) == breaks
+    assert stats.earliest == min(model.begin_index() for model in models)
+    assert stats.latest == max(model.end_index() for model in models)
+
+    minutes = {}
+    for model in models:
+        for identifier, count in model.main_app_minutes().items():
+            minutes[identifier] = minutes.get(identifier, 0) + count
+    assert stats.top_apps(2) == sorted(minutes.items(), key=lambda item: -item[1])[:2]
+
+
+def test_aggregate_applies_rules(random_day, tmp_path):
+    store = store_with_days(random_day, str(tmp_path), ("20200101", 1))
+    rule_set = common.RuleSet([(r".*", common.Category.PRIVATE)])
+    stats = date_range.DateRangeView(
+        store, date(2020, 1, 1), date(2020, 1, 1), rule_set
+    ).aggregate()
+    assert stats.time_in_category(common.Category.PRIVATE) == stats.active
+    assert stats.time_in_category(common.Category.WORK) == 0
+
+
+def test_summaries_give_the_same_totals(random_day, tmp_path):
+    store = store_with_days(random_day, str(tmp_path), ("20200101", 1), ("20200102", 2))
+    rule_set = common.RuleSet([(r"Terminal", 2), (r"Slack", 3)])
+    view = date_range.DateRangeView(store, date(2020, 1, 1), date(2020, 1, 2), rule_set)
+    expected = view.aggregate()
+
+    index = summary.SummaryIndex(store)
+    index.update()
+    providers = [FileDataprovider(store, name, index.get(name)) for name in index.days()]
+    stats = date_range.RangeStats()
+    for provider in providers:
+        provider.recategorize(rule_set)
+        stats.add_summary(provider.day_summary())
+    assert not any(provider.loaded() for provider in providers)
+    assert (stats.days, stats.active, stats.earliest, stats.latest) == (
+        expected.days,
+        expected.active,
+        expected.earliest,
+        expected.latest,
+    )
+    for category in (common.Category.WORK, common.Category.PRIVATE, common.Category.BREAK):
+        assert stats.time_in_category(category) == expected.time_in_category(category)
+    assert stats.top_apps(3) == expected.top_apps(3)
+
+    # clipped days get summarized from their timeline
+    providers[0].clip_from(600)
+    clipped = providers[0].day_summary()
+    assert clipped.begin == providers[0].begin_index() >= 600
+    assert clipped.work == providers[0].time_work()
+
+
+def test_stats_command(random_day, tmp_path, capsys):
+    store_with_days(random_day, str(tmp_path), ("20200101", 1), ("20200102", 2), ("20200201", 3))
+    main(["--data-dir", str(tmp_path), "stats", "--from", "2020-01-01", "--to", "20200131"])
+    output = capsys.readouterr().out
+    assert "2020-01-01 - 2020-01-31: 2 days with data" in output
+    assert "top apps:" in output
+
+    main(["--data-dir", str(tmp_path), "stats", "--from", "2021-01-01", "--to", "2021-01-31"])
+    assert "0 days with data" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from track.core import ActiveApplications, common, dense, storage
+
+
+def assert_same_day(day, apps):
+    assert (day.begin_index(), day.end_index()) == (apps.begin_index(), apps.end_index())
+    assert day.time_active() == apps.time_active()
+    for category in common.Category:
+        assert day.time_in_category(category) == apps.time_in_category(category)
+    assert day.main_app_minutes() == apps.main_app_minutes()
+    for minute in range(-60, dense.MINUTES_PER_DAY + 60):
+        assert day.is_active(minute) == apps.is_active(minute), minute
+        assert day.category_at(minute) == apps.category_at(minute), minute
+        assert day.get_chunk_size(minute) == apps.get_chunk_size(minute), minute
+        assert str(day.info_at(minute)[1]) == str(apps.info_at(minute)[1])
+
+
+def test_dense_day_matches_active_applications(random_day):
+    apps = random_day(3)
+    day = dense.DenseDay(apps.__data__())
+    assert_same_day(day, apps)
+    assert ActiveApplications(day.__data__()) == apps
+
+    minute = apps.begin_index()
+    assert {str(a): c for a, c in day.minute_counter(minute).items()} == {
+        str(a): c for a, c in apps.minute_counter(minute).items()
+    }
+    assert day.minute_counter(5) is None
+
+
+def test_recategorize_and_clip(random_day):
+    apps = random_day(4)
+    day = dense.DenseDay(apps.__data__())
+    rules = common.RuleSet([(r"Terminal", 2), (r".*", 3)])
+    day.recategorize(rules)
+    apps.recategorize(rules)
+    assert_same_day(day, apps)
+
+    for model in (day, apps):
+        model.clip_from(600)
+        model.clip_to(800)
+    assert_same_day(day, apps)
+    assert ActiveApplications(day.__data__()) == apps
+
+
+def test_empty_day_and_store(random_day, tmp_path):
+    day = dense.DenseDay()
+    assert (day.begin_index(), day.end_index(), day.time_active()) == (0, 0, 0)
+    assert day.get_chunk_size(500) == (0, 0)
+    assert day.category_at(500) == 0
+
+    store = storage.DirectoryStore(str(tmp_path))
+    apps = random_day(5)
+    store.save("track-20200101.json", {"tracker_data": apps.__data__(), "daily_note": "x"})
+    model, note = store.open_day("track-20200101.json")
+    assert isinstance(model, dense.DenseDay) and note == "x"
+    assert_same_day(model, apps)
+    assert os.path.exists(os.path.join(str(tmp_path), "track-20200101.json"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
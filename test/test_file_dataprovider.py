@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from track.core import common, storage, summary
+from track.ui.timegraph import FileDataprovider
+
+
+def test_lazy_loading_and_eviction(random_day, tmp_path, monkeypatch):
+    store = storage.open_store(str(tmp_path), "json")
+    for day in range(1, 6):
+        store.save(
+            "track-2020010%d.json" % day,
+            {"tracker_data": random_day(day).__data__(), "daily_note": "note %d" % day},
+        )
+    index = summary.SummaryIndex(store)
+    index.update()
+    monkeypatch.setattr(FileDataprovider, "LOADED_DAYS_BUDGET", 2)
+    monkeypatch.setattr(FileDataprovider, "_loaded", type(FileDataprovider._loaded)())
+    providers = [FileDataprovider(store, name, index.get(name)) for name in index.days()]
+
+    # header, totals and re-categorization are served from the summary
+    rule_set = common.RuleSet([(r"Terminal", 2)])
+    for provider, seed in zip(providers, range(1, 6)):
+        apps = random_day(seed)
+        assert provider.time_active() == apps.time_active()
+        assert provider.recategorize(rule_set)
+        apps.recategorize(rule_set)
+        assert provider.time_work() == apps.time_in_category(common.Category.WORK)
+    assert not any(provider.loaded() for provider in providers)
+
+    # painting loads the timeline, only the last recently used ones are kept
+    providers[0].clip_from(600)
+    for provider in providers[1:4]:
+        provider.category_at(600)
+    assert [provider.loaded() for provider in providers] == [False, False, True, True, False]
+
+    # clipping and categories survive eviction
+    apps = random_day(1)
+    apps.recategorize(rule_set)
+    apps.clip_from(600)
+    assert providers[0].daily_note() == "note 1"
+    assert providers[0].begin_index() == apps.begin_index()
+    assert providers[0].time_work() == apps.time_in_category(common.Category.WORK)
+    assert all(providers[0].category_at(m) == apps.category_at(m) for m in range(500, 1000))
+
+
+def test_undo_clip(random_day, tmp_path):
+    store = storage.DirectoryStore(str(tmp_path))
+    apps = random_day(1)
+    store.save("track-20200101.json", {"tracker_data": apps.__data__(), "daily_note": None})
+    provider = FileDataprovider(store, "track-20200101.json")
+    states = []
+    for clip in (provider.clip_from, provider.clip_to):
+        states.append((provider.begin_index(), provider.end_index()))
+        clip(700)
+    assert provider.begin_index() == provider.end_index() <= 700
+    for state in reversed(states):
+        assert provider.undo_clip()
+        assert (provider.begin_index(), provider.end_index()) == state
+    assert provider.time_active() == apps.time_active()
+    assert not provider.undo_clip()
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
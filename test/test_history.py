@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from track.cli import main
+from track.core import ActiveApplications, AppInfo, common, history, storage
+
+RULES = [(r"^Slack", 2), (r"Firefox", 3)]
+
+
+def write_day(directory, date, titles):
+    apps = ActiveApplications()
+    for minute, title in enumerate(titles, start=8 * 60):
+        apps.update(minute, AppInfo(title, "cmd"))
+    filename = os.path.join(directory, "track-%s.json" % date)
+    with open(filename, "w") as file:
+        json.dump({"tracker_data": apps.__data__(), "daily_note": None}, file)
+    return filename
+
+
+def test_recategorize_files(tmp_path):
+    first = write_day(tmp_path, "20200101", ["Slack", "News - Firefox", "Terminal"])
+    write_day(tmp_path, "20200102", ["Slack"])
+
+    assert history.recategorize_files(str(tmp_path), RULES, processes=2) == 2
+    assert history.recategorize_files(str(tmp_path), RULES, processes=2) == 0
+    assert os.path.exists(history.sidecar_path(first))
+
+    rule_set = common.RuleSet(RULES)
+    assert history.load_sidecar(first, rule_set) == {
+        "Slack": 0,
+        "News - Firefox": 1,
+        "Terminal": None,
+    }
+    assert history.load_sidecar(first, rule_set.updated([(r"^Slack", 3)])) is None
+
+
+def test_recategorize_day_uses_sidecar(tmp_path):
+    filename = write_day(tmp_path, "20200101", ["Slack", "Terminal"])
+    rule_set = common.RuleSet(RULES)
+    with open(history.sidecar_path(filename), "w") as file:
+        # deliberately 'wrong' in order to see the sidecar is being used
+        json.dump(
+            {"rules_digest": rule_set.digest(), "rule_indices": {"Slack": 1, "Terminal": 0}}, file
+        )
+
+    apps = ActiveApplications(storage.load_day_file(filename)["tracker_data"])
+    assert history.recategorize_day(filename, apps, rule_set)
+    assert {app._wndtitle: app._category for app in apps.apps()} == {"Slack": 3, "Terminal": 2}
+
+    # once categorized, rule changes are applied incrementally without sidecar
+    assert history.recategorize_day(filename, apps, rule_set.updated(RULES[:1]))
+    assert {app._wndtitle: app._category for app in apps.apps()} == {"Slack": 1, "Terminal": 2}
+
+
+def test_recategorize_command(tmp_path):
+    write_day(str(tmp_path), "20200101", ["Slack", "Terminal"])
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--data-dir", str(tmp_path), "recategorize", "-j", "1"])
+    assert exc_info.value.code == 1
+
+    with open(os.path.join(str(tmp_path), "category_rules.json"), "w") as file:
+        json.dump(RULES, file)
+    main(["--data-dir", str(tmp_path), "recategorize", "-j", "1"])
+    assert os.path.exists(history.sidecar_path(os.path.join(str(tmp_path), "track-20200101.json")))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
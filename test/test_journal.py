@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import threading
+
+import pytest
+
+from track.core import TimeTracker, common
+
+
+def test_journal_replay_and_compaction(tmp_path, fake_desktop):
+    samples = [(600, "Slack")] * 3 + [(601, "Terminal"), (601, "Slack"), (603, "Zoom")]
+    next_sample = fake_desktop(samples)
+    tracker = TimeTracker(data_dir=str(tmp_path), journal=True)
+    for _ in range(4):
+        next_sample()
+        tracker.update()
+    tracker.set_note("some note")
+    tracker.sync("unused")
+    for _ in range(2):
+        next_sample()
+        tracker.update()
+    tracker.clip_from(601)
+    tracker.sync("unused")
+
+    journal = os.path.join(str(tmp_path), "track-%s.journal" % common.today_str())
+    assert os.path.exists(journal)
+    assert not os.path.exists(os.path.join(str(tmp_path), "track-%s.json" % common.today_str()))
+
+    restored = TimeTracker(data_dir=str(tmp_path), journal=True)
+    assert restored.get_applications_model() == tracker.get_applications_model()
+    assert restored.get_applications_model().app("Slack")._count == 4
+    assert restored.get_applications_model().begin_index() == 601
+    assert restored.note == "some note"
+
+    restored.persist("track-%s.json" % common.today_str())
+    assert not os.path.exists(journal)
+    compacted = TimeTracker(data_dir=str(tmp_path), journal=True)
+    assert compacted.get_applications_model() == tracker.get_applications_model()
+
+
+def test_sync_while_saving(tmp_path, fake_desktop):
+    next_sample = fake_desktop([(600 + i // 50, "App %d" % (i % 7)) for i in range(100000)])
+    tracker = TimeTracker(data_dir=str(tmp_path), journal=True)
+    filename = "track-%s.json" % common.today_str()
+    stop = threading.Event()
+    errors = []
+
+    def monitor():
+        try:
+            while not stop.is_set():
+                next_sample()
+                tracker.update()
+                tracker.sync(filename)
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    thread = threading.Thread(target=monitor)
+    thread.start()
+    for i in range(300):
+        tracker.set_note("note %d" % i)
+        tracker.persist(filename)
+    stop.set()
+    thread.join()
+
+    assert not errors, errors
+    tracker.sync(filename)
+    restored = TimeTracker(data_dir=str(tmp_path), journal=True)
+    assert restored.get_applications_model() == tracker.get_applications_model()
+    assert restored.note == "note 299"
+
+
+def test_invalid_rules_are_not_journaled(tmp_path):
+    tracker = TimeTracker(data_dir=str(tmp_path), journal=True)
+    tracker.set_rules([(r"^Slack", 2)])
+    with pytest.raises(re.error):
+        tracker.set_rules([(r"^Slack(", 2)])
+    assert tracker.rules() == [(r"^Slack", 2)]
+    tracker.sync("unused")
+
+    restored = TimeTracker(data_dir=str(tmp_path), journal=True)
+    assert restored.rules() == [[r"^Slack", 2]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
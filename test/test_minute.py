@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+from track.core import ActiveApplications, AppInfo, Minute
+
+
+def test_main_app_follows_add():
+    rng = random.Random(7)
+    apps = [AppInfo("App %d" % i, "cmd") for i in range(5)]
+    for _ in range(200):
+        minute = Minute()
+        for _ in range(rng.randrange(1, 40)):
+            minute.add(rng.choice(apps))
+            counter = minute._app_counter
+            # reference: first app with the highest count
+            assert minute.main_app() is max(counter, key=lambda app: counter[app])
+        assert Minute(dict(minute._app_counter)).main_app() is minute.main_app()
+
+
+def test_main_category_follows_recategorization():
+    apps = ActiveApplications()
+    for title in ("Terminal", "Terminal", "Slack"):
+        apps.update(500, AppInfo(title, "cmd"))
+    assert apps.category_at(500) == 0
+    apps.recategorize([(r"Terminal", 2)])
+    assert apps.category_at(500) == 2
+    assert apps.time_in_category(2) == 1
+    assert ActiveApplications(apps.__data__()) == apps
+
+
+if __name__ == "__main__":
+    test_main_app_follows_add()
+    test_main_category_follows_recategorization()
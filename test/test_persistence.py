@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+from track.core import AppInfo, TimeTracker, common, storage
+
+
+def test_persist_only_changed_data(tmp_path, monkeypatch):
+    written = []
+    tracker = TimeTracker(data_dir=str(tmp_path), verify_persistence=True)
+    save_json, save_day = tracker._save_json, tracker._store.save
+    monkeypatch.setattr(
+        tracker,
+        "_save_json",
+        lambda data, filename: (written.append(filename), save_json(data, filename)),
+    )
+    monkeypatch.setattr(
+        tracker._store,
+        "save",
+        lambda filename, data: (written.append(filename), save_day(filename, data)),
+    )
+
+    tracker.persist("track-20200101.json")
+    assert written == ["track-20200101.json", "category_rules.json"]
+
+    written.clear()
+    tracker.persist("track-20200101.json")
+    tracker.set_note(None)
+    tracker.persist("track-20200101.json")
+    assert written == []
+
+    tracker.get_applications_model().update(600, AppInfo("Terminal"))
+    tracker.persist("track-20200101.json")
+    assert written == ["track-20200101.json"]
+
+    written.clear()
+    tracker.set_note("note")
+    tracker.set_rules([(r"Terminal", 2)])
+    tracker.persist("track-20200101.json")
+    assert written == ["track-20200101.json", "category_rules.json"]
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "category_rules.json",
+        "track-20200101.json",
+        "track-strings.jsonl",
+    ]
+    assert common.log_files(str(tmp_path)) == ["track-20200101.json"]
+
+
+def test_concurrent_saves(tmp_path):
+    filename = os.path.join(str(tmp_path), "track-20200101.json")
+    errors = []
+
+    def save(content):
+        try:
+            for _ in range(50):
+                storage.save_bytes(filename, content)
+        except OSError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=save, args=(b"%d" % i * 1000,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert os.listdir(str(tmp_path)) == ["track-20200101.json"]
+    with open(filename, "rb") as file:
+        assert len(set(file.read())) == 1
+
+
+def test_saving_keeps_permissions(tmp_path):
+    filename = os.path.join(str(tmp_path), "track-20200101.json")
+    umask = os.umask(0o027)
+    try:
+        storage.save_bytes(filename, b"{}")
+    finally:
+        os.umask(umask)
+    assert os.stat(filename).st_mode & 0o777 == 0o640
+
+    os.chmod(filename, 0o604)
+    storage.save_bytes(filename, b"{}")
+    assert os.stat(filename).st_mode & 0o777 == 0o604
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
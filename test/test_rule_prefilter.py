@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+import re
+
+from track.core import common
+from track.core.rule_prefilter import LiteralPrefilter, required_literal
+
+
+def test_required_literal():
+    assert required_literal(r"^Slack") == "slack"
+    assert required_literal(r"\[Jenkins\]") == "[jenkins]"
+    assert required_literal(r".*SZ.de") == "sz"
+    assert required_literal(r"x*(foo)+bar") == "foo"
+    assert required_literal(r"^(mail|chat) 3:") == " 3:"
+    assert required_literal(r"a?b*") is None
+    assert required_literal(r"a|bc") is None
+    assert required_literal(r"Über") == "ber"
+
+
+def test_candidates():
+    prefilter = LiteralPrefilter([required_literal(p) for p in (r"^Slack", r".*", r"ab", r"Zoom")])
+    assert prefilter.candidates("Slack - Zoom") == [0, 1, 3]
+    assert prefilter.candidates("about") == [1, 2]
+
+
+def test_prefilter_keeps_match_semantics():
+    rng = random.Random(5)
+    alphabet = "abcKSi.- İıſK"
+    patterns = [
+        "".join(rng.choice(alphabet + "^$*+?|") for _ in range(rng.randrange(1, 6)))
+        for _ in range(400)
+    ]
+    rules = []
+    for pattern in patterns:
+        try:
+            re.compile(pattern)
+        except re.error:
+            continue
+        rules.append((pattern, 2))
+    rule_set = common.RuleSet(rules)
+    for _ in range(2000):
+        string = "".join(rng.choice(alphabet) for _ in range(rng.randrange(12)))
+        expected = next(
+            (i for i, (p, _) in enumerate(rules) if re.search(p, string, flags=re.IGNORECASE)),
+            None,
+        )
+        assert rule_set.match(string) == expected, (string, expected)
+
+
+if __name__ == "__main__":
+    test_required_literal()
+    test_candidates()
+    test_prefilter_keeps_match_semantics()
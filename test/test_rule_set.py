@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+from track.core import common
+
+
+def test_first_match_wins():
+    rule_set = common.RuleSet([(r"^Slack", 2), (r"Slack", 3), (r"\[Jenkins\]", 2)])
+    assert len(rule_set) == 3
+    assert rule_set.match("Slack - general") == 0
+    assert rule_set.category("Slack - general") == 2
+    assert rule_set.category("news - slack") == 3
+    assert rule_set.category("[jenkins] build failed") == 2
+    assert rule_set.match("Terminal") is None
+    assert rule_set.category("Terminal") == common.Category.UNASSIGNED
+
+
+def test_get_category_accepts_plain_rules():
+    rules = [(r".*Zoom.*", 2), (r"^DER SPIEGEL", 3)]
+    app = common.AppInfo("DER SPIEGEL - Nachrichten", "firefox")
+    assert common.get_category(app, rules) == 3
+    assert common.get_category(app, common.RuleSet(rules)) == 3
+
+
+def test_recategorize():
+    apps = [common.AppInfo("Zoom Meeting"), common.AppInfo("Terminal")]
+    common.recategorize(apps, common.RuleSet([(r"zoom", 2)]))
+    assert [app._category for app in apps] == [2, common.Category.UNASSIGNED]
+
+
+def test_incremental_recategorization():
+    rng = random.Random(23)
+    patterns = ["^a", "b$", "c", "^ab", "d.*e", "[0-9]", "x|y", "^$", "ba", "e"]
+    titles = ["".join(rng.choice("abcdexy01") for _ in range(rng.randrange(6))) for _ in range(300)]
+    apps = [common.AppInfo(title) for title in titles]
+    rules = [(rng.choice(patterns), rng.randrange(2, 4)) for _ in range(5)]
+    rule_set = common.RuleSet(rules)
+    common.recategorize(apps, rule_set)
+
+    for _ in range(200):
+        edit = rng.randrange(4)
+        if edit == 0 or not rules:
+            rules.insert(rng.randrange(len(rules) + 1), (rng.choice(patterns), rng.randrange(2, 4)))
+        elif edit == 1:
+            rules[rng.randrange(len(rules))] = (rng.choice(patterns), rng.randrange(2, 4))
+        elif edit == 2:
+            del rules[rng.randrange(len(rules))]
+        else:
+            rules.insert(rng.randrange(len(rules)), rules.pop(rng.randrange(len(rules))))
+
+        rule_set = rule_set.updated(rules)
+        common.recategorize(apps, rule_set)
+        reference = common.RuleSet(rules)
+        for app in apps:
+            assert app._category == reference.category(app._wndtitle)
+            assert app._rule_index == reference.match(app._wndtitle)
+
+
+def test_incremental_recategorization_evaluates_changed_rules_only():
+    rules = [(r"^Slack", 2), (r"Zoom", 2), (r"Firefox", 3), (r"Terminal", 3)]
+    apps = [common.AppInfo(t) for t in ("Zoom Meeting", "Terminal", "vim", "Firefox")]
+    rule_set = common.RuleSet(rules)
+    common.recategorize(apps, rule_set)
+    rules[1] = (r"^vim", 2)
+    updated = rule_set.updated(rules)
+    common.recategorize(apps, updated)
+    assert [app._category for app in apps] == [common.Category.UNASSIGNED, 3, 2, 3]
+    # only the edited rule has been evaluated (for "vim"), unchanged rules keep the
+    # evaluations of the initial categorization
+    before = [s["evaluations"] for s in rule_set.stats()]
+    assert before == [0, 1, 1, 1]
+    assert [s["evaluations"] for s in updated.stats()] == [0, 1, 1, 1]
+
+
+def test_recategorize_reports_changes():
+    apps = [common.AppInfo("Zoom Meeting"), common.AppInfo("Terminal")]
+    rule_set = common.RuleSet([(r"zoom", 2)])
+    assert common.recategorize(apps, rule_set)
+    assert not common.recategorize(apps, rule_set)
+    assert not common.recategorize(apps, rule_set.updated([(r"zoom", 2), (r"^Signal", 3)]))
+
+
+def test_stats():
+    rule_set = common.RuleSet([(r"^Slack", 2), (r"Zoom", 2), (r"never", 3)])
+    app = common.AppInfo("Zoom Meeting")
+    rule_set.categorize(app)
+    rule_set.count_sample(app)
+    rule_set.count_sample(app)
+    rule_set.category("Slack")
+    stats = rule_set.stats()
+    assert [(s["samples"], s["evaluations"], s["matches"]) for s in stats] == [
+        (0, 1, 1),
+        (2, 1, 1),
+        (0, 0, 0),
+    ]
+    # statistics of unchanged rules are taken over
+    updated = rule_set.updated([(r"^Slack", 2), (r"Zoom", 3), (r"never", 3)])
+    assert [s["matches"] for s in updated.stats()] == [1, 0, 0]
+
+
+if __name__ == "__main__":
+    test_first_match_wins()
+    test_get_category_accepts_plain_rules()
+    test_recategorize()
+    test_incremental_recategorization()
+    test_incremental_recategorization_evaluates_changed_rules_only()
+    test_recategorize_reports_changes()
+    test_stats()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from track.core import ActiveApplications, storage
+
+
+def legacy_minutes(apps):
+    data = apps.__data__()
+    return {
+        "apps": data["apps"],
+        "minutes": {minute: [0, counter] for minute, counter in data["minutes"].items()},
+    }
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        lambda apps: legacy_minutes(apps),
+        lambda apps: apps.__data__(),
+        lambda apps: {"tracker_data": legacy_minutes(apps), "daily_note": "note"},
+        lambda apps: {"version": 2, "tracker_data": apps.__data__(), "daily_note": "note"},
+    ],
+)
+def test_all_schema_versions_load_and_upgrade(random_day, tmp_path, content):
+    apps = random_day()
+    filename = os.path.join(str(tmp_path), "track-20200101.json")
+    with open(filename, "w") as file:
+        json.dump(content(apps), file)
+    old_version = storage.schema_version(content(apps))
+
+    assert ActiveApplications(storage.load_day_file(filename)["tracker_data"]) == apps
+    assert storage.upgrade_day_file(filename) == (old_version < storage.SCHEMA_VERSION)
+    assert not storage.upgrade_day_file(filename)
+    with open(filename) as file:
+        assert json.load(file)["version"] == storage.SCHEMA_VERSION
+    assert ActiveApplications(storage.load_day_file(filename)["tracker_data"]) == apps
+
+
+def test_newer_schema_is_rejected(tmp_path):
+    filename = os.path.join(str(tmp_path), "track-20200101.json")
+    with open(filename, "w") as file:
+        json.dump({"version": storage.SCHEMA_VERSION + 1, "tracker_data": {}}, file)
+    with pytest.raises(ValueError):
+        storage.load_day_file(filename)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+from track.core import ActiveApplications, AppInfo
+
+
+def reference_chunk_size(apps, minute):
+    """get_chunk_size() as implemented before the segment index"""
+    if not (apps.end_index() and apps.begin_index()):
+        return 0, 0
+    if minute > apps.end_index() or minute < apps.begin_index():
+        return minute, minute
+    minutes = sorted(apps._minutes)
+    lower = [i for i in minutes if i < minute]
+    upper = [i for i in minutes if i > minute]
+    if not apps.is_active(minute):
+        return (lower[-1] if lower else minute, upper[0] if upper else minute)
+    main_app = apps._minutes[minute].main_app()
+    begin, end = minute, minute
+    for i in reversed(lower):
+        if begin - i > 1:
+            break
+        if apps._minutes[i].main_app() == main_app:
+            begin = i
+    for i in upper:
+        if i - end > 1:
+            break
+        if apps._minutes[i].main_app() == main_app:
+            end = i
+    return begin, end
+
+
+def assert_matches_reference(apps):
+    for minute in range(apps.begin_index() - 5, apps.end_index() + 5):
+        assert apps.get_chunk_size(minute) == reference_chunk_size(apps, minute), minute
+    reloaded = ActiveApplications(apps.__data__())
+    assert list(reloaded._runs) == list(apps._runs)
+
+
+def test_runs_follow_updates():
+    rng = random.Random(3)
+    apps = ActiveApplications()
+    titles = ["Slack", "Terminal", "Firefox"]
+    for _ in range(3000):
+        # random order, so runs get split, extended and merged
+        apps.update(rng.randrange(480, 560), AppInfo(rng.choice(titles), "cmd"))
+    assert_matches_reference(apps)
+
+
+def test_runs_follow_set_minute_and_clipping(random_day):
+    apps = random_day(5)
+    assert_matches_reference(apps)
+
+    terminal = apps.intern(AppInfo("Terminal", "cmd 0"))
+    apps.set_minute(600, {terminal: 100})
+    apps.set_minute(601, {terminal: 100})
+    apps.set_minute(1010, {apps.intern(AppInfo("Slack", "cmd 1")): 1})
+    assert_matches_reference(apps)
+    assert apps.get_chunk_size(600)[1] >= 601
+
+    apps.clip_from(apps.begin_index() + 17)
+    apps.clip_to(apps.end_index() - 23)
+    assert_matches_reference(apps)
+
+
+def test_empty_and_single_minute():
+    apps = ActiveApplications()
+    assert apps.get_chunk_size(500) == (0, 0)
+    apps.update(500, AppInfo("Terminal", "cmd"))
+    assert apps.get_chunk_size(500) == (500, 500)
+    assert apps.get_chunk_size(501) == (501, 501)
+    apps.recategorize([(r"Terminal", 2)])
+    assert apps.get_chunk_size(500) == (500, 500)
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
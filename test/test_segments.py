@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from track.cli import main
+from track.core import (
+    ActiveApplications,
+    AppInfo,
+    columnar,
+    common,
+    dense,
+    segments,
+    storage,
+)
+
+
+def day_with(*spans):
+    """A day with (first minute, last minute, title) @spans of activity"""
+    apps = ActiveApplications()
+    for first, last, title in spans:
+        for minute in range(first, last + 1):
+            apps.update(minute, AppInfo(title, "cmd"))
+    return apps
+
+
+def test_sessions_breaks_and_runs():
+    apps = day_with((480, 499, "Terminal"), (502, 510, "Terminal"), (511, 520, "Slack"))
+    apps.update(560, AppInfo("Slack", "cmd"))
+    day = segments.compute(apps.timeline(), segments.Settings(max_gap=2, min_break=30))
+    assert day.sessions == [(480, 520), (560, 560)]
+    assert day.breaks == [(521, 559)]
+    assert [run[:2] for run in day.runs] == [(480, 510), (511, 520), (560, 560)]
+    assert day.time_in_breaks() == 39
+    assert day.run_at(500).app._wndtitle == "Terminal"
+    assert day.session_at(530) is None and day.break_at(530) == (521, 559)
+    assert day.category_at(530, common.Category.IDLE) == common.Category.BREAK
+    assert day.category_at(500, common.Category.IDLE) == common.Category.IDLE
+    assert day.category_at(530, common.Category.WORK) == common.Category.WORK
+
+    strict = segments.compute(apps.timeline(), segments.Settings(max_gap=0, min_break=30))
+    assert [run[:2] for run in strict.runs][:2] == [(480, 499), (502, 510)]
+
+
+def test_runs_match_chunks_of_all_models(random_day, tmp_path):
+    apps = random_day(10)
+    filename = os.path.join(str(tmp_path), "track-20200101.bin")
+    columnar.write(filename, apps, None)
+    models = [apps, dense.DenseDay(apps.__data__()), columnar.ColumnarDay(filename)]
+    results = [segments.segment(model) for model in models]
+    for result in results[1:]:
+        assert result.sessions == results[0].sessions
+        assert [run[:2] for run in result.runs] == [run[:2] for run in results[0].runs]
+    for run in results[0].runs:
+        assert apps.get_chunk_size(run.begin) == (run.begin, run.end)
+    models[2].close()
+
+
+def test_segments_are_cached_per_revision(random_day):
+    apps = random_day(11)
+    day = segments.segment(apps)
+    assert segments.segment(apps) is day
+    assert segments.segment(apps, segments.Settings(min_break=5)) is not day
+    apps.clip_from(apps.begin_index() + 60)
+    assert segments.segment(apps) is not day
+    assert segments.segment(apps).sessions[0][0] == apps.begin_index()
+
+
+def test_show_prints_segments(tmp_path, capsys):
+    apps = day_with((480, 490, "Terminal"), (540, 550, "Slack"))
+    store = storage.DirectoryStore(str(tmp_path))
+    store.save("track-20200101.json", {"tracker_data": apps.__data__(), "daily_note": None})
+    main(["--data-dir", str(tmp_path), "show", "track-20200101.json", "--min-break", "20"])
+    output = capsys.readouterr().out
+    assert "break    8:11 -  8:59 ( 0:49)" in output
+    assert "2 app runs" in output
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from track.core import (
+    ActiveApplications,
+    AppInfo,
+    TimeTracker,
+    archive,
+    columnar,
+    storage,
+)
+from track.core.sqlite_store import SqliteStore
+
+
+def test_save_and_load(random_day, tmp_path):
+    store = SqliteStore(os.path.join(str(tmp_path), "track.sqlite"))
+    apps = random_day()
+    store.save("track-20200101.json", {"tracker_data": apps.__data__(), "daily_note": "note"})
+    store.save("track-20200102.json", {"tracker_data": apps.__data__(), "daily_note": None})
+    store.save("track-backup-20200102.json", {"tracker_data": {}, "daily_note": None})
+
+    assert store.days() == ["track-20200101.json", "track-20200102.json"]
+    assert store.days(reverse=True)[0] == "track-20200102.json"
+    data = store.load("track-20200101.json")
+    assert data["daily_note"] == "note"
+    assert ActiveApplications(data["tracker_data"]) == apps
+
+    model, note = store.open_day("track-20200102.json")
+    assert note == ""
+    assert model.time_in_category(2) == apps.time_in_category(2)
+
+    # saving a day again replaces it completely
+    store.save("track-20200101.json", {"tracker_data": random_day(3).__data__()})
+    assert ActiveApplications(store.load("track-20200101.json")["tracker_data"]) == random_day(3)
+
+    with pytest.raises(FileNotFoundError):
+        store.load("track-20200103.json")
+    store.close()
+
+
+def test_import_directory(random_day, tmp_path):
+    directory = str(tmp_path)
+    apps = random_day()
+    with open(os.path.join(directory, "track-20200101.json"), "w") as file:
+        json.dump({"tracker_data": apps.__data__(), "daily_note": "hello"}, file)
+    # legacy formats: bare tracker data and minutes stored as [category, counter]
+    data = apps.__data__()
+    legacy = {
+        "apps": data["apps"],
+        "minutes": {minute: [0, counter] for minute, counter in data["minutes"].items()},
+    }
+    with open(os.path.join(directory, "track-20200102.json"), "w") as file:
+        json.dump(legacy, file)
+    columnar.write(os.path.join(directory, "track-20200103.bin"), apps, None)
+
+    store = storage.open_store(directory, "sqlite")
+    assert store.import_directory(directory, processes=2) == 3
+    assert store.days() == ["track-2020010%d.json" % day for day in (1, 2, 3)]
+    assert store.load("track-20200101.json")["daily_note"] == "hello"
+    for name in store.days():
+        assert ActiveApplications(store.load(name)["tracker_data"]) == apps
+
+
+@pytest.mark.parametrize("method", ["gzip", "lzma", "zip"])
+def test_import_archived_days(random_day, tmp_path, method):
+    directory = str(tmp_path)
+    for day in (1, 2):
+        with open(os.path.join(directory, "track-2020010%d.json" % day), "w") as file:
+            json.dump({"tracker_data": random_day(day).__data__(), "daily_note": None}, file)
+    assert archive.archive(directory, older_than=30, method=method) == 2
+
+    store = storage.open_store(directory, "sqlite")
+    assert store.import_directory(directory, processes=2) == 2
+    assert store.days() == ["track-20200101.json", "track-20200102.json"]
+    for day, name in enumerate(store.days(), 1):
+        assert ActiveApplications(store.load(name)["tracker_data"]) == random_day(day)
+    store.close()
+
+
+def test_time_tracker_on_sqlite(tmp_path):
+    directory = str(tmp_path)
+    tracker = TimeTracker(data_dir=directory, storage_backend="sqlite")
+    tracker.get_applications_model().update(600, AppInfo("Terminal"))
+    tracker.set_note("note")
+    tracker.persist("track-20200101.json")
+    tracker.persist("track-backup-20200101.json")
+    assert sorted(os.listdir(directory)) == ["category_rules.json", "track.sqlite"]
+
+    data = storage.open_store(directory, "sqlite").load("track-20200101.json")
+    assert data["daily_note"] == "note"
+    assert ActiveApplications(data["tracker_data"]) == tracker.get_applications_model()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+
+import pytest
+
+from track.cli import main
+from track.core import ActiveApplications, storage, strings, summary
+
+
+def test_registry_ids_are_stable(tmp_path):
+    filename = os.path.join(str(tmp_path), strings.REGISTRY_FILENAME)
+    registry = strings.StringRegistry(filename)
+    assert registry.ids(["a", "b", "a", "ü\n"]) == [0, 1, 0, 2]
+
+    # another process appending to the registry
+    other = strings.StringRegistry(filename)
+    assert other.ids(["c", "b"]) == [3, 1]
+    assert registry.strings([3, 2]) == ["c", "ü\n"]
+    assert registry.ids(["d"]) == [4]
+
+    # an entry broken by a crash keeps its ID slot
+    with open(filename, "ab") as file:
+        file.write(b'"brok')
+    registry = strings.StringRegistry(filename)
+    assert registry.ids(["e"]) == [6]
+    assert strings.StringRegistry(filename).strings([4, 6]) == ["d", "e"]
+
+
+def test_day_files_reference_registry(random_day, tmp_path):
+    directory = str(tmp_path)
+    store = storage.open_store(directory, "json")
+    apps = random_day()
+    for day in ("20200101", "20200102"):
+        store.save("track-%s.json" % day, {"tracker_data": apps.__data__(), "daily_note": day})
+
+    with open(os.path.join(directory, "track-20200101.json")) as file:
+        raw = json.load(file)
+    assert all(isinstance(app[0], int) for app in raw["tracker_data"]["apps"])
+    assert len(strings.registry(directory)) == 8  # 5 titles, 3 cmdlines
+
+    days = [ActiveApplications(store.load(name)["tracker_data"]) for name in store.days()]
+    assert days == [apps, apps]
+    # both days share one instance of each string
+    titles = [sorted((a._wndtitle for a in day.apps()), key=id) for day in days]
+    assert all(a is b for a, b in zip(*titles))
+
+
+def test_concurrent_writers_agree_on_ids(tmp_path):
+    filename = os.path.join(str(tmp_path), strings.REGISTRY_FILENAME)
+    registries = [strings.StringRegistry(filename) for _ in range(4)]
+    results = {}
+
+    def register(index):
+        for n in range(50):
+            words = ["%d-%d" % (index, n), "shared-%d" % n]
+            results.update(zip(words, registries[index].ids(words)))
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reread = strings.StringRegistry(filename)
+    assert len(reread) == len(results) == 250
+    assert reread.strings(list(results.values())) == list(results)
+
+
+def test_missing_registry(random_day, tmp_path):
+    directory = str(tmp_path)
+    store = storage.open_store(directory, "json")
+    store.save("track-20200101.json", {"tracker_data": random_day().__data__()})
+    os.remove(os.path.join(directory, strings.REGISTRY_FILENAME))
+    strings._REGISTRIES.clear()
+    with pytest.raises(strings.MissingStringsError, match="not registered"):
+        store.load("track-20200101.json")
+    # unlike broken days, days with missing strings don't get skipped silently
+    with pytest.raises(strings.MissingStringsError):
+        summary.SummaryIndex(store).update()
+
+
+def test_upgrade_keeps_day_files_self_contained(random_day, tmp_path):
+    directory = str(tmp_path)
+    apps = random_day()
+    filename = os.path.join(directory, "track-20200101.json")
+    with open(filename, "w") as file:
+        json.dump({"tracker_data": apps.__data__(), "daily_note": None}, file)
+
+    main(["--data-dir", directory, "upgrade"])
+    with open(filename) as file:
+        raw = json.load(file)
+    assert raw["version"] == storage.SCHEMA_VERSION and "strings" not in raw
+    assert not os.path.exists(os.path.join(directory, strings.REGISTRY_FILENAME))
+    assert ActiveApplications(storage.load_day_file(filename)["tracker_data"]) == apps
+
+    main(["--data-dir", directory, "upgrade", "--use-registry"])
+    with open(filename) as file:
+        assert json.load(file)["strings"] == strings.REGISTRY_FILENAME
+    assert ActiveApplications(storage.load_day_file(filename)["tracker_data"]) == apps
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
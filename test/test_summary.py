@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+from track.core import columnar, common, storage, summary
+
+
+def test_summary_index_updates_incrementally(random_day, tmp_path):
+    directory = str(tmp_path)
+    store = storage.open_store(directory, "json")
+    apps = random_day()
+    store.save("track-20200101.json", {"tracker_data": apps.__data__(), "daily_note": "a\nb"})
+    columnar.write(os.path.join(directory, "track-20200102.bin"), random_day(2), None)
+
+    index = summary.SummaryIndex(store)
+    assert index.update() == 2
+    day = index.get("track-20200101.json")
+    assert day[:6] == (
+        apps.begin_index(),
+        apps.end_index(),
+        apps.time_active(),
+        apps.time_in_category(common.Category.WORK),
+        apps.time_in_category(common.Category.PRIVATE),
+        "a",
+    )
+    assert sum(day.main_apps.values()) == apps.time_active()
+    assert index.days() == ["track-20200101.json", "track-20200102.bin"]
+    assert index.update() == 0
+
+    # a fresh instance reads the index file and only re-reads modified days
+    store.save("track-20200101.json", {"tracker_data": apps.__data__(), "daily_note": "c"})
+    index = summary.SummaryIndex(store)
+    assert len(index) == 2
+    assert index.update() == 1
+    assert index.get("track-20200101.json").note == "c"
+
+    os.remove(os.path.join(directory, "track-20200102.bin"))
+    assert index.update() == 0
+    assert index.days() == ["track-20200101.json"]
+    assert summary.SummaryIndex(store).days() == ["track-20200101.json"]
+
+
+def test_categorized_summary(random_day):
+    apps = random_day()
+    day = summary.summarize(apps, None)
+    rule_set = common.RuleSet([(r"Terminal", 2), (r"Slack", 3)])
+    apps.recategorize(rule_set)
+    assert day.categorized(rule_set) == summary.summarize(apps, None)
+
+
+def test_categorized_summary_is_incremental(random_day):
+    apps = random_day()
+    day = summary.summarize(apps, None)
+    app_infos = day.app_infos()
+    rule_set = common.RuleSet([(r"Terminal", 2), (r"Slack", 3), (r"Zoom", 2)])
+    day.categorized(rule_set, app_infos)
+    updated = rule_set.updated([(r"Terminal", 2), (r"Firefox", 3), (r"Zoom", 2)])
+    apps.recategorize(common.RuleSet(updated))
+    assert day.categorized(updated, app_infos) == summary.summarize(apps, None)
+    # unchanged rules don't get evaluated again
+    before, after = rule_set.stats(), updated.stats()
+    assert [after[0]["evaluations"], after[2]["evaluations"]] == [
+        before[0]["evaluations"],
+        before[2]["evaluations"],
+    ]
+
+
+def test_summary_index_on_sqlite(random_day, tmp_path):
+    store = storage.open_store(str(tmp_path), "sqlite")
+    store.save("track-20200101.json", {"tracker_data": random_day().__data__()})
+    index = summary.SummaryIndex(store)
+    assert index.update() == 1
+    assert index.update() == 0
+    store.save("track-20200101.json", {"tracker_data": random_day(3).__data__()})
+    assert index.update() == 1
+    assert index.get("track-20200101.json").active == random_day(3).time_active()
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
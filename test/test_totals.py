@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+from track.core import ActiveApplications, AppInfo, codec, common
+
+
+def assert_totals(apps):
+    minutes = apps._minutes.values()
+    for category in common.Category:
+        assert apps.time_in_category(category) == sum(
+            minute.main_category() == category for minute in minutes
+        )
+    seconds = {}
+    for minute in minutes:
+        for app, count in minute._app_counter.items():
+            seconds[app._category] = seconds.get(app._category, 0) + count
+    assert {c: s for c, s in apps.seconds_per_category().items() if s} == seconds
+
+
+def test_totals_follow_updates_and_clipping():
+    rng = random.Random(11)
+    apps = ActiveApplications()
+    titles = ["Slack", "Terminal", "Firefox"]
+    rules = common.RuleSet([(r"Slack", 2), (r"Firefox", 3)])
+    for _ in range(2000):
+        app = AppInfo(rng.choice(titles), "cmd")
+        rules.categorize(app)
+        apps.update(rng.randrange(480, 600), app)
+        apps.time_in_category(2)  # keeps totals counted incrementally
+    assert_totals(apps)
+
+    apps.set_minute(500, {apps.intern(AppInfo("Terminal", "cmd")): 60})
+    assert_totals(apps)
+    apps.clip_from(490)
+    apps.clip_to(590)
+    assert_totals(apps)
+
+
+def test_totals_follow_recategorization(random_day):
+    apps = random_day(6)
+    assert_totals(apps)
+    assert apps.recategorize([(r"Terminal", 2), (r".*", 3)])
+    assert_totals(apps)
+    assert apps.time_in_category(1) == 0
+
+    loaded = ActiveApplications(apps.__data__())
+    assert loaded.seconds_per_category() == apps.seconds_per_category()
+
+
+def test_totals_survive_lookups_and_polls(random_day, track_server):
+    apps = random_day(5)
+    apps.time_in_category(2)
+    apps.app("Slack")
+    assert apps._totals is not None
+
+    server = track_server()
+    for minute, app in apps.timeline():
+        server._tracker.get_applications_model().update(minute, app)
+    reply = codec.decode(server.encoded_reply(codec.encode({"cmd": "apps"})))["data"]
+    polled = ActiveApplications()
+    polled.from_dict(reply["apps"], reply["totals"])
+    assert polled._totals is not None
+    assert_totals(polled)
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
@@ -11,11 +11,24 @@ import json
 import os
 import sys
 from contextlib import suppress
-from typing import List
+from datetime import date, timedelta
+from typing import Any, Dict, List
 
 import zmq
 
-from .core import ActiveApplications, common, util
+from .core import (
+    ActiveApplications,
+    archive,
+    codec,
+    common,
+    date_range,
+    history,
+    segments,
+    storage,
+    strings,
+    summary,
+    util,
+)
 from .core.util import log
 
 
@@ -39,9 +52,76 @@ def parse_arguments(argv: List[str]) -> argparse.Namespace:
     parser_server = subparsers.add_parser("serve", help="send command to server")
     parser_server.set_defaults(func=fn_serve)
 
+    parser_recategorize = subparsers.add_parser(
+        "recategorize", help="apply current rules to all recorded days in parallel"
+    )
+    parser_recategorize.set_defaults(func=fn_recategorize)
+    parser_recategorize.add_argument(
+        "--processes", "-j", type=int, help="number of worker processes (default: all CPUs)"
+    )
+
+    parser_convert = subparsers.add_parser(
+        "convert", help="convert day files between JSON and columnar (mmap) format"
+    )
+    parser_convert.set_defaults(func=fn_convert)
+    parser_convert.add_argument("--to", choices=["json", "columnar"], default="columnar")
+    parser_convert.add_argument("element", nargs="+")
+
+    parser_import = subparsers.add_parser(
+        "import", help="import all day files into the SQLite database (see --storage)"
+    )
+    parser_import.set_defaults(func=fn_import)
+    parser_import.add_argument(
+        "--processes", "-j", type=int, help="number of worker processes (default: all CPUs)"
+    )
+
+    parser_archive = subparsers.add_parser(
+        "archive", help="pack day files of past days into compressed containers"
+    )
+    parser_archive.set_defaults(func=fn_archive)
+    parser_archive.add_argument(
+        "--older-than", type=archive.parse_age, default="30d", help="e.g. 30d or 6w"
+    )
+    parser_archive.add_argument("--method", choices=sorted(archive.METHODS), default="lzma")
+
+    parser_upgrade = subparsers.add_parser(
+        "upgrade", help="rewrite JSON day files in the current schema version"
+    )
+    parser_upgrade.set_defaults(func=fn_upgrade)
+    parser_upgrade.add_argument("element", nargs="*", help="default: all days")
+    parser_upgrade.add_argument(
+        "--use-registry",
+        action="store_true",
+        help="move titles and command lines of self-contained day files into the shared"
+        " string registry (%s) - the day files can't be read without it then"
+        % strings.REGISTRY_FILENAME,
+    )
+
     parser_show = subparsers.add_parser("show", help="show content of one log file")
     parser_show.set_defaults(func=fn_show)
     parser_show.add_argument("element", nargs="+")
+    parser_show.add_argument(
+        "--min-break",
+        type=int,
+        default=segments.DEFAULT_SETTINGS.min_break,
+        help="minimum idle minutes counted as break",
+    )
+    parser_show.add_argument(
+        "--max-gap",
+        type=int,
+        default=segments.DEFAULT_SETTINGS.max_gap,
+        help="idle minutes an app run may span",
+    )
+
+    parser_stats = subparsers.add_parser("stats", help="show totals over a range of days")
+    parser_stats.set_defaults(func=fn_stats)
+    parser_stats.add_argument(
+        "--from", dest="first", type=date_range.parse_date, help="default: 6 days before --to"
+    )
+    parser_stats.add_argument(
+        "--to", dest="last", type=date_range.parse_date, help="default: today"
+    )
+    parser_stats.add_argument("--top", type=int, default=10, help="number of apps to list")
 
     parser_ui = subparsers.add_parser("ui", help="start the track ui")
     parser_ui.set_defaults(func=fn_ui)
@@ -57,8 +137,8 @@ def send_request(request):
 
     req_socket.connect("tcp://127.0.0.1:3456")
 
-    req_socket.send_json(request)
-    return req_socket.recv_json()
+    req_socket.send(codec.encode(request))
+    return codec.decode(req_socket.recv())
 
 
 def handle_result(result):
@@ -67,8 +147,23 @@ def handle_result(result):
     print(result)
 
 
-def convert(data):
-    return data if "tracker_data" in data else {"tracker_data": data}
+def show_rules_stats(result: Dict[str, Any]) -> None:
+    if "type" in result and result["type"] == "error":
+        raise Exception('server replied with error: "%s"' % result["what"])
+    print("%8s %8s %8s %10s  %-4s %s" % ("samples", "evals", "matches", "time [ms]", "cat", "rule"))
+    for stats in result["data"]["rules_stats"]:
+        print(
+            "%8d %8d %8d %10.3f  %-4s %s"
+            % (
+                stats["samples"],
+                stats["evaluations"],
+                stats["matches"],
+                stats["time_us"] / 1000,
+                stats["category"],
+                stats["rule"],
+            )
+        )
+    print("category cache: %r" % result["data"]["category_cache"])
 
 
 def to_time(value):
@@ -88,24 +183,33 @@ def fn_serve(args) -> None:
 
 
 def fn_server(args) -> None:
-    if args.command not in {"quit", "version", "apps", "current", "rules", "save", "note"}:
+    if args.command not in {
+        "quit",
+        "version",
+        "apps",
+        "current",
+        "rules",
+        "rules_stats",
+        "save",
+        "note",
+    }:
         log().error("Command not known: %r", args.command)
         return
 
     try:
         result = send_request({"cmd": args.command})
-        handle_result(result)
+        (show_rules_stats if args.command == "rules_stats" else handle_result)(result)
     except zmq.ZMQError as e:
         log.error(e)
         return
 
 
 def fn_show(args) -> None:
-    log_dir = args.data_dir
+    store = storage.open_store(args.data_dir, args.storage)
 
     log().info("Show infos for %r", args.element)
     for file in args.element:
-        data = convert(json.load(open(os.path.join(log_dir, file))))
+        data = store.load(file)
         apps = ActiveApplications(data["tracker_data"])
         daily_note = data.get("daily_note") or ""
         print(
@@ -120,31 +224,97 @@ def fn_show(args) -> None:
         )
         for time in (t for t in range(apps.begin_index(), apps.end_index()) if t in apps._minutes):
             print(to_time(time))
+        day = segments.segment(apps, segments.Settings(args.max_gap, args.min_break))
+        for begin, end in day.sessions:
+            print("session %s - %s" % (to_time(begin), to_time(end)))
+        for begin, end in day.breaks:
+            print("break   %s - %s (%s)" % (to_time(begin), to_time(end), to_time(end - begin + 1)))
+        print("%d app runs, %s in breaks" % (len(day.runs), to_time(day.time_in_breaks())))
         print(daily_note)
 
 
+def fn_convert(args: argparse.Namespace) -> None:
+    for file in args.element:
+        path = file if os.path.exists(file) else os.path.join(args.data_dir, file)
+        log().info("Wrote %r", storage.convert_day_file(path, args.to))
+
+
+def fn_upgrade(args: argparse.Namespace) -> None:
+    names = args.element or [
+        name for name in common.log_files(args.data_dir) if name == storage.plain_path(name)
+    ]
+    upgraded = 0
+    for name in (name for name in names if name.endswith(".json")):
+        path = name if os.path.exists(name) else os.path.join(args.data_dir, name)
+        upgraded += storage.upgrade_day_file(path, args.use_registry)
+    log().info("Upgraded %d of %d day files", upgraded, len(names))
+
+
+def fn_recategorize(args: argparse.Namespace) -> None:
+    rules_file = os.path.join(args.data_dir, "category_rules.json")
+    try:
+        with open(rules_file) as file:
+            rules = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError) as exc:
+        log().error("Could not read category rules from %r: %s", rules_file, exc)
+        raise SystemExit(1) from exc
+    written = history.recategorize_files(args.data_dir, rules, processes=args.processes)
+    log().info("Wrote %d category sidecar files", written)
+
+
+def fn_archive(args: argparse.Namespace) -> None:
+    archive.archive(args.data_dir, older_than=args.older_than, method=args.method)
+
+
+def fn_import(args: argparse.Namespace) -> None:
+    store = storage.open_store(args.data_dir, "sqlite")
+    imported = store.import_directory(args.data_dir, processes=args.processes)
+    log().info("Imported %d days into %r", imported, store)
+
+
+def fn_stats(args: argparse.Namespace) -> None:
+    last = args.last or date.today()
+    first = args.first or last - timedelta(days=6)
+    rules_file = os.path.join(args.data_dir, "category_rules.json")
+    rule_set = None
+    if os.path.exists(rules_file):
+        with open(rules_file) as file:
+            rule_set = common.RuleSet(json.load(file))
+    view = date_range.DateRangeView(
+        storage.open_store(args.data_dir, args.storage), first, last, rule_set
+    )
+    stats = view.aggregate()
+    print("%s - %s: %d days with data" % (first, last, stats.days))
+    if not stats.days:
+        return
+    print("earliest begin: %s, latest end: %s" % (to_time(stats.earliest), to_time(stats.latest)))
+    print("active:  %s" % to_time(stats.active))
+    for category in (common.Category.WORK, common.Category.PRIVATE, common.Category.BREAK):
+        print("%-8s %s" % (category.name.lower() + ":", to_time(stats.time_in_category(category))))
+    print("top apps:")
+    for identifier, minutes in stats.top_apps(args.top):
+        print("  %s  %s" % (to_time(minutes), identifier))
+
+
 def fn_info(args) -> None:
-    log_dir = args.data_dir
+    index = summary.SummaryIndex(storage.open_store(args.data_dir, args.storage))
+    index.update()
     log().info("List recorded data")
-    for file in common.log_files(log_dir):
-        data = convert(json.load(open(os.path.join(log_dir, file))))
-        if "20200503" in file:
-            print(file)
-        apps = ActiveApplications(data["tracker_data"])
-        daily_note = data.get("daily_note") or ""
+    for file in index.days():
+        day = index.get(file)
+        if day is None:
+            continue
         print(
             "%s: %s - %s = %s => %s (note: %r)"
             % (
                 file,
-                to_time(apps.begin_index()),
-                to_time(apps.end_index()),
-                to_time(apps.end_index() - apps.begin_index()),
-                to_time(apps.end_index() - apps.begin_index() - 60),
-                daily_note.split("\n")[0],
+                to_time(day.begin),
+                to_time(day.end),
+                to_time(day.end - day.begin),
+                to_time(day.end - day.begin - 60),
+                day.note,
             )
         )
-        # print("".join(("X" if minute in apps._minutes else " ")
-        #        for minute in range(apps.begin_index(), apps.end_index() + 1)))
 
 
 def main(argv=None) -> int:
@@ -4,11 +4,115 @@
 """Defines class ActiveApplications
 """
 
-from typing import Any, Dict, Tuple  # pylint: disable=unused-import
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import (  # pylint: disable=unused-import
+    Any,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from ..core import common
 
 
+class MainAppRuns:
+    """Segment index over a timeline: sorted runs of consecutive active minutes sharing
+    the same main app, stored as parallel lists (first minute, last minute, main app)"""
+
+    def __init__(self) -> None:
+        self._starts = []  # type: List[int]
+        self._ends = []  # type: List[int]
+        self._apps = []  # type: List[common.AppInfo]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, common.AppInfo]]:
+        return zip(self._starts, self._ends, self._apps)
+
+    def rebuild(self, minutes: Dict[int, common.Minute]) -> None:
+        """Create all runs for @minutes from scratch"""
+        starts, ends, apps = [], [], []  # type: Tuple[List[int], List[int], List[Any]]
+        for index in sorted(minutes):
+            app = minutes[index].main_app()
+            if ends and ends[-1] == index - 1 and apps[-1] == app:
+                ends[-1] = index
+            else:
+                starts.append(index)
+                ends.append(index)
+                apps.append(app)
+        self._starts, self._ends, self._apps = starts, ends, apps
+
+    def set(self, minute: int, app: common.AppInfo) -> None:
+        """Make @app the main app of (active) @minute, splitting and merging runs as needed"""
+        starts, ends, apps = self._starts, self._ends, self._apps
+        position = bisect_right(starts, minute)
+        i = position - 1
+        if i >= 0 and ends[i] >= minute:
+            if apps[i] == app:
+                return
+            # split the run containing @minute, which is then not covered anymore
+            start, end, old_app = starts[i], ends[i], apps[i]
+            del starts[i], ends[i], apps[i]
+            position = i
+            if start < minute:
+                starts.insert(position, start)
+                ends.insert(position, minute - 1)
+                apps.insert(position, old_app)
+                position += 1
+            if minute < end:
+                starts.insert(position, minute + 1)
+                ends.insert(position, end)
+                apps.insert(position, old_app)
+
+        # @minute belongs in front of run @position - join neighbours if possible
+        joins_left = position > 0 and ends[position - 1] == minute - 1 and apps[position - 1] == app
+        joins_right = position < len(starts) and starts[position] == minute + 1
+        joins_right = joins_right and apps[position] == app
+        if joins_left and joins_right:
+            ends[position - 1] = ends[position]
+            del starts[position], ends[position], apps[position]
+        elif joins_left:
+            ends[position - 1] = minute
+        elif joins_right:
+            starts[position] = minute
+        else:
+            starts.insert(position, minute)
+            ends.insert(position, minute)
+            apps.insert(position, app)
+
+    def clip_from(self, index: int) -> None:
+        """Drop everything before @index"""
+        first = bisect_left(self._ends, index)
+        del self._starts[:first], self._ends[:first], self._apps[:first]
+        if self._starts and self._starts[0] < index:
+            self._starts[0] = index
+
+    def clip_to(self, index: int) -> None:
+        """Drop everything after @index"""
+        end = bisect_right(self._starts, index)
+        del self._starts[end:], self._ends[end:], self._apps[end:]
+        if self._ends and self._ends[-1] > index:
+            self._ends[-1] = index
+
+    def chunk(self, minute: int) -> Tuple[int, int]:
+        """Return the run containing @minute or - for an inactive minute - the last active
+        minute before and the first one after it (@minute if there is none)"""
+        i = bisect_right(self._starts, minute) - 1
+        if i >= 0 and self._ends[i] >= minute:
+            return self._starts[i], self._ends[i]
+        return (
+            self._ends[i] if i >= 0 else minute,
+            self._starts[i + 1] if i + 1 < len(self._starts) else minute,
+        )
+
+
 class ActiveApplications:
     """Data model which holds all application usage data for one
     day. That is:
@@ -26,9 +130,21 @@ class ActiveApplications:
         * sortable by key
         * can be done with list of keys sorted by given value
         [(app_id, i_secs, i_cat)]
+
+    Thread safety: there is one writer at a time (modifications are serialized by a
+    lock) and any number of readers, which get consistent data via snapshot(). Minutes
+    get replaced rather than modified once they're stored, so taking a snapshot only
+    needs the lock for copying references and app counters.
     """
 
+    UNDO_DEPTH = 10  # number of clips which can be undone
+
     def __init__(self, json_data=None):
+        self._revision = 0
+        self._lock = threading.RLock()
+        # categories get changed in place, without a new revision
+        self._categories_generation = 0
+        self._snapshot = (None, {})  # type: Tuple[Any, Dict[str, Any]]
         self.clear()
 
         if json_data is not None:
@@ -39,27 +155,78 @@ class ActiveApplications:
 
     def __str__(self) -> str:
         return "Apps(%r to %r)" % (
-            common.mins_to_date(self._index_min),
-            common.mins_to_date(self._index_max),
+            common.mins_to_date(self.begin_index()),
+            common.mins_to_date(self.end_index()),
         )
 
     def clear(self):
         """Clears all data (app info and timeline)"""
-        # todo: mutex
-        self._index_min = None
-        self._index_max = None
-        self._apps = {}  # app identifier => AppInfo instance
-        self._minutes = {}  # i_min          => minute
+        with self._lock:
+            self._revision += 1
+            self._index_min = None
+            self._index_max = None
+            self._apps = {}  # type: Dict[str, common.AppInfo]  # app identifier => AppInfo
+            self._minutes = {}  # i_min          => minute
+            self._keys = []  # type: List[int]  # sorted keys of _minutes
+            self._runs = MainAppRuns()
+            # minutes removed by the last clips: [[(i_min, minute)]]
+            self._undo_log = deque(
+                maxlen=self.UNDO_DEPTH
+            )  # type: Deque[List[Tuple[int, common.Minute]]]
+            # minutes and app seconds per category - None if they have to be recounted
+            self._totals = ({}, {})  # type: Optional[Tuple[Dict[int, int], Dict[int, int]]]
+
+    def revision(self) -> int:
+        """Return a number which changes with every modification of apps or timeline"""
+        return self._revision
 
     def clip_from(self, index):
         """Removes all timeline data before provided index"""
-        self._minutes = {minute: apps for minute, apps in self._minutes.items() if minute >= index}
-        self._index_min = min(self._minutes.keys())
+        with self._lock:
+            end = bisect_left(self._keys, index)
+            self._clip(self._keys[:end])
+            del self._keys[:end]
+            self._runs.clip_from(index)
+            self._update_range()
 
     def clip_to(self, index):
         """Removes all timeline data after provided index"""
-        self._minutes = {minute: apps for minute, apps in self._minutes.items() if minute <= index}
-        self._index_max = max(self._minutes.keys())
+        with self._lock:
+            begin = bisect_right(self._keys, index)
+            self._clip(self._keys[begin:])
+            del self._keys[begin:]
+            self._runs.clip_to(index)
+            self._update_range()
+
+    def _clip(self, removed: List[int]) -> None:
+        """Remove minutes @removed from the timeline and remember them for undo_clip()"""
+        self._revision += 1
+        entry = [(minute, self._minutes.pop(minute)) for minute in removed]
+        for _, minute in entry:
+            self._count_minute(minute, -1)
+        if entry:
+            self._undo_log.append(entry)
+
+    def undo_clip(self) -> bool:
+        """Restore the minutes removed by the last clip (as far as they've not been
+        recorded again since). Return False if there's nothing to undo"""
+        with self._lock:
+            if not self._undo_log:
+                return False
+            self._revision += 1
+            for minute_index, minute in self._undo_log.pop():
+                if minute_index in self._minutes:
+                    continue
+                self._minutes[minute_index] = minute
+                insort(self._keys, minute_index)
+                self._count_minute(minute, 1)
+                self._runs.set(minute_index, minute.main_app())
+            self._update_range()
+            return True
+
+    def _update_range(self) -> None:
+        self._index_min = self._keys[0] if self._keys else None
+        self._index_max = self._keys[-1] if self._keys else None
 
     def __eq__(self, other):
         """Comparing is only needed for tests"""
@@ -80,40 +247,63 @@ class ActiveApplications:
         result:    app:     [AppInfo]
                    minutes: {i_minute: (i_category, [(AppInfo, i_count)])}
 
+        see snapshot() - the result must not be modified
         """
-        _indexed = {a: i for i, a in enumerate(self._apps.values())}
-        _apps = [d[1] for d in sorted([(e[1], e[0].__data__()) for e in _indexed.items()])]
-        _minutes = {
-            i: [(_indexed[a], c) for a, c in m._app_counter.items()]
-            for i, m in self._minutes.items()
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the data of the current revision in JSON snapshot format. Snapshots get
+        created once per revision and shared by all readers, so they must not be modified.
+        Can be called from any thread"""
+        revision, snapshot = self._snapshot
+        if revision == (self._revision, self._categories_generation):
+            return snapshot
+        with self._lock:
+            revision = (self._revision, self._categories_generation)
+            _apps = list(self._apps.values())
+            _app_data = [a.__data__() for a in _apps]
+            _minutes = dict(self._minutes)  # stored minutes don't get modified anymore
+        _indexed = {a: i for i, a in enumerate(_apps)}
+        snapshot = {
+            "apps": _app_data,
+            "minutes": {
+                i: [(_indexed[a], c) for a, c in m._app_counter.items()]
+                for i, m in _minutes.items()
+            },
         }
-        return {"apps": _apps, "minutes": _minutes}
-
-    def from_dict(self, data):
-        def convert(minutes):
-            # todo: just translate local files
-            if all(len(data) == 2 and isinstance(data[0], int) for index, data in minutes.items()):
-                return {key: value[1] for key, value in minutes.items()}
-            return minutes
-
+        self._snapshot = (revision, snapshot)
+        return snapshot
+
+    def from_dict(
+        self, data: Dict[str, Any], totals: Optional[Dict[str, Dict[Any, int]]] = None
+    ) -> None:
+        """Load @data in current format - see storage.load_day_file() for older formats.
+        @totals (see totals()) of the same data save recounting them"""
         assert "apps" in data
         assert "minutes" in data
         _a = data["apps"]
         _indexed = [common.AppInfo().load(d) for d in _a]
-        _m = convert(data["minutes"])
+        _m = data["minutes"]
         _minutes = {int(i): common.Minute({_indexed[a]: c for a, c in m}) for i, m in _m.items()}
 
         _apps = {a.generate_identifier(): a for a in _indexed}
 
-        self._apps = _apps
-        self._minutes = _minutes
-
-        if len(self._minutes) > 0:
-            self._index_min = min(self._minutes.keys())
-            self._index_max = max(self._minutes.keys())
-        else:
-            self._index_min = None
-            self._index_max = None
+        with self._lock:
+            self._revision += 1
+            self._apps = _apps
+            self._minutes = _minutes
+            self._keys = sorted(_minutes)
+            self._runs.rebuild(_minutes)
+            self._totals = (
+                None
+                if totals is None
+                else (
+                    {int(category): count for category, count in totals["minutes"].items()},
+                    {int(category): count for category, count in totals["seconds"].items()},
+                )
+            )
+            self._undo_log.clear()
+            self._update_range()
 
     def begin_index(self):  # const
         return self._index_min if self._index_min else 0
@@ -122,61 +312,52 @@ class ActiveApplications:
         return self._index_max if self._index_max else 0
 
     def update(self, minute_index, app):
-        # todo: mutex
-        _app_id = app.generate_identifier()
-
-        if _app_id not in self._apps:
-            self._apps[_app_id] = app
-
-        _app = self._apps[_app_id]
-        _app._count += 1
-
-        if minute_index not in self._minutes:
-            self._minutes[minute_index] = common.Minute()
-            if not self._index_min or self._index_min > minute_index:
-                self._index_min = minute_index
-
-            if not self._index_max or self._index_max < minute_index:
-                self._index_max = minute_index
-
-        self._minutes[minute_index].add(_app)
+        with self._lock:
+            self._revision += 1
+            _app_id = app.generate_identifier()
+
+            if _app_id not in self._apps:
+                self._apps[_app_id] = app
+
+            _app = self._apps[_app_id]
+            _app._count += 1
+
+            if minute_index in self._minutes:
+                # copy on write - snapshots might still refer to the stored minute
+                _minute = self._minutes[minute_index].copy()
+            else:
+                _minute = common.Minute()
+                insort(self._keys, minute_index)
+                if not self._index_min or self._index_min > minute_index:
+                    self._index_min = minute_index
+
+                if not self._index_max or self._index_max < minute_index:
+                    self._index_max = minute_index
+
+            main_app = _minute.main_app()
+            _minute.add(_app)
+            self._minutes[minute_index] = _minute
+            if self._totals is not None:
+                minutes, seconds = self._totals
+                if _minute.main_app() is not main_app:
+                    if main_app is not None:
+                        minutes[main_app._category] -= 1
+                    category = _minute.main_category()
+                    minutes[category] = minutes.get(category, 0) + 1
+                seconds[_app._category] = seconds.get(_app._category, 0) + 1
+            self._runs.set(minute_index, _minute.main_app())
 
     def get_chunk_size(self, minute):
+        """Return first and last minute of the run of minutes sharing the main app of
+        @minute - or the surrounding active minutes if @minute is not active"""
         if not (self._index_max and self._index_min):
             return 0, 0
 
-        _begin = minute
-        _end = minute
-
         if minute > self._index_max or minute < self._index_min:
-            return _begin, _end
-
-        _a = self._minutes[minute].main_app() if self.is_active(minute) else None
-        _minutes = sorted(self._minutes.keys())
+            return minute, minute
 
-        _lower_range = [i for i in _minutes if i < minute]
-        _upper_range = [i for i in _minutes if i > minute]
-
-        if _a is None:
-            return (
-                _lower_range[-1] if _lower_range != [] else _begin,
-                _upper_range[0] if _upper_range != [] else _end,
-            )
-
-        for i in reversed(_lower_range):
-            if _begin - i > 1:
-                break
-            if self._minutes[i].main_app() == _a:
-                _begin = i
-
-        for i in _upper_range:
-            if i - _end > 1:
-                break
-            if self._minutes[i].main_app() == _a:
-                _end = i
-
-        # todo: currently gap is max 1min - make configurable
-        return _begin, _end
+        # see segments.segment() for runs bridging idle gaps
+        return self._runs.chunk(minute)
 
     def info_at(self, minute: int) -> Tuple[int, str]:
         return (
@@ -190,5 +371,111 @@ class ActiveApplications:
     def category_at(self, minute):
         return self._minutes[minute].main_category() if minute in self._minutes else 0
 
+    def time_active(self) -> int:
+        """Return the number of active minutes"""
+        return len(self._minutes)
+
+    def time_in_category(self, category: int) -> int:
+        """Return the number of minutes mainly spent in @category"""
+        return self._category_totals()[0].get(category, 0)
+
+    def seconds_per_category(self) -> Dict[int, int]:
+        """Return {category: number of seconds spent in apps of that category}"""
+        return dict(self._category_totals()[1])
+
+    def totals(self) -> Dict[str, Dict[int, int]]:
+        """Return minutes and seconds per category, to be passed to from_dict() along with
+        the snapshot - can be called from any thread"""
+        with self._lock:
+            minutes, seconds = self._category_totals()
+            return {"minutes": dict(minutes), "seconds": dict(seconds)}
+
+    def _category_totals(self) -> Tuple[Dict[int, int], Dict[int, int]]:
+        totals = self._totals
+        if totals is None:
+            with self._lock:
+                self._totals = ({}, {})
+                for minute in self._minutes.values():
+                    self._count_minute(minute, 1)
+                totals = self._totals
+        return totals
+
+    def _count_minute(self, minute: common.Minute, sign: int) -> None:
+        """Add (@sign = 1) or remove (@sign = -1) @minute to / from the totals"""
+        if self._totals is None:
+            return
+        minutes, seconds = self._totals
+        category = minute.main_category()
+        minutes[category] = minutes.get(category, 0) + sign
+        for app, count in minute._app_counter.items():
+            seconds[app._category] = seconds.get(app._category, 0) + sign * count
+
+    def timeline(self) -> List[Tuple[int, common.AppInfo]]:
+        """Return (minute, main app) for all active minutes, sorted by minute"""
+        with self._lock:
+            return [(minute, self._minutes[minute].main_app()) for minute in self._keys]
+
+    def main_app_minutes(self) -> Dict[str, int]:
+        """Return {app identifier: number of minutes the app was the main app}"""
+        result = {}  # type: Dict[str, int]
+        for minute in list(self._minutes.values()):
+            identifier = minute.main_app().generate_identifier()
+            result[identifier] = result.get(identifier, 0) + 1
+        return result
+
     def apps(self):
+        """Return the stored AppInfo instances - use recategorize() to change their
+        categories or call categories_changed() afterwards"""
         return (app for _, app in self._apps.items())
+
+    def recategorize(self, rules: Union[common.Rules, common.RuleSet]) -> bool:
+        """Categorize all stored apps by @rules, return whether any category has changed"""
+        changed = common.recategorize(self.apps(), rules)
+        if changed:
+            self.categories_changed()
+        return changed
+
+    def app(self, identifier: str) -> Optional[common.AppInfo]:
+        """Return the stored AppInfo instance for @identifier if there is one"""
+        return self._apps.get(identifier)
+
+    def categories_changed(self) -> None:
+        """Have the category totals recounted and snapshots re-created - needed after the
+        category of stored apps has been changed"""
+        with self._lock:
+            self._categories_generation += 1
+            self._totals = None
+
+    def intern(self, app: common.AppInfo) -> common.AppInfo:
+        """Return the stored AppInfo instance equivalent to @app, store @app if there is none"""
+        identifier = app.generate_identifier()
+        with self._lock:
+            if identifier not in self._apps:
+                self._revision += 1
+                self._apps[identifier] = app
+            return self._apps[identifier]
+
+    def minute_counter(self, minute_index: int) -> Optional[Dict[common.AppInfo, int]]:
+        """Return {AppInfo: count} for given minute or None if not active"""
+        minute = self._minutes.get(minute_index)
+        return None if minute is None else minute._app_counter
+
+    def set_minute(self, minute_index: int, app_counter: Dict[common.AppInfo, int]) -> None:
+        """Replace all data of one minute - apps have to be interned already"""
+        with self._lock:
+            self._revision += 1
+            if minute_index in self._minutes:
+                self._count_minute(self._minutes[minute_index], -1)
+                for app, count in self._minutes[minute_index]._app_counter.items():
+                    app._count -= count
+            else:
+                insort(self._keys, minute_index)
+            for app, count in app_counter.items():
+                app._count += count
+            self._minutes[minute_index] = common.Minute(dict(app_counter))
+            self._count_minute(self._minutes[minute_index], 1)
+            self._runs.set(minute_index, self._minutes[minute_index].main_app())
+            if not self._index_min or self._index_min > minute_index:
+                self._index_min = minute_index
+            if not self._index_max or self._index_max < minute_index:
+                self._index_max = minute_index
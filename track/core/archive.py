@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Packs day files of past days into compressed containers
+
+    gzip / lzma   one compressed file per day (`track-YYYYMMDD.json.gz` / `.json.xz`)
+    zip           one container per month (`track-YYYYMM.zip`) holding the day files
+
+Archived days are stored as compact JSON. Loaders (see storage.load_day_file() and
+common.log_files()) read archived days transparently.
+"""
+
+import gzip
+import lzma
+import os
+import re
+import zipfile
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from . import codec, storage
+from .util import atomic_write, log
+
+METHODS = {"gzip": ".gz", "lzma": ".xz", "zip": ".zip"}
+_OPENERS = {"gzip": gzip.open, "lzma": lzma.open}  # type: Dict[str, Callable[..., Any]]
+
+# day files and backups which can be archived
+_ARCHIVABLE_PATTERN = re.compile(r"^track-(?:backup-)?(\d{8})\.(json|bin)$")
+
+
+def parse_age(age: str) -> int:
+    """Return the number of days described by @age ('30d', '6w' or just '30')"""
+    match = re.match(r"^(\d+)([dw]?)$", age.strip())
+    if not match:
+        raise ValueError("%r is not a valid age (expected e.g. '30d' or '6w')" % age)
+    return int(match.group(1)) * (7 if match.group(2) == "w" else 1)
+
+
+def _archivable(directory: str, older_than: int) -> List[Tuple[str, str]]:
+    """Return (file name, YYYYMMDD) for all day files in @directory older than
+    @older_than days"""
+    cutoff = (date.today() - timedelta(days=older_than)).strftime("%Y%m%d")
+    result = []
+    for name in sorted(os.listdir(directory)):
+        match = _ARCHIVABLE_PATTERN.match(name)
+        if match and match.group(1) < cutoff:
+            result.append((name, match.group(1)))
+    return result
+
+
+def archive(directory: str, older_than: int = 30, method: str = "lzma") -> int:
+    """Pack all day files in @directory older than @older_than days using @method (see
+    METHODS) and remove the originals. Return the number of archived files"""
+    suffix = METHODS[method]
+    archived = 0
+    for name, day in _archivable(directory, older_than):
+        path = os.path.join(directory, name)
+        # columnar files get archived as JSON - mmap doesn't work on compressed data
+        member = os.path.splitext(name)[0] + ".json"
+        content = codec.encode(storage.load_day_file(path))
+        if method == "zip":
+            container = os.path.join(directory, "track-%s.zip" % day[:6])
+            with zipfile.ZipFile(container, "a", compression=zipfile.ZIP_DEFLATED) as file:
+                if member in file.namelist():
+                    log().warning("%r is already archived in %r - keep it", name, container)
+                    continue
+                file.writestr(member, content)
+        else:
+            target = os.path.join(directory, member + suffix)
+            if os.path.exists(target):
+                log().warning("%r is already archived as %r - keep it", name, target)
+                continue
+            with atomic_write(target) as raw, _OPENERS[method](raw, "wb") as packed:
+                packed.write(content)
+        log().debug("Archived %r", name)
+        os.remove(path)
+        archived += 1
+    log().info("Archived %d day files in %r", archived, directory)
+    return archived
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Serialization of day snapshots and server messages
+
+All codecs produce compact JSON, so data written by one codec can be read by any
+other. The fastest codec available is detected on import and used by default:
+
+    json    stdlib, always available
+    orjson  used if the `orjson` package is installed
+"""
+
+import json
+from typing import Any, Dict, Type, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+class JsonCodec:
+    """Compact JSON via the standard library"""
+
+    name = "json"
+
+    @staticmethod
+    def encode(data: Any) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    @staticmethod
+    def decode(raw: bytes) -> Any:
+        return json.loads(raw)
+
+
+class OrjsonCodec:
+    """JSON via orjson - integer dict keys (minutes) get converted to strings like the
+    stdlib json module does"""
+
+    name = "orjson"
+
+    @staticmethod
+    def encode(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    @staticmethod
+    def decode(raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+
+CODECS = {JsonCodec.name: JsonCodec}  # type: Dict[str, Any]
+if orjson is not None:
+    CODECS[OrjsonCodec.name] = OrjsonCodec
+
+DEFAULT = CODECS.get(OrjsonCodec.name, JsonCodec)  # type: Union[Type[JsonCodec], Type[OrjsonCodec]]
+
+
+def get(name: str) -> Any:
+    """Return the codec called @name, raises ValueError if it's not available"""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(
+            "codec %r not available (available: %s)" % (name, ", ".join(CODECS))
+        ) from None
+
+
+def encode(data: Any) -> bytes:
+    return DEFAULT.encode(data)
+
+
+def decode(raw: bytes) -> Any:
+    return DEFAULT.decode(raw)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Compact binary (columnar) day format which gets read via mmap
+
+All numbers are little endian, all sections start 4-byte aligned:
+
+    header          magic, version, counts (see _HEADER)
+    string table    u32 offsets[n_strings + 1], utf-8 blob
+    apps            u32 title[n_apps], u32 cmdline[n_apps], u32 count[n_apps],
+                    u32 category[n_apps]
+    minutes         u32 minute[n_minutes] (sorted), u32 main_app[n_minutes],
+                    u32 first_entry[n_minutes + 1]
+    entries         u32 app[n_entries], u16 count[n_entries]
+
+Only the app table gets turned into Python objects (in order to be re-categorizable),
+the timeline is accessed straight from the mapped file.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from . import common, strings
+from .active_applications import ActiveApplications
+from .util import atomic_write
+
+SUFFIX = ".bin"
+MAGIC = b"TRKC"
+VERSION = 1
+
+# magic, version, n_strings, blob size, n_apps, n_minutes, n_entries, note string index
+_HEADER = struct.Struct("<4sHxxIIIIIi")
+
+
+def _align(offset: int) -> int:
+    return (offset + 3) & ~3
+
+
+def write(filename: str, apps: ActiveApplications, note: Optional[str]) -> None:
+    """Write @apps and @note to @filename in columnar format"""
+    data = apps.__data__()
+    strings = {}  # type: Dict[str, int]
+
+    def string_index(string: str) -> int:
+        return strings.setdefault(string, len(strings))
+
+    app_columns = [array("I") for _ in range(4)]
+    for title, category, count, cmdline in data["apps"]:
+        for column, value in zip(
+            app_columns, (string_index(title), string_index(cmdline), count, category)
+        ):
+            column.append(value)
+    note_index = -1 if note is None else string_index(note)
+
+    minutes, main_apps, first_entries = array("I"), array("I"), array("I", [0])
+    entry_apps, entry_counts = array("I"), array("H")
+    for minute, counter in sorted(data["minutes"].items()):
+        minutes.append(minute)
+        # same result as Minute.main_app(): first app with maximum count
+        main_apps.append(max(counter, key=lambda entry: entry[1])[0])
+        for app, count in counter:
+            entry_apps.append(app)
+            entry_counts.append(min(count, 0xFFFF))
+        first_entries.append(len(entry_apps))
+
+    encoded = [string.encode() for string in strings]
+    offsets = array("I", [0])
+    for blob in encoded:
+        offsets.append(offsets[-1] + len(blob))
+    blob = b"".join(encoded)
+    blob += b"\0" * (_align(len(blob)) - len(blob))
+
+    sections = [offsets, blob, *app_columns, minutes, main_apps, first_entries]  # type: List[Any]
+    sections += [entry_apps, entry_counts]
+    if sys.byteorder != "little":
+        for section in sections:
+            if isinstance(section, array):
+                section.byteswap()
+
+    with atomic_write(filename) as file:
+        file.write(
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                len(encoded),
+                len(blob),
+                len(data["apps"]),
+                len(minutes),
+                len(entry_apps),
+                note_index,
+            )
+        )
+        for section in sections:
+            file.write(section if isinstance(section, bytes) else section.tobytes())
+
+
+class ColumnarDay:
+    """Read-only view on a columnar day file - provides the same read API as
+    ActiveApplications"""
+
+    def __init__(self, filename: str) -> None:
+        with open(filename, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            n_strings,
+            blob_size,
+            n_apps,
+            n_minutes,
+            n_entries,
+            self._note_index,
+        ) = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%r is not a track day file (version %d)" % (filename, VERSION))
+
+        offset = _HEADER.size
+        self._view = memoryview(self._mmap)
+
+        def column(typecode: str, count: int) -> Sequence[int]:
+            nonlocal offset
+            size = array(typecode).itemsize * count
+            view = self._view[offset : offset + size]
+            offset += size
+            if sys.byteorder == "little":
+                return view.cast(typecode)  # type: ignore[call-overload, no-any-return]
+            result = array(typecode, view.tobytes())
+            result.byteswap()
+            return result
+
+        self._string_offsets = column("I", n_strings + 1)
+        self._blob_offset = offset
+        offset += blob_size
+        titles, cmdlines, counts, categories = (column("I", n_apps) for _ in range(4))
+        self._minutes = column("I", n_minutes)
+        self._main_apps = column("I", n_minutes)
+        self._first_entries = column("I", n_minutes + 1)
+        self._entry_apps = column("I", n_entries)
+        self._entry_counts = column("H", n_entries)
+
+        self._apps = []  # type: List[common.AppInfo]
+        for title, cmdline, count, category in zip(titles, cmdlines, counts, categories):
+            app = common.AppInfo(self._string(title), self._string(cmdline))
+            app._count, app._category = count, category
+            self._apps.append(app)
+
+        # clip_from() / clip_to() only restrict the visible range
+        self._first, self._end = 0, n_minutes  # type: int, int
+        self._revision = 0
+
+    def __repr__(self) -> str:
+        return "ColumnarDay(%r to %r)" % (
+            common.mins_to_date(self.begin_index()),
+            common.mins_to_date(self.end_index()),
+        )
+
+    def _string(self, index: int) -> str:
+        begin = self._blob_offset + self._string_offsets[index]
+        end = self._blob_offset + self._string_offsets[index + 1]
+        return strings.intern(self._mmap[begin:end].decode())
+
+    def _position(self, minute: int) -> Optional[int]:
+        """Return the position of @minute in the minute columns or None if not active"""
+        position = bisect_left(self._minutes, minute, self._first, self._end)
+        return position if position < self._end and self._minutes[position] == minute else None
+
+    def note(self) -> Optional[str]:
+        return None if self._note_index < 0 else self._string(self._note_index)
+
+    def apps(self) -> Iterator[common.AppInfo]:
+        return iter(self._apps)
+
+    def recategorize(self, rules: Union[common.Rules, common.RuleSet]) -> bool:
+        """Categorize all apps by @rules, return whether any category has changed"""
+        changed = common.recategorize(self._apps, rules)
+        if changed:
+            self.categories_changed()
+        return changed
+
+    def categories_changed(self) -> None:
+        # categories are not cached, but readers compare revisions
+        self._revision += 1
+
+    def begin_index(self) -> int:
+        return self._minutes[self._first] if self._end > self._first else 0
+
+    def end_index(self) -> int:
+        return self._minutes[self._end - 1] if self._end > self._first else 0
+
+    def revision(self) -> int:
+        return self._revision
+
+    def clip_from(self, index: int) -> None:
+        self._revision += 1
+        self._first = bisect_left(self._minutes, index, self._first, self._end)
+
+    def clip_to(self, index: int) -> None:
+        self._revision += 1
+        self._end = bisect_left(self._minutes, index + 1, self._first, self._end)
+
+    def is_active(self, minute: int) -> bool:
+        return self._position(minute) is not None
+
+    def category_at(self, minute: int) -> int:
+        position = self._position(minute)
+        return 0 if position is None else self._apps[self._main_apps[position]]._category
+
+    def time_active(self) -> int:
+        return self._end - self._first
+
+    def time_in_category(self, category: int) -> int:
+        apps = self._apps
+        return sum(
+            1
+            for main in self._main_apps[self._first : self._end]
+            if apps[main]._category == category
+        )
+
+    def timeline(self) -> Iterator[Tuple[int, common.AppInfo]]:
+        """Return (minute, main app) for all active minutes, sorted by minute"""
+        for position in range(self._first, self._end):
+            yield self._minutes[position], self._apps[self._main_apps[position]]
+
+    def main_app_minutes(self) -> Dict[str, int]:
+        """Return {app identifier: number of minutes the app was the main app}"""
+        result = {}  # type: Dict[str, int]
+        for main in self._main_apps[self._first : self._end]:
+            identifier = self._apps[main].generate_identifier()
+            result[identifier] = result.get(identifier, 0) + 1
+        return result
+
+    def get_chunk_size(self, minute: int) -> Tuple[int, int]:
+        if self._end == self._first:
+            return 0, 0
+        if not self.begin_index() <= minute <= self.end_index():
+            return minute, minute
+        position = bisect_left(self._minutes, minute, self._first, self._end)
+        if position == self._end or self._minutes[position] != minute:
+            return (
+                self._minutes[position - 1] if position > self._first else minute,
+                self._minutes[position] if position < self._end else minute,
+            )
+        main_app = self._main_apps[position]
+        first = last = position
+        while (
+            first > self._first
+            and self._minutes[first - 1] == self._minutes[first] - 1
+            and self._main_apps[first - 1] == main_app
+        ):
+            first -= 1
+        while (
+            last + 1 < self._end
+            and self._minutes[last + 1] == self._minutes[last] + 1
+            and self._main_apps[last + 1] == main_app
+        ):
+            last += 1
+        return self._minutes[first], self._minutes[last]
+
+    def info_at(self, minute: int) -> Tuple[Tuple[int, int], Any]:
+        position = self._position(minute)
+        return (
+            self.get_chunk_size(minute),
+            "idle" if position is None else self._apps[self._main_apps[position]],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the day in JSON snapshot format"""
+        return {
+            "tracker_data": {
+                "apps": [app.__data__() for app in self._apps],
+                "minutes": {
+                    self._minutes[i]: [
+                        (self._entry_apps[e], self._entry_counts[e])
+                        for e in range(self._first_entries[i], self._first_entries[i + 1])
+                    ]
+                    for i in range(self._first, self._end)
+                },
+            },
+            "daily_note": self.note(),
+        }
+
+    def close(self) -> None:
+        for view in (
+            self._string_offsets,
+            self._minutes,
+            self._main_apps,
+            self._first_entries,
+            self._entry_apps,
+            self._entry_counts,
+        ):
+            if isinstance(view, memoryview):
+                view.release()
+        self._view.release()
+        self._mmap.close()
@@ -5,22 +5,31 @@
 """
 
 import argparse
+import hashlib
+import itertools
+import json
 import os
 import re
 import sys
 import time
+import zipfile
 from datetime import datetime
 from enum import IntEnum
 from typing import (  # pylint: disable=unused-import
     Any,
     Dict,
+    Iterable,
+    Iterator,
     List,
     Optional,
+    Pattern,
     Sequence,
     Tuple,
+    Union,
 )
 
 from . import version_info
+from .rule_prefilter import LiteralPrefilter, fold, required_literal
 from .util import log
 
 
@@ -35,11 +44,23 @@ class Category(IntEnum):
 
 
 class AppInfo:
+    __slots__ = (
+        "_wndtitle",
+        "_cmdline",
+        "_category",
+        "_count",
+        "_rule_index",
+        "_rule_generation",
+    )
+
     def __init__(self, windowtitle="", cmdline=""):
         self._wndtitle = windowtitle
         self._cmdline = cmdline
         self._category = 0
         self._count = 0
+        # index of the matching rule and generation of the RuleSet which provided it
+        self._rule_index = None  # type: Optional[int]
+        self._rule_generation = None  # type: Optional[int]
 
     def __eq__(self, other) -> bool:
         return (
@@ -82,51 +103,243 @@ class AppInfo:
 
 
 class Minute:
-    """a minute holds a category and a list of apps"""
+    """a minute holds a category and a list of apps
+
+    The main app (the first app with the highest count) is kept up to date on add(), so
+    main_app() and main_category() don't have to look at all apps. The category is
+    read from the main app, so re-categorizing apps in place is reflected immediately.
+    """
+
+    __slots__ = ("_app_counter", "_main_app")
 
     def __init__(self, app_counter=None):
         self._app_counter = app_counter or {}
+        self._main_app = (
+            max(self._app_counter, key=self._app_counter.__getitem__) if self._app_counter else None
+        )
 
     def __eq__(self, other):
-        if not self._app_counter == other._app_counter:
-            for a, c in self._app_counter.items():
-                print("s: %s:'%s' - %d" % (hex(id(a)), a, c))
-            for a, c in other._app_counter.items():
-                print("o: %s - %d" % (a, c))
-            return False
-        return True
+        return self._app_counter == other._app_counter
 
     def main_category(self):
-        # app1(2): 5
-        # app2(1): 2
-        # app3(1): 7
-        # 2: 5, 1: 2, 1: 7
-        # 2: 5, 1: 9
         return self.main_app()._category
 
     def add(self, app_instance):
-        self._app_counter[app_instance] = self._app_counter.get(app_instance, 0) + 1
+        count = self._app_counter.get(app_instance, 0) + 1
+        self._app_counter[app_instance] = count
+        main_app = self._main_app
+        if main_app is None or count > self._app_counter[main_app]:
+            self._main_app = app_instance
+        elif count == self._app_counter[main_app] and app_instance is not main_app:
+            # tie - like max() prefer the app which has been added first
+            self._main_app = next(a for a in self._app_counter if a in (app_instance, main_app))
 
     def main_app(self):
-        return max(self._app_counter, key=lambda x: self._app_counter[x])
+        return self._main_app
+
+    def copy(self) -> "Minute":
+        result = Minute()
+        result._app_counter = dict(self._app_counter)
+        result._main_app = self._main_app
+        return result
 
 
 Rule = Tuple[str, Category]
 Rules = Sequence[Rule]
 
 
-def get_category(app: AppInfo, rules: Rules) -> Category:
+_RULE_SET_GENERATIONS = itertools.count()
+
+
+class RuleSet:
+    """Immutable, pre-compiled representation of a list of category rules
+
+    Rules get compiled exactly once on construction. Matching keeps the semantics of
+    a plain rule list: rules are tried in order and the first match wins. Only rules
+    passing a literal prefilter (see `rule_prefilter`) get evaluated as regex.
+
+    A RuleSet created with a @base (see `updated()`) knows which range of rules differs
+    from @base. Apps categorized by @base get re-evaluated only against rules which
+    might change their first match. Statistics of unchanged rules are taken over.
+    """
+
+    def __init__(self, rules: Rules = (), *, base: Optional["RuleSet"] = None) -> None:
+        self._generation = next(_RULE_SET_GENERATIONS)
+        self._rules = tuple((pattern, category) for pattern, category in rules)
+        self._digest = None  # type: Optional[str]
+
+        old, new = (() if base is None else base._rules), self._rules
+        limit = min(len(old), len(new))
+        prefix = 0
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+        old_end, new_end = len(old) - suffix, len(new) - suffix
+
+        # (base generation, first changed index, end of changed range in base, .. in self)
+        self._diff = (
+            None if base is None else (base._generation, prefix, old_end, new_end)
+        )  # type: Optional[Tuple[int, int, int, int]]
+
+        def splice(unchanged: Tuple[Any, ...], changed: Iterable[Any]) -> Tuple[Any, ...]:
+            return unchanged[:prefix] + tuple(changed) + unchanged[old_end:]
+
+        changed = new[prefix:new_end]
+        self._compiled = splice(
+            () if base is None else base._compiled,
+            (re.compile(pattern, flags=re.IGNORECASE) for pattern, _ in changed),
+        )  # type: Tuple[Pattern[str], ...]
+        self._prefilter = LiteralPrefilter(
+            splice(
+                () if base is None else base._prefilter.literals(),
+                (required_literal(pattern) for pattern, _ in changed),
+            )
+        )  # type: LiteralPrefilter
+        # per rule: [samples, evaluations, matches, nanoseconds spent evaluating]
+        self._stats = splice(
+            () if base is None else tuple(list(stats) for stats in base._stats),
+            ([0, 0, 0, 0] for _ in changed),
+        )  # type: Tuple[List[int], ...]
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def __iter__(self) -> Iterator[Rule]:
+        return iter(self._rules)
+
+    def __getitem__(self, index: int) -> Rule:
+        return self._rules[index]
+
+    def __repr__(self) -> str:
+        return "RuleSet(%d rules)" % len(self._rules)
+
+    def digest(self) -> str:
+        """Return a hash identifying the rules (not the statistics) of this RuleSet"""
+        if self._digest is None:
+            self._digest = hashlib.sha1(json.dumps(self._rules).encode()).hexdigest()
+        return self._digest
+
+    def updated(self, rules: Rules) -> "RuleSet":
+        """Return a RuleSet for @rules which can re-categorize incrementally"""
+        return RuleSet(rules, base=self)
+
+    def match(self, string: str, start: int = 0, stop: Optional[int] = None) -> Optional[int]:
+        """Return the index of the first rule in [@start, @stop) matching @string or None"""
+        stop = len(self._rules) if stop is None else stop
+        for index in self._prefilter.candidates(string):
+            if index >= stop:
+                break
+            if index >= start and self._evaluate(index, string):
+                return index
+        return None
+
+    def _evaluate(self, index: int, string: str) -> bool:
+        """Return whether rule @index matches @string and account the evaluation"""
+        stats = self._stats[index]
+        started = time.perf_counter_ns()
+        matched = self._compiled[index].search(string)
+        stats[3] += time.perf_counter_ns() - started
+        stats[1] += 1
+        if matched:
+            stats[2] += 1
+        return bool(matched)
+
+    def _match_changed(self, string: str) -> Optional[int]:
+        """Return the first rule of the changed range matching @string or None - those
+        few rules get checked directly, asking the prefilter about all rules would cost
+        as much as a full match"""
+        assert self._diff
+        _, prefix, _, new_end = self._diff
+        literals = self._prefilter.literals()
+        folded = None  # type: Optional[str]
+        for index in range(prefix, new_end):
+            literal = literals[index]
+            if literal:
+                folded = fold(string) if folded is None else folded
+                if literal not in folded:
+                    continue
+            if self._evaluate(index, string):
+                return index
+        return None
+
+    def count_sample(self, app: AppInfo) -> None:
+        """Account one tracked sample of @app (categorized by this RuleSet) to its rule"""
+        if app._rule_generation == self._generation and app._rule_index is not None:
+            self._stats[app._rule_index][0] += 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return usage and cost statistics for each rule"""
+        return [
+            {
+                "rule": pattern,
+                "category": category,
+                "samples": samples,
+                "evaluations": evaluations,
+                "matches": matches,
+                "time_us": duration // 1000,
+            }
+            for (pattern, category), (samples, evaluations, matches, duration) in zip(
+                self._rules, self._stats
+            )
+        ]
+
+    def category(self, string: str) -> Category:
+        """Return the category of the first rule matching @string"""
+        index = self.match(string)
+        return Category.UNASSIGNED if index is None else self._rules[index][1]
+
+    def _rematch(self, string: str, old_index: Optional[int]) -> Optional[int]:
+        """Return the first rule matching @string given the base rules matched @old_index"""
+        assert self._diff
+        _, prefix, old_end, new_end = self._diff
+        if old_index is not None and old_index < prefix:
+            # an unchanged rule in front of all changes matched
+            return old_index
+        if old_index is not None and old_index < old_end:
+            # the matching rule has been changed, moved or removed
+            return self.match(string, prefix, None)
+        # either a rule behind the changed range matched or none did - only new rules
+        # can take over
+        index = self._match_changed(string)
+        if index is not None or old_index is None:
+            return index
+        return old_index + new_end - old_end
+
+    def categorize(self, app: AppInfo) -> bool:
+        """Assign a category to @app and return whether it has changed"""
+        if app._rule_generation == self._generation:
+            return False
+        identifier = app.generate_identifier()
+        if self._diff is not None and app._rule_generation == self._diff[0]:
+            return self.assign(app, self._rematch(identifier, app._rule_index))
+        return self.assign(app, self.match(identifier))
+
+    def assign(self, app: AppInfo, index: Optional[int]) -> bool:
+        """Assign the category of rule @index (already known to match) to @app and return
+        whether it has changed"""
+        app._rule_index, app._rule_generation = index, self._generation
+        category = Category.UNASSIGNED if index is None else self._rules[index][1]
+        if app._category == category:
+            return False
+        app.set_category(category)
+        return True
+
+
+def get_category(app: AppInfo, rules: Union[Rules, RuleSet]) -> Category:
     """Maps an Application to a track category"""
-    app_string_representation = app.generate_identifier()
-    for rule, category in rules:
-        if re.search(rule, app_string_representation, flags=re.IGNORECASE):
-            return category
-    return Category.UNASSIGNED
+    rule_set = rules if isinstance(rules, RuleSet) else RuleSet(rules)
+    return rule_set.category(app.generate_identifier())
 
 
-def recategorize(apps: Sequence[AppInfo], rules: Rules) -> None:
+def recategorize(apps: Iterable[AppInfo], rules: Union[Rules, RuleSet]) -> bool:
+    """Assign categories to all @apps and return whether any category has changed"""
+    rule_set = rules if isinstance(rules, RuleSet) else RuleSet(rules)
+    changed = False
     for app in apps:
-        app.set_category(get_category(app, rules))
+        changed = rule_set.categorize(app) or changed
+    return changed
 
 
 def mins_to_date(mins):
@@ -171,25 +384,50 @@ def minutes_since_midnight() -> int:
     return seconds_since_midnight() // 60
 
 
+# archive containers holding day files of one month (see archive.py)
+ZIP_CONTAINER_PATTERN = re.compile(r"^track-\d{6}\.zip$", flags=re.IGNORECASE)
+
+# preference of day file formats in case there are several for one day - formats not
+# listed here are archived ones, see archive.py
+_DAY_FILE_RANKS = {".bin": 0, ".json": 1}
+
+
 def log_files(directory: str, reverse=False, exclude_today: bool = False) -> List[str]:
-    """Return a sorted list of Track log file names found in @directory"""
+    """Return a list of Track log file names found in @directory sorted by date - one per
+    day. Columnar files (.bin) are preferred over JSON files, which are preferred over
+    archived ones. Days inside a zip container are named `<container>/<day file>`"""
 
     def get_date(filename: str) -> Optional[str]:
-        match = re.search(r"track-(\d{8}).json", filename, flags=re.IGNORECASE)
+        match = re.search(
+            r"^track-(\d{8})\.(json|bin|json\.gz|json\.xz)$",
+            os.path.basename(filename),
+            flags=re.IGNORECASE,
+        )
         if not match:
             return None
         return match.group(1)
 
+    def rank(filename: str) -> int:
+        if "/" in filename:
+            return 3
+        return _DAY_FILE_RANKS.get(os.path.splitext(filename)[1].lower(), 2)
+
+    names = []  # type: List[str]
+    for file in sorted(os.listdir(directory)):
+        if ZIP_CONTAINER_PATTERN.match(file):
+            with zipfile.ZipFile(os.path.join(directory, file)) as container:
+                names.extend("%s/%s" % (file, member) for member in container.namelist())
+        else:
+            names.append(file)
+
     today_timestamp = today_str()
-    return sorted(
-        (
-            file
-            for file in os.listdir(directory)
-            for date in (get_date(file),)
-            if date and (date != today_timestamp or not exclude_today)
-        ),
-        reverse=reverse,
-    )
+    files = {}  # type: Dict[str, str]
+    for file in names:
+        date = get_date(file)
+        if date and (date != today_timestamp or not exclude_today):
+            if date not in files or rank(file) < rank(files[date]):
+                files[date] = file
+    return [files[date] for date in sorted(files, reverse=reverse)]
 
 
 def setup_argument_parser(parser: argparse.ArgumentParser) -> None:
@@ -206,6 +444,12 @@ def setup_argument_parser(parser: argparse.ArgumentParser) -> None:
         default=os.path.expanduser("~/.track"),
     )
     parser.add_argument("--port", type=int, default=3456, help="IPv4 port to connect to")
+    parser.add_argument(
+        "--storage",
+        choices=["json", "sqlite"],
+        default="json",
+        help="keep recorded days as one JSON file per day or in one SQLite database",
+    )
 
 
 def log_system_info(args) -> None:
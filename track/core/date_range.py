@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Statistics over a range of recorded days
+
+DateRangeView opens the days of a range one after another and RangeStats accumulates
+them, so memory use is bounded by one day plus the accumulated statistics, no matter how
+many days the range spans. RangeStats also accumulates day summaries (see summary.py)
+where those are at hand already, e.g. in the UI.
+"""
+
+import heapq
+import json
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import common, history, segments, summary
+from .util import log
+
+
+def parse_date(text: str) -> date:
+    """Return the date given as 'YYYY-MM-DD' or 'YYYYMMDD'"""
+    for pattern in ("%Y-%m-%d", "%Y%m%d"):
+        try:
+            return datetime.strptime(text.strip(), pattern).date()
+        except ValueError:
+            pass
+    raise ValueError("%r is not a valid date (expected YYYY-MM-DD)" % text)
+
+
+def day_date(name: str) -> date:
+    """Return the date of day @name (e.g. `track-20200131.json`)"""
+    match = re.search(r"(\d{8})", name)
+    if match is None:
+        raise ValueError("%r is not the name of a recorded day" % name)
+    return datetime.strptime(match.group(1), "%Y%m%d").date()
+
+
+class RangeStats:
+    """Totals accumulated over several days"""
+
+    def __init__(self) -> None:
+        self.days = 0
+        self.active = 0
+        self.categories = {}  # type: Dict[int, int]  # category => minutes
+        self.main_apps = {}  # type: Dict[str, int]  # app identifier => minutes
+        self.earliest = None  # type: Optional[int]  # earliest begin of a day
+        self.latest = None  # type: Optional[int]  # latest end of a day
+
+    def __repr__(self) -> str:
+        return "RangeStats(%d days, %d minutes active)" % (self.days, self.active)
+
+    def add(self, model: Any) -> None:
+        """Add the totals of day @model (any day model) - empty days are ignored"""
+        if not model.time_active():
+            return
+        categories = {
+            category: model.time_in_category(category) for category in common.Category
+        }  # type: Dict[int, int]
+        categories[common.Category.BREAK] = segments.segment(model).time_in_breaks()
+        self._add(
+            model.time_active(),
+            categories,
+            model.main_app_minutes(),
+            model.begin_index(),
+            model.end_index(),
+        )
+
+    def add_summary(self, day: summary.DaySummary) -> None:
+        """Add the totals of day summary @day - like add() but only work, private and
+        break time are known per category"""
+        if not day.active:
+            return
+        categories = {
+            common.Category.WORK: day.work,
+            common.Category.PRIVATE: day.private,
+            common.Category.BREAK: day.breaks,
+        }  # type: Dict[int, int]
+        self._add(day.active, categories, day.main_apps, day.begin, day.end)
+
+    def _add(
+        self,
+        active: int,
+        categories: Dict[int, int],
+        main_apps: Dict[str, int],
+        begin: int,
+        end: int,
+    ) -> None:
+        self.days += 1
+        self.active += active
+        for category, minutes in categories.items():
+            if minutes:
+                self.categories[category] = self.categories.get(category, 0) + minutes
+        for identifier, minutes in main_apps.items():
+            self.main_apps[identifier] = self.main_apps.get(identifier, 0) + minutes
+        self.earliest = begin if self.earliest is None else min(self.earliest, begin)
+        self.latest = end if self.latest is None else max(self.latest, end)
+
+    def time_in_category(self, category: int) -> int:
+        return self.categories.get(category, 0)
+
+    def top_apps(self, count: int = 10) -> List[Tuple[str, int]]:
+        """Return (app identifier, minutes) of the @count apps used most"""
+        return heapq.nlargest(count, self.main_apps.items(), key=lambda item: item[1])
+
+
+class DateRangeView:
+    """Recorded days of @store from @first to @last (inclusive), categorized by
+    @rule_set if provided"""
+
+    def __init__(
+        self,
+        store: Any,
+        first: date,
+        last: date,
+        rule_set: Optional[common.RuleSet] = None,
+    ) -> None:
+        self._store = store
+        self._first, self._last = first, last
+        self._rule_set = rule_set
+
+    def __repr__(self) -> str:
+        return "DateRangeView(%s to %s)" % (self._first, self._last)
+
+    def days(self) -> List[str]:
+        """Return the names of all recorded days within the range"""
+        return [name for name in self._store.days() if self._first <= day_date(name) <= self._last]
+
+    def __iter__(self) -> Iterator[Tuple[str, Any, str]]:
+        """Yield (name, day model, daily note) for each day - a model gets closed as soon
+        as the next one is requested, so don't keep it"""
+        for name in self.days():
+            try:
+                model, note = self._store.open_day(name)
+            except (FileNotFoundError, json.JSONDecodeError, ValueError) as exc:
+                log().warning("Skip %r: %s", name, exc)
+                continue
+            try:
+                if self._rule_set is not None:
+                    history.recategorize_day(self._store.path(name), model, self._rule_set)
+                yield name, model, note
+            finally:
+                if hasattr(model, "close"):
+                    model.close()
+
+    def aggregate(self) -> RangeStats:
+        """Return the totals of all days within the range"""
+        stats = RangeStats()
+        for _name, model, _note in self:
+            stats.add(model)
+        return stats
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Dense day model - the timeline of a day as fixed arrays of one slot per minute
+
+    main_app    i32[1440]   index of the minute's main app, -1 if idle
+    category    u8[1440]    category of the main app, 0 (IDLE) if idle
+    run_first   i16[1440]   first minute of the chunk the minute belongs to
+    run_last    i16[1440]   last minute of the chunk the minute belongs to
+    first_entry u32[1441]   entries (app, count) of minute m: first_entry[m:m + 2]
+    entries     u32 app[n_entries], u32 count[n_entries]
+
+so everything asked per pixel while painting or hovering a Timegraph is an array
+lookup and totals are scans over the arrays. DenseDay provides the read API of
+ActiveApplications.
+
+Categories are taken from the apps, which get recategorized in place via apps(). Since
+that's the only way to get hold of them, the category slots get refreshed on the next
+access after apps() has been called.
+"""
+
+from array import array
+from collections import Counter
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from . import common
+
+MINUTES_PER_DAY = 24 * 60
+IDLE = -1
+
+
+class DenseDay:
+    """Read model for a day given as @tracker_data (JSON snapshot format)"""
+
+    def __init__(self, tracker_data: Optional[Dict[str, Any]] = None) -> None:
+        tracker_data = tracker_data or {"apps": [], "minutes": {}}
+        self._revision = 0
+        self._apps = [common.AppInfo().load(data) for data in tracker_data["apps"]]
+        self._main_apps = array("i", [IDLE]) * MINUTES_PER_DAY
+        self._categories = array("B", bytes(MINUTES_PER_DAY))
+        self._category_minutes = Counter()  # type: Counter[int]
+        self._run_first = array("h", range(MINUTES_PER_DAY))
+        self._run_last = array("h", range(MINUTES_PER_DAY))
+        # all (app, count) entries - kept for minute_counter() / __data__() only
+        self._entry_apps, self._entry_counts = array("I"), array("I")
+        sizes = [0] * (MINUTES_PER_DAY + 1)
+        for minute, counter in sorted((int(m), c) for m, c in tracker_data["minutes"].items()):
+            if not 0 <= minute < MINUTES_PER_DAY:
+                raise ValueError("minute %d is not within a day" % minute)
+            # same result as Minute.main_app(): first app with maximum count
+            self._main_apps[minute] = max(counter, key=lambda entry: entry[1])[0]
+            for app, count in counter:
+                self._entry_apps.append(app)
+                self._entry_counts.append(count)
+            sizes[minute + 1] = len(counter)
+        self._first_entry = array("I", accumulate(sizes))
+        self._categories_stale = True
+        self._index()
+
+    def __repr__(self) -> str:
+        return "DenseDay(%r to %r)" % (
+            common.mins_to_date(self.begin_index()),
+            common.mins_to_date(self.end_index()),
+        )
+
+    def _index(self) -> None:
+        """Count active minutes and (re)build the chunk slots"""
+        main_apps, first, last = self._main_apps, self._run_first, self._run_last
+        self._active = MINUTES_PER_DAY - main_apps.count(IDLE)
+        previous = None  # last active minute seen
+        for minute in range(MINUTES_PER_DAY):
+            app = main_apps[minute]
+            if app == IDLE:
+                first[minute] = minute if previous is None else previous
+            elif previous == minute - 1 and main_apps[previous] == app:
+                first[minute] = first[previous]
+            else:
+                first[minute] = minute
+            if app != IDLE:
+                previous = minute
+        following = None  # next active minute seen
+        for minute in reversed(range(MINUTES_PER_DAY)):
+            app = main_apps[minute]
+            if app == IDLE:
+                last[minute] = minute if following is None else following
+            elif following == minute + 1 and main_apps[following] == app:
+                last[minute] = last[following]
+            else:
+                last[minute] = minute
+            if app != IDLE:
+                following = minute
+        active = [minute for minute in (previous, following) if minute is not None]
+        self._begin_index = min(active) if active else 0
+        self._end_index = max(active) if active else 0
+
+    def _category_slots(self) -> "array[int]":
+        if self._categories_stale:
+            categories = [app._category for app in self._apps]
+            self._categories = array(
+                "B", (0 if app == IDLE else categories[app] for app in self._main_apps)
+            )
+            self._category_minutes = Counter(self._categories)
+            # idle minutes are not spent in category IDLE
+            self._category_minutes[common.Category.IDLE] -= MINUTES_PER_DAY - self._active
+            self._categories_stale = False
+        return self._categories
+
+    def revision(self) -> int:
+        return self._revision
+
+    def apps(self) -> Iterator[common.AppInfo]:
+        """Return the AppInfo instances of the day - use recategorize() to change their
+        categories or call categories_changed() afterwards"""
+        return iter(self._apps)
+
+    def recategorize(self, rules: Union[common.Rules, common.RuleSet]) -> bool:
+        """Categorize all apps by @rules, return whether any category has changed"""
+        changed = common.recategorize(self._apps, rules)
+        if changed:
+            self.categories_changed()
+        return changed
+
+    def categories_changed(self) -> None:
+        """Have the categories of all minutes re-evaluated"""
+        self._categories_stale = True
+        self._revision += 1
+
+    def app(self, identifier: str) -> Optional[common.AppInfo]:
+        """Return the stored AppInfo instance for @identifier if there is one"""
+        return next((app for app in self._apps if app.generate_identifier() == identifier), None)
+
+    def begin_index(self) -> int:
+        return self._begin_index
+
+    def end_index(self) -> int:
+        return self._end_index
+
+    def clip_from(self, index: int) -> None:
+        """Removes all timeline data before provided index"""
+        self._clip(0, max(0, min(index, MINUTES_PER_DAY)))
+
+    def clip_to(self, index: int) -> None:
+        """Removes all timeline data after provided index"""
+        self._clip(max(0, min(index + 1, MINUTES_PER_DAY)), MINUTES_PER_DAY)
+
+    def _clip(self, begin: int, end: int) -> None:
+        self._revision += 1
+        self._main_apps[begin:end] = array("i", [IDLE]) * (end - begin)
+        first, last = self._first_entry[begin], self._first_entry[end]
+        del self._entry_apps[first:last], self._entry_counts[first:last]
+        for minute in range(begin + 1, MINUTES_PER_DAY + 1):
+            self._first_entry[minute] = (
+                first if minute <= end else self._first_entry[minute] - (last - first)
+            )
+        self._categories_stale = True
+        self._index()
+
+    def is_active(self, minute: int) -> bool:
+        return 0 <= minute < MINUTES_PER_DAY and self._main_apps[minute] != IDLE
+
+    def category_at(self, minute: int) -> int:
+        return self._category_slots()[minute] if 0 <= minute < MINUTES_PER_DAY else 0
+
+    def time_active(self) -> int:
+        """Return the number of active minutes"""
+        return self._active
+
+    def time_in_category(self, category: int) -> int:
+        """Return the number of minutes mainly spent in @category"""
+        self._category_slots()
+        return self._category_minutes[category]
+
+    def timeline(self) -> Iterator[Tuple[int, common.AppInfo]]:
+        """Return (minute, main app) for all active minutes, sorted by minute"""
+        apps = self._apps
+        return ((m, apps[app]) for m, app in enumerate(self._main_apps) if app != IDLE)
+
+    def main_app_minutes(self) -> Dict[str, int]:
+        """Return {app identifier: number of minutes the app was the main app}"""
+        result = {}  # type: Dict[str, int]
+        for index, minutes in Counter(self._main_apps).items():
+            if index != IDLE:
+                identifier = self._apps[index].generate_identifier()
+                result[identifier] = result.get(identifier, 0) + minutes
+        return result
+
+    def get_chunk_size(self, minute: int) -> Tuple[int, int]:
+        if not self._active:
+            return 0, 0
+        if not self._begin_index <= minute <= self._end_index:
+            return minute, minute
+        return self._run_first[minute], self._run_last[minute]
+
+    def info_at(self, minute: int) -> Tuple[Tuple[int, int], Any]:
+        return (
+            self.get_chunk_size(minute),
+            self._apps[self._main_apps[minute]] if self.is_active(minute) else "idle",
+        )
+
+    def minute_counter(self, minute_index: int) -> Optional[Dict[common.AppInfo, int]]:
+        """Return {AppInfo: count} for given minute or None if not active"""
+        if not self.is_active(minute_index):
+            return None
+        return {self._apps[app]: count for app, count in self._entries(minute_index)}
+
+    def _entries(self, minute: int) -> List[Tuple[int, int]]:
+        first, last = self._first_entry[minute], self._first_entry[minute + 1]
+        return list(zip(self._entry_apps[first:last], self._entry_counts[first:last]))
+
+    def __data__(self) -> Dict[str, Any]:
+        """Return the timeline in the format of ActiveApplications.__data__()"""
+        return {
+            "apps": [app.__data__() for app in self._apps],
+            "minutes": {
+                minute: self._entries(minute)
+                for minute in range(MINUTES_PER_DAY)
+                if self._main_apps[minute] != IDLE
+            },
+        }
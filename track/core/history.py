@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Re-categorization of recorded days
+
+Day files can be re-categorized in parallel by a process pool. For each day file a
+small sidecar file (`track-YYYYMMDD.categories.json`) stores the index of the
+matching rule for each application, keyed by the digest of the rule set used. Loaders
+apply a sidecar instead of evaluating rules as long as the digest matches.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from . import common
+from .active_applications import ActiveApplications
+from .storage import load_day_file, plain_path
+from .util import atomic_write, log
+
+SIDECAR_SUFFIX = ".categories.json"
+
+# RuleSet instance used by process pool workers, see _init_worker()
+_WORKER_RULE_SET = None  # type: Optional[common.RuleSet]
+
+
+def sidecar_path(filename: str) -> str:
+    """Return the name of the sidecar file belonging to day file @filename"""
+    return os.path.splitext(plain_path(filename))[0] + SIDECAR_SUFFIX
+
+
+def load_sidecar(filename: str, rule_set: common.RuleSet) -> Optional[Dict[str, Optional[int]]]:
+    """Return {app identifier: rule index} for day file @filename if there is a sidecar file
+    created with @rule_set"""
+    try:
+        with open(sidecar_path(filename)) as file:
+            data = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return data["rule_indices"] if data.get("rules_digest") == rule_set.digest() else None
+
+
+def recategorize_day(filename: Optional[str], model: Any, rule_set: common.RuleSet) -> bool:
+    """Categorize the apps of day @model (any day model) read from @filename, using the
+    sidecar file if it fits @rule_set. Return whether any category has changed"""
+    apps = list(model.apps())
+    if filename is None or not all(app._rule_generation is None for app in apps):
+        # not from a day file or already categorized by some RuleSet - in the latter
+        # case incremental recategorization is faster
+        return bool(model.recategorize(rule_set))
+    rule_indices = load_sidecar(filename, rule_set)
+    if rule_indices is None or not all(app.generate_identifier() in rule_indices for app in apps):
+        return bool(model.recategorize(rule_set))
+    changed = False
+    for app in apps:
+        changed = rule_set.assign(app, rule_indices[app.generate_identifier()]) or changed
+    if changed:
+        model.categories_changed()
+    return changed
+
+
+def _init_worker(rules: common.Rules) -> None:
+    global _WORKER_RULE_SET  # pylint: disable=global-statement
+    _WORKER_RULE_SET = common.RuleSet(rules)
+
+
+def _recategorize_file(filename: str) -> bool:
+    """Process pool worker: write a sidecar file for @filename unless there is a valid one"""
+    rule_set = _WORKER_RULE_SET
+    assert rule_set is not None
+    if load_sidecar(filename, rule_set) is not None:
+        return False
+    apps = ActiveApplications(load_day_file(filename).get("tracker_data"))
+    rule_indices = {
+        app.generate_identifier(): rule_set.match(app.generate_identifier()) for app in apps.apps()
+    }
+    with atomic_write(sidecar_path(filename), "w") as file:
+        json.dump({"rules_digest": rule_set.digest(), "rule_indices": rule_indices}, file)
+    return True
+
+
+def recategorize_files(directory: str, rules: common.Rules, processes: Optional[int] = None) -> int:
+    """Create sidecar files for all day files in @directory using a pool of @processes
+    worker processes (default: number of CPUs). Return the number of files written"""
+    filenames = [
+        os.path.join(directory, name) for name in common.log_files(directory, exclude_today=True)
+    ]
+    log().info("Re-categorize %d day files in %r", len(filenames), directory)
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=(rules,)
+    ) as executor:
+        return sum(executor.map(_recategorize_file, filenames, chunksize=8))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Defines Journal - an append-only log of changes to one day of tracking data
+
+Each line of a journal file is one compact JSON record:
+
+    ["a", title, cmdline, category]      app registration (index = order of registration)
+    ["m", minute, [[app, count], ..]]    (complete) content of one sampled minute
+    ["f", minute] / ["t", minute]        clip_from / clip_to
+    ["u"]                                undo_clip
+    ["n", note]                          daily note
+    ["r", rules]                         category rules
+
+A journal gets compacted by writing a full snapshot and resetting it. Samples get
+recorded by the monitoring thread while notes, clips and rules get recorded (and the
+journal gets reset) by the server thread, so all access is serialized.
+"""
+
+import json
+import os
+import threading
+from typing import IO, Any, ContextManager, Dict, List, Optional
+
+from . import common
+from .active_applications import ActiveApplications
+from .util import log
+
+
+class Journal:
+    """Appends changes of an ActiveApplications instance to @filename"""
+
+    def __init__(self, filename: str) -> None:
+        self._filename = filename
+        self._file = None  # type: Optional[IO[str]]
+        self._indices = {}  # type: Dict[common.AppInfo, int]
+        self._pending_minute = None  # type: Optional[int]
+        # reentrant since e.g. flush() records a minute
+        self._lock = threading.RLock()
+
+    def filename(self) -> str:
+        return self._filename
+
+    def lock(self) -> ContextManager[Any]:
+        """Hold to keep records from being written, e.g. between writing a snapshot and
+        reset()"""
+        return self._lock
+
+    def _append(self, record: Any) -> None:
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self._filename) or ".", exist_ok=True)
+                self._file = open(self._filename, "a")
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _app_index(self, app: common.AppInfo) -> int:
+        if app not in self._indices:
+            self._indices[app] = len(self._indices)
+            self._append(["a", app._wndtitle, app._cmdline, app._category])
+        return self._indices[app]
+
+    def replay(self, apps: ActiveApplications) -> Dict[str, Any]:
+        """Apply all records found in the journal file to @apps and return the latest
+        values for note and rules (if any)"""
+        result = {}  # type: Dict[str, Any]
+        registered = []  # type: List[common.AppInfo]
+        try:
+            with open(self._filename) as file:
+                for number, line in enumerate(file):
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        log().warning("Skip broken journal record %s:%d", self._filename, number)
+                        continue
+                    kind = record[0]
+                    if kind == "a":
+                        app = apps.intern(common.AppInfo(record[1], record[2]))
+                        app.set_category(record[3])
+                        self._indices[app] = len(registered)
+                        registered.append(app)
+                    elif kind == "m":
+                        apps.set_minute(record[1], {registered[a]: c for a, c in record[2]})
+                    elif kind == "f":
+                        apps.clip_from(record[1])
+                    elif kind == "t":
+                        apps.clip_to(record[1])
+                    elif kind == "u":
+                        apps.undo_clip()
+                    elif kind == "n":
+                        result["note"] = record[1]
+                    elif kind == "r":
+                        result["rules"] = record[1]
+        except FileNotFoundError:
+            pass
+        log().info("Replayed %d apps from journal %r", len(registered), self._filename)
+        return result
+
+    def record_sample(self, apps: ActiveApplications, minute: int) -> None:
+        """Called after each sample - writes the last minute once a new one has started"""
+        with self._lock:
+            if self._pending_minute is not None and self._pending_minute != minute:
+                self.record_minute(apps, self._pending_minute)
+            self._pending_minute = minute
+
+    def record_minute(self, apps: ActiveApplications, minute: int) -> None:
+        with self._lock:
+            counter = apps.minute_counter(minute)
+            if counter is None:
+                return
+            self._append(["m", minute, [[self._app_index(a), c] for a, c in counter.items()]])
+
+    def record_clip_from(self, minute: int) -> None:
+        self._append(["f", minute])
+
+    def record_clip_to(self, minute: int) -> None:
+        self._append(["t", minute])
+
+    def record_undo_clip(self) -> None:
+        self._append(["u"])
+
+    def record_note(self, note: Optional[str]) -> None:
+        self._append(["n", note])
+
+    def record_rules(self, rules: common.Rules) -> None:
+        self._append(["r", rules])
+
+    def flush(self, apps: ActiveApplications) -> None:
+        """Write the currently sampled minute and make sure everything is on disk"""
+        with self._lock:
+            if self._pending_minute is not None:
+                self.record_minute(apps, self._pending_minute)
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def reset(self) -> None:
+        """Drop all records, e.g. after a snapshot has been written - the currently
+        sampled minute will still be written since it might be incomplete in the snapshot"""
+        with self._lock:
+            self.close()
+            self._indices.clear()
+            try:
+                os.remove(self._filename)
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
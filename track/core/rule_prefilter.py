@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Cheap pre-selection of category rules which might match a given string
+
+Most rules contain a literal sub string which has to be present in any matching string
+(e.g. `^Slack` or `\\[Jenkins\\]`). Those literals get indexed by trigram, so for a given
+string only rules whose literal is contained have to be evaluated as regex.
+Rules without any usable literal always stay candidates.
+"""
+
+import re
+import warnings
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        from re import _constants as sre_constants  # type: ignore
+        from re import _parser as sre_parse  # type: ignore
+    except ImportError:  # Python < 3.11
+        import sre_constants
+        import sre_parse
+
+# non-ASCII characters `re.IGNORECASE` considers equal to an ASCII letter
+_ASCII_FOLDS = str.maketrans({"İ": "i", "ı": "i", "ſ": "s", "K": "k"})
+
+_REPEATS = {
+    op
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    for op in (getattr(sre_constants, name, None),)
+    if op is not None
+}
+
+
+def fold(string: str) -> str:
+    """Normalize @string the way required literals are stored"""
+    if string.isascii():
+        return string.lower()
+    return string.translate(_ASCII_FOLDS).lower()
+
+
+def _literals(parsed: Iterable[Any]) -> List[str]:
+    """Return sub strings which have to be contained in every match of @parsed"""
+    result = []  # type: List[str]
+    current = []  # type: List[str]
+
+    def flush() -> None:
+        if current:
+            result.append("".join(current))
+            current.clear()
+
+    for op, value in parsed:
+        if op is sre_constants.LITERAL and value < 128:
+            current.append(chr(value).lower())
+        elif op is sre_constants.AT:
+            # anchors have zero width and don't interrupt literals
+            continue
+        elif op is sre_constants.SUBPATTERN:
+            flush()
+            result.extend(_literals(value[-1]))
+        elif op in _REPEATS and value[0] >= 1:
+            flush()
+            result.extend(_literals(value[2]))
+        else:
+            flush()
+    flush()
+    return result
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """Return the longest (folded) sub string any match of @pattern must contain"""
+    try:
+        literals = _literals(sre_parse.parse(pattern))
+    except (re.error, RecursionError):
+        return None
+    return max(literals, key=len) if literals else None
+
+
+class LiteralPrefilter:
+    """Trigram index over the required literals of a list of rules"""
+
+    def __init__(self, literals: Sequence[Optional[str]]) -> None:
+        self._literals = tuple(literals)
+        self._always = []  # type: List[int]
+        self._short = []  # type: List[int]
+        self._trigrams = {}  # type: Dict[str, List[int]]
+        for index, literal in enumerate(self._literals):
+            if not literal:
+                self._always.append(index)
+            elif len(literal) < 3:
+                self._short.append(index)
+            else:
+                # use the least crowded trigram of the literal to keep buckets small
+                key = min(
+                    (literal[i : i + 3] for i in range(len(literal) - 2)),
+                    key=lambda trigram: len(self._trigrams.get(trigram, ())),
+                )
+                self._trigrams.setdefault(key, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self._literals)
+
+    def literals(self) -> Tuple[Optional[str], ...]:
+        """Return the required literal (or None) for each rule"""
+        return self._literals
+
+    def candidates(self, string: str) -> List[int]:
+        """Return the sorted indices of all rules which might match @string"""
+        folded = fold(string)
+        literals = self._literals
+        result = set(self._always)  # type: Set[int]
+        result.update(index for index in self._short if literals[index] in folded)  # type: ignore
+        trigrams = {folded[i : i + 3] for i in range(len(folded) - 2)}
+        for trigram in trigrams & self._trigrams.keys():
+            result.update(
+                index
+                for index in self._trigrams[trigram]
+                if literals[index] in folded  # type: ignore
+            )
+        return sorted(result)
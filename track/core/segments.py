@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Segmentation of a day into work sessions, breaks and app runs
+
+    session   stretch of activity not interrupted by a break
+    break     idle time of at least `min_break` minutes between two sessions
+    run       stretch of minutes with the same main app, bridging idle gaps of up to
+              `max_gap` minutes (0: only directly adjacent minutes)
+
+All segments of a day are computed in one pass over its active minutes (see timeline()
+of the day models) and cached per day model and revision - segment() can be called
+whenever segments are needed.
+"""
+
+import weakref
+from bisect import bisect_right
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import common
+
+
+class Settings(NamedTuple):
+    max_gap: int = 0
+    min_break: int = 15
+
+
+DEFAULT_SETTINGS = Settings()
+
+
+class Run(NamedTuple):
+    begin: int
+    end: int  # inclusive, like all segment ends
+    app: common.AppInfo
+
+
+def _find(segments: Sequence[Tuple[Any, ...]], minute: int) -> Optional[int]:
+    """Return the position of the segment (begin, end, ..) in (sorted) @segments
+    containing @minute"""
+    position = bisect_right(segments, (minute, float("inf"))) - 1
+    return position if position >= 0 and segments[position][1] >= minute else None
+
+
+class Segments:
+    """Sessions, breaks and runs of one day"""
+
+    def __init__(
+        self,
+        sessions: List[Tuple[int, int]],
+        breaks: List[Tuple[int, int]],
+        runs: List[Run],
+    ) -> None:
+        self.sessions = sessions
+        self.breaks = breaks
+        self.runs = runs
+
+    def __repr__(self) -> str:
+        return "Segments(%d sessions, %d breaks, %d runs)" % (
+            len(self.sessions),
+            len(self.breaks),
+            len(self.runs),
+        )
+
+    def session_at(self, minute: int) -> Optional[Tuple[int, int]]:
+        position = _find(self.sessions, minute)
+        return None if position is None else self.sessions[position]
+
+    def break_at(self, minute: int) -> Optional[Tuple[int, int]]:
+        position = _find(self.breaks, minute)
+        return None if position is None else self.breaks[position]
+
+    def run_at(self, minute: int) -> Optional[Run]:
+        position = _find(self.runs, minute)
+        return None if position is None else self.runs[position]
+
+    def category_at(self, minute: int, category: int) -> int:
+        """Return @category (of @minute as provided by a day model), turned into BREAK
+        for idle minutes within a break"""
+        if category == common.Category.IDLE and _find(self.breaks, minute) is not None:
+            return common.Category.BREAK
+        return category
+
+    def time_in_breaks(self) -> int:
+        return sum(end - begin + 1 for begin, end in self.breaks)
+
+
+def compute(timeline: Any, settings: Settings = DEFAULT_SETTINGS) -> Segments:
+    """Return the segments for @timeline, an iterable of (minute, main app) sorted by
+    minute"""
+    sessions, breaks = [], []  # type: List[Tuple[int, int]], List[Tuple[int, int]]
+    runs = []  # type: List[Run]
+    session_begin = 0
+    run = None  # type: Optional[Run]  # the run of the previous minute (ending there)
+    for minute, app in timeline:
+        if run is None:
+            session_begin, run = minute, Run(minute, minute, app)
+            continue
+        previous = run.end
+        gap = minute - previous - 1
+        splits_session = gap >= settings.min_break
+        if splits_session:
+            sessions.append((session_begin, previous))
+            breaks.append((previous + 1, minute - 1))
+            session_begin = minute
+        if not splits_session and gap <= settings.max_gap and app == run.app:
+            run = run._replace(end=minute)
+        else:
+            runs.append(run)
+            run = Run(minute, minute, app)
+    if run is not None:
+        sessions.append((session_begin, run.end))
+        runs.append(run)
+    return Segments(sessions, breaks, runs)
+
+
+# id(day model) => ((revision, settings), segments) - models aren't necessarily hashable
+_CACHE = {}  # type: Dict[int, Tuple[Tuple[int, Settings], Segments]]
+
+
+def segment(model: Any, settings: Settings = DEFAULT_SETTINGS) -> Segments:
+    """Return the segments of day @model (ActiveApplications, DenseDay or ColumnarDay),
+    computed only once per revision of @model"""
+    key = (model.revision(), settings)
+    cached = _CACHE.get(id(model))
+    if cached is None:
+        weakref.finalize(model, _CACHE.pop, id(model), None)
+    if cached is None or cached[0] != key:
+        cached = (key, compute(model.timeline(), settings))
+        _CACHE[id(model)] = cached
+    return cached[1]
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Day store keeping all recorded days in one SQLite database
+
+    apps     (day, app, title, cmdline, category, count)   app = index within the day
+    minutes  (day, minute, app, count)                      one row per app and minute
+    notes    (day, note, saved)                             one row per recorded day
+
+Days are stored as integers (YYYYMMDD), but addressed by name (`track-YYYYMMDD.json`)
+like day files, so SqliteStore can be used wherever a DirectoryStore is expected.
+Existing day files can be imported in parallel (see SqliteStore.import_directory()).
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import common, dense, strings
+from .active_applications import ActiveApplications
+from .storage import DayModel, load_day_file, plain_path
+from .util import log
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apps (
+    day INTEGER NOT NULL,
+    app INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    cmdline TEXT NOT NULL,
+    category INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, app)
+);
+CREATE TABLE IF NOT EXISTS minutes (
+    day INTEGER NOT NULL,
+    minute INTEGER NOT NULL,
+    app INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, minute, app)
+);
+CREATE TABLE IF NOT EXISTS notes (
+    day INTEGER PRIMARY KEY,
+    note TEXT,
+    saved INTEGER NOT NULL
+);
+"""
+
+
+def _day(name: str) -> Optional[int]:
+    """Return the day (YYYYMMDD) encoded in day name @name (which might be archived) or
+    None (e.g. for backups)"""
+    match = re.search(r"^track-(\d{8})\.\w+$", os.path.basename(plain_path(name)))
+    return int(match.group(1)) if match else None
+
+
+def _normalized_day(filename: str) -> Tuple[Optional[int], Dict[str, Any]]:
+    """Process pool worker: read day file @filename (any supported or legacy format) and
+    return its day and content in current JSON snapshot format"""
+    data = load_day_file(filename)
+    return _day(filename), {
+        "tracker_data": ActiveApplications(data["tracker_data"]).__data__(),
+        "daily_note": data.get("daily_note"),
+    }
+
+
+class SqliteStore:
+    """Day store backed by SQLite database @filename"""
+
+    FILENAME = "track.sqlite"
+
+    def __init__(self, filename: str) -> None:
+        self._filename = filename
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        # TimeTracker writes from the monitoring thread, so access gets serialized here
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filename, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def __repr__(self) -> str:
+        return "SqliteStore(%r)" % self._filename
+
+    def path(self, _name: str) -> Optional[str]:
+        """Days have no file system path"""
+        return None
+
+    def summary_path(self) -> str:
+        """Return the name of the summary index file (see summary.SummaryIndex)"""
+        return self._filename + ".summary.json"
+
+    def stamp(self, name: str) -> List[int]:
+        """Return something which changes whenever day @name gets modified"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT saved FROM notes WHERE day = ?", (_day(name),)
+            ).fetchone()
+        if row is None:
+            raise FileNotFoundError("no data recorded for %r in %r" % (name, self._filename))
+        return [row[0]]
+
+    def days(self, reverse: bool = False, exclude_today: bool = False) -> List[str]:
+        """Return the sorted names of all recorded days"""
+        with self._lock:
+            rows = self._connection.execute("SELECT day FROM notes").fetchall()
+        today = common.today_int()
+        return sorted(
+            ("track-%d.json" % day for (day,) in rows if day != today or not exclude_today),
+            reverse=reverse,
+        )
+
+    def load(self, name: str) -> Dict[str, Any]:
+        """Return day @name in JSON snapshot format, raises FileNotFoundError if missing"""
+        day = _day(name)
+        with self._lock:
+            apps = self._connection.execute(
+                "SELECT title, category, count, cmdline FROM apps WHERE day = ? ORDER BY app",
+                (day,),
+            ).fetchall()
+            # insertion order (rowid) keeps the order of apps within a minute, which
+            # decides about the main app in case of equal counts
+            rows = self._connection.execute(
+                "SELECT minute, app, count FROM minutes WHERE day = ? ORDER BY rowid", (day,)
+            ).fetchall()
+            note = self._connection.execute(
+                "SELECT note FROM notes WHERE day = ?", (day,)
+            ).fetchone()
+        if note is None:
+            raise FileNotFoundError("no data recorded for %r in %r" % (name, self._filename))
+        minutes = {}  # type: Dict[int, List[Tuple[int, int]]]
+        for minute, app, count in rows:
+            minutes.setdefault(minute, []).append((app, count))
+        return {
+            "tracker_data": {
+                "apps": [
+                    [strings.intern(title), category, count, strings.intern(cmdline)]
+                    for title, category, count, cmdline in apps
+                ],
+                "minutes": minutes,
+            },
+            "daily_note": note and note[0],
+        }
+
+    def save(self, name: str, data: Dict[str, Any]) -> None:
+        """Replace day @name with @data (JSON snapshot format) in one transaction"""
+        day = _day(name)
+        if day is None:
+            # backups are not needed since a transaction can't be written partially
+            log().debug("Ignore %r - not a day name", name)
+            return
+        self._save_days([(day, data)])
+
+    def _save_days(self, days: List[Tuple[int, Dict[str, Any]]]) -> None:
+        with self._lock, self._connection:
+            for day, data in days:
+                tracker_data = data["tracker_data"]
+                for table in ("apps", "minutes", "notes"):
+                    self._connection.execute("DELETE FROM %s WHERE day = ?" % table, (day,))
+                self._connection.executemany(
+                    "INSERT INTO apps VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (day, index, title, cmdline, category, count)
+                        for index, (title, category, count, cmdline) in enumerate(
+                            tracker_data["apps"]
+                        )
+                    ),
+                )
+                self._connection.executemany(
+                    "INSERT INTO minutes VALUES (?, ?, ?, ?)",
+                    (
+                        (day, int(minute), app, count)
+                        for minute, counter in tracker_data["minutes"].items()
+                        for app, count in counter
+                    ),
+                )
+                self._connection.execute(
+                    "INSERT INTO notes VALUES (?, ?, ?)",
+                    (day, data.get("daily_note"), time.time_ns()),
+                )
+
+    def open_day(self, name: str) -> Tuple[DayModel, str]:
+        """Return a read model and the daily note for day @name"""
+        data = self.load(name)
+        return dense.DenseDay(data["tracker_data"]), data.get("daily_note") or ""
+
+    def import_directory(self, directory: str, processes: Optional[int] = None) -> int:
+        """Import all day files in @directory, parsed by a pool of @processes worker
+        processes (default: number of CPUs). Return the number of imported days"""
+        filenames = [os.path.join(directory, name) for name in common.log_files(directory)]
+        log().info("Import %d day files from %r into %r", len(filenames), directory, self)
+        imported = 0
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            batch = []  # type: List[Tuple[int, Dict[str, Any]]]
+            for day, data in executor.map(_normalized_day, filenames, chunksize=8):
+                if day is None:
+                    continue
+                batch.append((day, data))
+                if len(batch) >= 64:
+                    self._save_days(batch)
+                    imported += len(batch)
+                    batch.clear()
+            self._save_days(batch)
+            imported += len(batch)
+        return imported
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Reading, writing and converting recorded days in all supported formats
+
+Recorded days are addressed by name (`track-YYYYMMDD.json`) and are kept in a day store:
+
+    DirectoryStore  one file per day in the data directory (default)
+    SqliteStore     all days in one SQLite database (see sqlite_store)
+
+JSON day files carry a schema version (field "version", missing in old files):
+
+    0  bare tracker data {"apps": .., "minutes": ..}
+    1  {"tracker_data": .., "daily_note": ..} - titles and command lines might be
+       replaced by string IDs ("strings", see strings.py)
+    2  like 1, with explicit version and minutes always being plain counters, i.e.
+       [[app, count], ..] instead of the old [category, [[app, count], ..]]
+
+All of them are read by load_day_file(), upgrade_day_file() rewrites old ones.
+"""
+
+import gzip
+import json
+import lzma
+import os
+import zipfile
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from . import codec, columnar, common, dense, strings
+from .active_applications import ActiveApplications
+from .util import atomic_write
+
+DayModel = Union[ActiveApplications, columnar.ColumnarDay, dense.DenseDay]
+
+SCHEMA_VERSION = 2
+
+
+# suffix => open() function for compressed (archived) JSON day files
+_OPENERS = {".gz": gzip.open, ".xz": lzma.open}  # type: Dict[str, Callable[..., Any]]
+
+
+def split_container(filename: str) -> Tuple[Optional[str], str]:
+    """Return (zip container, member name) for a day file inside a zip container and
+    (None, @filename) for any other day file"""
+    directory, name = os.path.split(filename)
+    if common.ZIP_CONTAINER_PATTERN.match(os.path.basename(directory)):
+        return directory, name
+    return None, filename
+
+
+def plain_path(filename: str) -> str:
+    """Return the name day file @filename would have if it was not archived"""
+    container, member = split_container(filename)
+    if container is not None:
+        filename = os.path.join(os.path.dirname(container), member)
+    base, suffix = os.path.splitext(filename)
+    return base if suffix in _OPENERS else filename
+
+
+def _read(filename: str) -> Any:
+    """Return the decoded but otherwise unprocessed content of JSON day file @filename"""
+    container, member = split_container(filename)
+    if container is not None:
+        with zipfile.ZipFile(container) as archive:
+            return codec.decode(archive.read(member))
+    with _OPENERS.get(os.path.splitext(filename)[1], open)(filename, "rb") as file:
+        return codec.decode(file.read())
+
+
+def schema_version(raw: Dict[str, Any]) -> int:
+    """Return the schema version of decoded day file content @raw"""
+    return int(raw.get("version", 1 if "tracker_data" in raw else 0))
+
+
+def _is_legacy_minute(value: Any) -> bool:
+    # [category, [[app, count], ..]] vs. [[app, count], ..]
+    return len(value) == 2 and isinstance(value[0], int)
+
+
+def decode_day(raw: Dict[str, Any], directory: str) -> Dict[str, Any]:
+    """Turn decoded day file content @raw of any schema version (read from @directory)
+    into JSON snapshot format - in one pass"""
+    version = schema_version(raw)
+    if version > SCHEMA_VERSION:
+        raise ValueError("day file schema version %d is not supported" % version)
+    tracker_data = raw if version == 0 else raw["tracker_data"]
+    apps = tracker_data.get("apps", [])
+    if "strings" in raw:
+        apps = strings.decode_apps(apps, strings.registry(directory))
+    else:
+        apps = [[strings.intern(t), cat, count, strings.intern(c)] for t, cat, count, c in apps]
+    minutes = tracker_data.get("minutes", {})
+    if version < 2:
+        minutes = {
+            minute: value[1] if _is_legacy_minute(value) else value
+            for minute, value in minutes.items()
+        }
+    return {
+        "tracker_data": {"apps": apps, "minutes": minutes},
+        "daily_note": raw.get("daily_note"),
+    }
+
+
+def encode_day(data: Dict[str, Any], directory: str, use_registry: bool = True) -> bytes:
+    """Return @data (JSON snapshot format) encoded as day file (of the current schema
+    version) for @directory - referring to the string registry if @use_registry, else
+    self-contained"""
+    tracker_data = data["tracker_data"]
+    raw = {
+        "version": SCHEMA_VERSION,
+        "codec": codec.DEFAULT.name,
+        "tracker_data": tracker_data,
+        "daily_note": data.get("daily_note"),
+    }
+    if use_registry:
+        raw["strings"] = strings.REGISTRY_FILENAME
+        raw["tracker_data"] = {
+            **tracker_data,
+            "apps": strings.encode_apps(tracker_data["apps"], strings.registry(directory)),
+        }
+    return codec.encode(raw)
+
+
+def load_day_file(filename: str) -> Dict[str, Any]:
+    """Read a day file (JSON of any schema version, columnar or archived) and return its
+    content in JSON snapshot format"""
+    if filename.endswith(columnar.SUFFIX):
+        day = columnar.ColumnarDay(filename)
+        try:
+            return day.to_dict()
+        finally:
+            day.close()
+    return decode_day(_read(filename), os.path.dirname(plain_path(filename)))
+
+
+def upgrade_day_file(filename: str, use_registry: bool = False) -> bool:
+    """Rewrite JSON day file @filename in the current schema version if it's older (or
+    self-contained while @use_registry) and return whether it has been rewritten. A
+    self-contained day file stays self-contained unless @use_registry"""
+    raw = _read(filename)
+    use_registry = use_registry or "strings" in raw
+    if schema_version(raw) == SCHEMA_VERSION and use_registry == ("strings" in raw):
+        return False
+    directory = os.path.dirname(filename)
+    save_bytes(filename, encode_day(decode_day(raw, directory), directory, use_registry))
+    return True
+
+
+def save_bytes(filename: str, raw: bytes) -> None:
+    """Properly write @raw to a file - atomically, i.e. via a temporary file which
+    replaces the target file once it has been written completely"""
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with atomic_write(filename) as file:
+        file.write(raw)
+
+
+def save_json(filename: str, data: Any) -> None:
+    """Atomically write data to a human readable JSON file"""
+    save_bytes(filename, json.dumps(data, sort_keys=True, indent=4).encode())
+
+
+def convert_day_file(filename: str, target_format: str) -> str:
+    """Write day file @filename in @target_format ('json' or 'columnar') next to it and
+    return the name of the new file"""
+    data = load_day_file(filename)
+    basename = os.path.splitext(filename)[0]
+    if target_format == "columnar":
+        target = basename + columnar.SUFFIX
+        columnar.write(target, ActiveApplications(data["tracker_data"]), data.get("daily_note"))
+    elif target_format == "json":
+        target = basename + ".json"
+        save_json(target, {"version": SCHEMA_VERSION, **data})
+    else:
+        raise ValueError("unknown day file format %r" % target_format)
+    return target
+
+
+class DirectoryStore:
+    """Day store keeping one file per day in @directory"""
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+
+    def __repr__(self) -> str:
+        return "DirectoryStore(%r)" % self._directory
+
+    def path(self, name: str) -> str:
+        """Return the file system path of day @name - which might have been archived"""
+        path = os.path.join(self._directory, name)
+        if os.path.exists(path) or split_container(path)[0] is not None:
+            return path
+        # e.g. `track show track-20200101.json` for a day which has been archived meanwhile
+        for candidate in self.days():
+            if plain_path(candidate) == name:
+                return os.path.join(self._directory, candidate)
+        return path
+
+    def summary_path(self) -> str:
+        """Return the name of the summary index file (see summary.SummaryIndex)"""
+        return os.path.join(self._directory, "track-summary.json")
+
+    def stamp(self, name: str) -> List[int]:
+        """Return something which changes whenever day @name gets modified"""
+        container, path = split_container(os.path.join(self._directory, name))
+        stat = os.stat(container or path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def days(self, reverse: bool = False, exclude_today: bool = False) -> List[str]:
+        """Return the sorted names of all recorded days"""
+        if not os.path.isdir(self._directory):
+            return []
+        return common.log_files(self._directory, reverse=reverse, exclude_today=exclude_today)
+
+    def load(self, name: str) -> Dict[str, Any]:
+        """Return day @name in JSON snapshot format, raises FileNotFoundError if missing"""
+        return load_day_file(self.path(name))
+
+    def save(self, name: str, data: Dict[str, Any]) -> None:
+        """Write @data (JSON snapshot format) as day @name (see encode_day())"""
+        save_bytes(os.path.join(self._directory, name), encode_day(data, self._directory))
+
+    def open_day(self, name: str) -> Tuple[DayModel, str]:
+        """Return a read model and the daily note for day @name"""
+        path = self.path(name)
+        if path.endswith(columnar.SUFFIX):
+            day = columnar.ColumnarDay(path)
+            return day, day.note() or ""
+        data = load_day_file(path)
+        return dense.DenseDay(data.get("tracker_data")), data.get("daily_note") or ""
+
+    def close(self) -> None:
+        pass
+
+
+def open_store(data_dir: str, backend: str = "json") -> Any:
+    """Return the day store for @data_dir using @backend ("json" or "sqlite")"""
+    if backend == "json":
+        return DirectoryStore(data_dir)
+    if backend == "sqlite":
+        # imported here since sqlite_store depends on this module
+        from .sqlite_store import SqliteStore  # pylint: disable=import-outside-toplevel
+
+        return SqliteStore(os.path.join(data_dir, SqliteStore.FILENAME))
+    raise ValueError("unknown storage backend %r" % backend)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Persistent registry of window titles and command lines
+
+Titles and command lines repeat every day, so day files written by a DirectoryStore
+don't contain them but refer to them by integer IDs which are valid for all days of a
+data directory. The registry file (`track-strings.jsonl`) holds one JSON encoded string
+per line, the ID of a string being its line number. It only gets appended to, so IDs
+stay valid forever. Processes sharing a registry file (e.g. the server and `track
+upgrade`) append under an exclusive lock (where fcntl is available).
+
+All strings read from a registry or from self-contained day files get interned, so
+histories loaded into one process share a single copy of each string.
+
+Losing the registry file means losing the titles of all days referring to it, so that
+raises MissingStringsError rather than a ValueError which would just skip a broken day.
+`track upgrade` keeps self-contained day files self-contained unless asked otherwise.
+"""
+
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Sequence
+
+from .util import log
+
+try:
+    import fcntl
+except ImportError:  # not on Windows
+    fcntl = None  # type: ignore
+
+REGISTRY_FILENAME = "track-strings.jsonl"
+
+# one registry instance per registry file and process
+_REGISTRIES = {}  # type: Dict[str, StringRegistry]
+
+
+class MissingStringsError(Exception):
+    """Strings are referred to which are not in the registry file"""
+
+
+def intern(string: str) -> str:
+    """Return the process wide shared instance of @string"""
+    return sys.intern(string)
+
+
+class StringRegistry:
+    """Maps strings to stable integer IDs and back, backed by @filename"""
+
+    def __init__(self, filename: str) -> None:
+        self._filename = filename
+        self._strings = []  # type: List[str]
+        self._ids = {}  # type: Dict[str, int]
+        self._offset = 0  # number of bytes of the registry file read so far
+        self._lock = threading.Lock()
+        self._read()
+
+    def __repr__(self) -> str:
+        return "StringRegistry(%r, %d strings)" % (self._filename, len(self._strings))
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def _read(self) -> None:
+        """Read strings appended (possibly by another process) since the last read"""
+        try:
+            with open(self._filename, "rb") as file:
+                file.seek(self._offset)
+                content = file.read()
+        except FileNotFoundError:
+            return
+        # a line without newline has not been written completely (yet)
+        complete = content[: content.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            try:
+                string = intern(json.loads(line))
+            except json.JSONDecodeError:
+                # see ids() - keep the slot to keep the following IDs
+                self._strings.append("")
+                continue
+            self._ids.setdefault(string, len(self._strings))
+            self._strings.append(string)
+        self._offset += len(complete)
+
+    def ids(self, strings: Sequence[str]) -> List[int]:
+        """Return the IDs of @strings, registering (and persisting) new ones"""
+        with self._lock:
+            if any(string not in self._ids for string in strings):
+                self._register(strings)
+            return [self._ids[string] for string in strings]
+
+    def _register(self, strings: Sequence[str]) -> None:
+        """Append strings not registered yet to the registry file"""
+        os.makedirs(os.path.dirname(self._filename) or ".", exist_ok=True)
+        with open(self._filename, "ab") as file:
+            if fcntl is not None:
+                # released on close
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            # other processes might have appended strings before we got the lock
+            self._read()
+            new = list(dict.fromkeys(s for s in strings if s not in self._ids))
+            if not new:
+                return
+            if os.fstat(file.fileno()).st_size > self._offset:
+                # there's an incomplete line left by a crash - terminate it, the broken
+                # entry then just can't be decoded anymore
+                log().warning("Repair incomplete entry in %r", self._filename)
+                file.write(b"\n")
+                self._strings.append("")
+            file.write(b"".join(json.dumps(string).encode() + b"\n" for string in new))
+            file.flush()
+            os.fsync(file.fileno())
+            self._offset = os.fstat(file.fileno()).st_size
+        for string in new:
+            string = intern(string)
+            self._ids[string] = len(self._strings)
+            self._strings.append(string)
+
+    def strings(self, ids: Sequence[int]) -> List[str]:
+        """Return the strings registered for @ids, raises MissingStringsError for unknown
+        IDs (i.e. the registry file is missing or has been truncated)"""
+        with self._lock:
+            if ids and max(ids) >= len(self._strings):
+                self._read()
+        if ids and not (min(ids) >= 0 and max(ids) < len(self._strings)):
+            unknown = [i for i in ids if not 0 <= i < len(self._strings)]
+            raise MissingStringsError(
+                "string ID %d is not registered in %r (%d strings) - the registry file is "
+                "missing or incomplete" % (unknown[0], self._filename, len(self._strings))
+            )
+        return [self._strings[string_id] for string_id in ids]
+
+
+def registry(directory: str) -> StringRegistry:
+    """Return the (shared) registry for data directory @directory"""
+    filename = os.path.abspath(os.path.join(directory, REGISTRY_FILENAME))
+    if filename not in _REGISTRIES:
+        _REGISTRIES[filename] = StringRegistry(filename)
+    return _REGISTRIES[filename]
+
+
+def encode_apps(apps: Sequence[Sequence[Any]], string_registry: StringRegistry) -> List[List[Any]]:
+    """Replace title and cmdline of serialized apps (see AppInfo.__data__()) by IDs"""
+    ids = string_registry.ids([s for app in apps for s in (app[0], app[3])])
+    return [[ids[2 * i], app[1], app[2], ids[2 * i + 1]] for i, app in enumerate(apps)]
+
+
+def decode_apps(apps: Sequence[Sequence[Any]], string_registry: StringRegistry) -> List[List[Any]]:
+    """Inverse of encode_apps()"""
+    strings = string_registry.strings([i for app in apps for i in (app[0], app[3])])
+    return [[strings[2 * i], app[1], app[2], strings[2 * i + 1]] for i, app in enumerate(apps)]
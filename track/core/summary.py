@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Per-day summary index - begin, end and totals of all recorded days in one file
+
+The index lives next to the day store (see DirectoryStore.summary_path()) and stores for
+each day the store's stamp of that day (e.g. mtime and size of the day file) together
+with its summary. On update() only days with a changed stamp are read again.
+
+Since the main app of a minute doesn't depend on categories, a summary also stores how
+many minutes each app has been the main app - so totals for any other set of category
+rules can be calculated without reading the day (see DaySummary.categorized()). Like the
+apps of a loaded day, those main apps get re-categorized incrementally after a rule edit
+as long as the same AppInfo instances (see DaySummary.app_infos()) are passed.
+"""
+
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import common, segments, storage
+from .util import log
+
+VERSION = 3
+
+
+class DaySummary(NamedTuple):
+    """What's shown for a day without looking at its timeline"""
+
+    begin: int
+    end: int
+    active: int
+    work: int
+    private: int
+    note: str  # first line only
+    main_apps: Dict[str, int]  # app identifier => minutes as main app
+    breaks: int  # idle minutes within breaks (default segment settings)
+
+    def app_infos(self) -> List[Tuple[common.AppInfo, int]]:
+        """Return (AppInfo, minutes as main app) for all main apps"""
+        return [
+            (common.AppInfo(identifier), minutes) for identifier, minutes in self.main_apps.items()
+        ]
+
+    def categorized(
+        self,
+        rule_set: common.RuleSet,
+        app_infos: Optional[Sequence[Tuple[common.AppInfo, int]]] = None,
+    ) -> "DaySummary":
+        """Return this summary with work and private time according to @rule_set.
+        @app_infos (see app_infos()) keep the matched rules, pass the same ones again to
+        only re-evaluate rules which changed since"""
+        totals = {}  # type: Dict[int, int]
+        for app, minutes in self.app_infos() if app_infos is None else app_infos:
+            rule_set.categorize(app)
+            totals[app._category] = totals.get(app._category, 0) + minutes
+        return self._replace(
+            work=totals.get(common.Category.WORK, 0),
+            private=totals.get(common.Category.PRIVATE, 0),
+        )
+
+
+def summarize(model: storage.DayModel, note: Optional[str]) -> DaySummary:
+    """Return the summary of a day read as @model with daily note @note"""
+    return DaySummary(
+        begin=model.begin_index(),
+        end=model.end_index(),
+        active=model.time_active(),
+        work=model.time_in_category(common.Category.WORK),
+        private=model.time_in_category(common.Category.PRIVATE),
+        note=(note or "").split("\n")[0],
+        main_apps=model.main_app_minutes(),
+        breaks=segments.segment(model).time_in_breaks(),
+    )
+
+
+class SummaryIndex:
+    """Summaries of all days found in @store, kept up to date incrementally"""
+
+    def __init__(self, store: Any) -> None:
+        self._store = store
+        self._filename = store.summary_path()
+        self._entries = {}  # type: Dict[str, Dict[str, Any]]
+        try:
+            with open(self._filename) as file:
+                data = json.load(file)
+            if data.get("version") == VERSION:
+                self._entries = data["days"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self) -> int:
+        """Re-read all days which changed since the last update, drop vanished days and
+        write the index if anything changed. Return the number of days re-read"""
+        names = self._store.days()
+        updated = 0
+        for name in names:
+            stamp = self._store.stamp(name)
+            entry = self._entries.get(name)
+            if entry is not None and entry["stamp"] == stamp:
+                continue
+            try:
+                model, note = self._store.open_day(name)
+            except (FileNotFoundError, json.JSONDecodeError, ValueError) as exc:
+                log().warning("Could not summarize %r: %s", name, exc)
+                continue
+            self._entries[name] = {"stamp": stamp, **summarize(model, note)._asdict()}
+            if hasattr(model, "close"):
+                model.close()
+            updated += 1
+
+        vanished = self._entries.keys() - set(names)
+        for name in vanished:
+            del self._entries[name]
+
+        if updated or vanished:
+            log().info("Summary index: %d days updated, %d removed", updated, len(vanished))
+            storage.save_json(self._filename, {"version": VERSION, "days": self._entries})
+        return updated
+
+    def days(self, reverse: bool = False, exclude_today: bool = False) -> List[str]:
+        """Return the sorted names of all indexed days"""
+        today = "track-%s." % common.today_str()
+        return sorted(
+            (name for name in self._entries if not (exclude_today and name.startswith(today))),
+            reverse=reverse,
+        )
+
+    def get(self, name: str) -> Optional[DaySummary]:
+        """Return the summary of day @name or None if it's not indexed"""
+        entry = self._entries.get(name)
+        return None if entry is None else DaySummary(*(entry[f] for f in DaySummary._fields))
@@ -4,33 +4,72 @@
 """Defines TimeTracker class which gathers and provides information about deskopt usage
 """
 
+import functools
 import json
 import os
-from typing import Any, Dict, Optional, Sequence, Tuple  # pylint: disable=unused-import
+import threading
+from typing import (  # pylint: disable=unused-import
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from ..core import desktop_usage_info
 from ..core.util import catch, exception_to_string, log
-from . import ActiveApplications, common
+from . import ActiveApplications, common, storage
+from .journal import Journal
 
 
 class TimeTracker:
     """* retrieves system data
     * holds the application data object as
       well as some meta information
-    * provides persistence
+    * provides persistence - either by writing full snapshots or (@journal) by appending
+      changes to a journal which gets compacted on save() and at midnight
+    * keeps recorded days in a day store - JSON files or SQLite (@storage_backend)
     """
 
-    def __init__(self, data_dir: str) -> None:
+    def __init__(
+        self,
+        data_dir: str,
+        category_cache_size: int = 256,
+        journal: bool = False,
+        verify_persistence: bool = False,
+        storage_backend: str = "json",
+    ) -> None:
         self._last_day = common.today_int()
         self._storage_dir = data_dir
         self._current_state = {}  # type: Dict[str, Any]
+        self._verify_persistence = verify_persistence
+        self._store = storage.open_store(data_dir, storage_backend)
+
+        # revisions of data not covered by ActiveApplications.revision() and what has
+        # been written already, so unchanged data doesn't get written again
+        self._note_revision = 0
+        self._rules_revision = 0
+        self._categories_revision = 0
+        self._persisted = {}  # type: Dict[str, Tuple[int, int, int]]
+        self._persisted_rules_revision = -1
+        # persist() and sync() get called by the monitoring thread and on the "save" command
+        self._persist_lock = threading.Lock()
+        # held while categorizing and recording a sample (monitoring thread) and while
+        # switching rules (server thread) - so no sample gets categorized by old rules
+        # after the switch
+        self._rules_lock = threading.Lock()
 
         # -- data to persist
-        data = catch(
-            lambda: self._load_json("track-%s.json" % common.today_str()),
-            (FileNotFoundError, json.JSONDecodeError),
-            {},
-        )
+        try:
+            data = self._store.load("track-%s.json" % common.today_str())
+        except FileNotFoundError:
+            data = {}
+        except ValueError as exc:
+            # including JSONDecodeError - but not MissingStringsError, today's file must
+            # not be overwritten while the strings of all days are missing
+            log().error("Could not load today's tracking data, start from scratch: %s", exc)
+            data = {}
         self._applications = ActiveApplications(data.get("tracker_data"))
         self.note = data.get("daily_note")
         log().info("Found app data: %r", self._applications)
@@ -52,7 +91,25 @@ class TimeTracker:
                 (r".*SZ.de", 3),
             ],
         )
-        common.recategorize(self._applications.apps(), self._re_rules)
+
+        self._journal = None  # type: Optional[Journal]
+        if journal:
+            self._journal = Journal(self._journal_filename())
+            replayed = self._journal.replay(self._applications)
+            self.note = replayed.get("note", self.note)
+            self._re_rules = replayed.get("rules", self._re_rules)
+
+        self._rule_set = common.RuleSet(self._re_rules)
+        self._applications.recategorize(self._rule_set)
+
+        # (title, cmdline) => (category, AppInfo) - has to be cleared whenever rules or
+        # the application store change
+        self._categorize = functools.lru_cache(maxsize=category_cache_size)(
+            self._categorize_uncached
+        )
+
+    def _journal_filename(self) -> str:
+        return os.path.join(self._storage_dir, "track-%d.journal" % self._last_day)
 
     def _load_json(self, filename: str) -> Any:
         """Properly read data from a JSON file"""
@@ -60,15 +117,8 @@ class TimeTracker:
             return json.load(file)
 
     def _save_json(self, data: Dict[str, Any], filename: str) -> None:
-        """Properly write data to a JSON file"""
-        os.makedirs(self._storage_dir, exist_ok=True)
-        with open(os.path.join(self._storage_dir, filename), "w") as file:
-            json.dump(
-                data,
-                file,
-                sort_keys=True,
-                indent=4,
-            )
+        """Properly (i.e. atomically) write data to a JSON file"""
+        storage.save_json(os.path.join(self._storage_dir, filename), data)
 
     def __eq__(self, other: object) -> bool:
         return False
@@ -76,19 +126,56 @@ class TimeTracker:
     def clear(self) -> None:
         """Clear the application store - keeps the instance"""
         self._applications.clear()
+        self._categorize.cache_clear()
 
-    def persist(self, filename: str) -> None:
-        """Store tracking info and regex rules on file system"""
-        log().info("Save tracker data to %r", filename)
-        self._save_json(
-            {"tracker_data": self._applications.__data__(), "daily_note": self.note}, filename
+    def revision(self) -> Tuple[int, int, int]:
+        """Return a value which changes whenever tracking data, note or categories change"""
+        return (
+            self._applications.revision(),
+            self._note_revision,
+            self._categories_revision,
         )
-        self._save_json(self._re_rules, "category_rules.json")
 
-        # just for development
-        _test_model = ActiveApplications()
-        _test_model.from_dict(self._applications.__data__())
-        assert self._applications == _test_model
+    def persist(self, filename: str) -> None:
+        """Store tracking info and regex rules on file system - if they changed"""
+        with self._persist_lock:
+            self._persist(filename)
+
+    def _persist(self, filename: str) -> None:
+        if self._journal is not None and filename == "track-%d.json" % self._last_day:
+            # the snapshot contains everything journaled so far - nothing may get
+            # journaled in between
+            with self._journal.lock():
+                self._write(filename)
+                self._journal.reset()
+        else:
+            self._write(filename)
+
+    def _write(self, filename: str) -> None:
+        log().debug("Category cache: %r", self.category_cache_info())
+        revisions = self.revision()
+        if self._persisted.get(filename) != revisions:
+            log().info("Save tracker data to %r", filename)
+            data = self._applications.__data__()
+            self._store.save(filename, {"tracker_data": data, "daily_note": self.note})
+            self._persisted[filename] = revisions
+            if self._verify_persistence:
+                _test_model = ActiveApplications()
+                _test_model.from_dict(data)
+                assert self._applications == _test_model
+
+        if self._persisted_rules_revision != self._rules_revision:
+            self._save_json(self._re_rules, "category_rules.json")
+            self._persisted_rules_revision = self._rules_revision
+
+    def sync(self, filename: str) -> None:
+        """Make sure tracking data is on disk - writes a full snapshot to @filename
+        unless in journal mode"""
+        with self._persist_lock:
+            if self._journal is None:
+                self._persist(filename)
+            else:
+                self._journal.flush(self._applications)
 
     def get_applications_model(self) -> ActiveApplications:
         """Return the current application store"""
@@ -100,12 +187,65 @@ class TimeTracker:
 
     def set_rules(self, rules: common.Rules) -> None:
         """Store a new set of regex rules and recalculate categories"""
-        self._re_rules = rules
-        common.recategorize(self._applications.apps(), self._re_rules)
+        with self._rules_lock:
+            # compile first - invalid rules (re.error) must not get stored or journaled
+            rule_set = self._rule_set.updated(rules)
+            self._re_rules = rules
+            self._rules_revision += 1
+            if self._journal is not None:
+                self._journal.record_rules(rules)
+            self._rule_set = rule_set
+            self._categorize.cache_clear()
+            if self._applications.recategorize(self._rule_set):
+                self._categories_revision += 1
+
+    def _categorize_uncached(self, title: str, cmdline: str) -> Tuple[int, common.AppInfo]:
+        """Return category and (if already known) the stored AppInfo instance for a window"""
+        app = common.AppInfo(title, cmdline)
+        stored = self._applications.app(app.generate_identifier())
+        app = stored or app
+        if self._rule_set.categorize(app) and stored is not None:
+            self._categories_revision += 1
+            self._applications.categories_changed()
+        return app._category, app
+
+    def category_cache_info(self) -> Dict[str, Optional[int]]:
+        """Return hit/miss counters and size of the window category cache"""
+        return self._categorize.cache_info()._asdict()
+
+    def rules_stats(self) -> List[Dict[str, Any]]:
+        """Return match counts and evaluation cost for each rule"""
+        return self._rule_set.stats()
 
     def set_note(self, note: str) -> None:
         """Store daily note"""
+        if note == self.note:
+            return
         self.note = note
+        self._note_revision += 1
+        if self._journal is not None:
+            self._journal.record_note(note)
+
+    def clip_from(self, index: int) -> None:
+        """Remove all tracking data before @index"""
+        self._applications.clip_from(index)
+        if self._journal is not None:
+            self._journal.record_clip_from(index)
+
+    def clip_to(self, index: int) -> None:
+        """Remove all tracking data after @index"""
+        self._applications.clip_to(index)
+        if self._journal is not None:
+            self._journal.record_clip_to(index)
+
+    def undo_clip(self) -> bool:
+        """Restore the data removed by the last clip_from() / clip_to(), return False if
+        there's nothing to undo"""
+        if not self._applications.undo_clip():
+            return False
+        if self._journal is not None:
+            self._journal.record_undo_clip()
+        return True
 
     def update(self) -> None:
         """Gather desktop usage info"""
@@ -115,34 +255,41 @@ class TimeTracker:
 
             if midnight:
                 log().info("current minute is %d - it's midnight", current_minute)
+                if self._journal is not None:
+                    # compact the journal into the finished day's snapshot
+                    self.persist("track-%d.json" % self._last_day)
                 self.persist("track-backup-%d.json" % self._last_day)
                 self.clear()
 
             self._last_day = current_day
+            if self._journal is not None and midnight:
+                self._journal = Journal(self._journal_filename())
 
             app_info = desktop_usage_info.applicationinfo.get_active_window_information()
             current_app_title = app_info["TITLE"]
             current_process_exe = app_info.get("COMMAND", "Process not found")
-            app = common.AppInfo(current_app_title, current_process_exe)
-            current_category = common.get_category(app, self._re_rules)
-            app.set_category(current_category)
-
             idle_current = desktop_usage_info.idle.getIdleSec()
             user_is_active = idle_current <= 10
 
-            self._current_state = {
-                "minute": current_minute,
-                "category": current_category,
-                "time_total": current_minute - self._applications.begin_index() + 1,
-                "user_idle": idle_current,
-                "user_active": user_is_active,
-                "app_title": current_app_title,
-                "process_name": current_process_exe,
-            }
-            print(self._current_state)
+            with self._rules_lock:
+                current_category, app = self._categorize(current_app_title, current_process_exe)
+                self._rule_set.count_sample(app)
+
+                self._current_state = {
+                    "minute": current_minute,
+                    "category": current_category,
+                    "time_total": current_minute - self._applications.begin_index() + 1,
+                    "user_idle": idle_current,
+                    "user_active": user_is_active,
+                    "app_title": current_app_title,
+                    "process_name": current_process_exe,
+                }
 
-            if user_is_active:
-                self._applications.update(current_minute, app)
+                if user_is_active:
+                    self._applications.update(current_minute, app)
+                    if self._journal is not None:
+                        self._journal.record_sample(self._applications, current_minute)
+            print(self._current_state)
 
         except KeyError as exc:
             log().error("%r", app_info)
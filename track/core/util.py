@@ -8,8 +8,9 @@ import logging
 import logging.handlers
 import os
 import sys
-from contextlib import contextmanager
-from typing import Any, NoReturn
+import tempfile
+from contextlib import contextmanager, suppress
+from typing import IO, Any, Iterator, NoReturn
 
 from PyQt5 import QtCore
 
@@ -97,6 +98,50 @@ def open_in_directory_of(file, path):
     file.close()
 
 
+def _umask() -> int:
+    """Return the umask of the process - without setting it temporarily where possible,
+    since that would affect files created by other threads meanwhile"""
+    with suppress(OSError):
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    umask = os.umask(0o077)
+    os.umask(umask)
+    return umask
+
+
+def _file_mode(filename: str) -> int:
+    """Return the permissions of @filename or those a newly created file would get"""
+    try:
+        return os.stat(filename).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_umask()
+
+
+@contextmanager
+def atomic_write(filename: str, mode: str = "wb") -> Iterator[IO[Any]]:
+    """Open a uniquely named temporary file next to @filename which replaces @filename
+    once it has been written completely - concurrent writers never share a temporary
+    file, the last one to finish wins. The permissions of @filename are kept (rather
+    than those of the temporary file which is private to the user)"""
+    directory = os.path.dirname(filename) or "."
+    descriptor, temp_filename = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(filename) + ".", suffix=".tmp"
+    )
+    try:
+        os.fchmod(descriptor, _file_mode(filename))
+        with os.fdopen(descriptor, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(temp_filename)
+        raise
+
+
 def exception_to_string(exc: Exception) -> str:
     """Turn an exception into something very readable
     Currently only __str__ is being used - to be enrichted by file, etc"""
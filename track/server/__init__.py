@@ -11,12 +11,12 @@ import threading
 import time
 import traceback
 from contextlib import suppress
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 import zmq  # type: ignore
 
 from .. import core
-from ..core import common, desktop_usage_info, errors, util
+from ..core import codec, common, desktop_usage_info, errors, util
 from ..core.util import log
 
 
@@ -30,18 +30,30 @@ class TrackServer:
         self._system_monitoring_thread = threading.Thread(
             target=self._system_monitoring_fn, daemon=True
         )
-        self._tracker = core.TimeTracker(data_dir=args.data_dir)
+        self._tracker = core.TimeTracker(
+            data_dir=args.data_dir,
+            category_cache_size=args.category_cache_size,
+            journal=args.journal,
+            verify_persistence=args.verify_persistence,
+            storage_backend=args.storage,
+        )
         self._last_save_time = 0.0
+        self._apps_reply = (None, b"")  # type: Tuple[Any, bytes]
 
     def _save_data(self, interval: int = 20, force: bool = False) -> None:
         if time.time() - self._last_save_time > interval or force:
-            self._tracker.persist("track-%s.json" % common.today_str())
+            filename = "track-%s.json" % common.today_str()
+            (self._tracker.persist if force else self._tracker.sync)(filename)
             self._last_save_time = time.time()
 
     def _system_monitoring_fn(self) -> None:
         while self._running:
             time.sleep(1)
-            self._save_data(interval=120)
+            try:
+                self._save_data(interval=120)
+            except OSError as ex:
+                # e.g. a full disk - keep tracking and try to save again later
+                log().error("Could not save tracking data: %s", ex)
             try:
                 self._tracker.update()
             except desktop_usage_info.WindowInformationError:
@@ -71,7 +83,8 @@ class TrackServer:
             return {"data": {"version": str(core.version_info)}}
 
         def apps_fn(_request: Dict[str, Any]) -> Dict[str, Any]:
-            return {"data": {"apps": self._tracker.get_applications_model().__data__()}}
+            model = self._tracker.get_applications_model()
+            return {"data": {"apps": model.snapshot(), "totals": model.totals()}}
 
         def current_fn(_request: Dict[str, Any]) -> Dict[str, Any]:
             return {"data": {"current": self._tracker.current_state()}}
@@ -85,6 +98,14 @@ class TrackServer:
             self._tracker.set_rules(request["data"]["rules"])
             return {"type": "ok"}
 
+        def rules_stats_fn(_request: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "data": {
+                    "rules_stats": self._tracker.rules_stats(),
+                    "category_cache": self._tracker.category_cache_info(),
+                }
+            }
+
         def note_fn(_request: Dict[str, Any]) -> Dict[str, Any]:
             return {"data": {"note": self._tracker.note}}
 
@@ -97,17 +118,20 @@ class TrackServer:
         def clip_from_fn(request: Dict[str, Any]) -> Dict[str, Any]:
             if "data" not in request or "index" not in request["data"]:
                 raise errors.RequestMalformed('No "index" provided')
-            self._tracker.get_applications_model().clip_from(request["data"]["index"])
+            self._tracker.clip_from(request["data"]["index"])
             # self._save_data(force=True)
             return {"type": "ok"}
 
         def clip_to_fn(request: Dict[str, Any]) -> Dict[str, Any]:
             if "data" not in request or "index" not in request["data"]:
                 raise errors.RequestMalformed('No "index" provided')
-            self._tracker.get_applications_model().clip_to(request["data"]["index"])
+            self._tracker.clip_to(request["data"]["index"])
             # self._save_data(force=True)
             return {"type": "ok"}
 
+        def undo_clip_fn(_request: Dict[str, Any]) -> Dict[str, Any]:
+            return {"data": {"undone": self._tracker.undo_clip()}}
+
         def save_fn(_request: Dict[str, Any]) -> Dict[str, Any]:
             self._save_data(force=True)
             return {"type": "ok"}
@@ -120,13 +144,43 @@ class TrackServer:
             "current": current_fn,
             "rules": rules_fn,
             "set_rules": set_rules_fn,
+            "rules_stats": rules_stats_fn,
             "note": note_fn,
             "set_note": set_note_fn,
             "clip_from": clip_from_fn,
             "clip_to": clip_to_fn,
+            "undo_clip": undo_clip_fn,
             "save": save_fn,
         }.get(request.get("cmd", None), wrong_command_fn)(request)
 
+    def _reply(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return self.handle_request(request)
+        except errors.RequestMalformed as exc:
+            return {"type": "error", "error_type": "request_malformed", "what": str(exc)}
+        except Exception as exc:  # pylint: disable=broad-except
+            return {"type": "error", "what": str(exc)}
+
+    def encoded_reply(self, raw_request: bytes) -> bytes:
+        """Decode @raw_request, process it and return the encoded reply. The reply to
+        'apps' gets re-used as long as the tracking data doesn't change"""
+        try:
+            request = codec.decode(raw_request)
+            if not isinstance(request, dict):
+                raise ValueError("request has to be an object")
+        except ValueError as exc:
+            return codec.encode(
+                {"type": "error", "error_type": "request_malformed", "what": str(exc)}
+            )
+        log().debug(request)
+        if request.get("cmd") != "apps":
+            return codec.encode(self._reply(request))
+        # take the revision first - the data might get newer meanwhile, but not older
+        revision = self._tracker.revision()
+        if self._apps_reply[0] != revision:
+            self._apps_reply = (revision, codec.encode(self._reply(request)))
+        return self._apps_reply[1]
+
     def run(self, args: argparse.Namespace) -> None:
         """Run zmq message dispatching loop"""
         context = zmq.Context()
@@ -144,22 +198,13 @@ class TrackServer:
         while self._running:
             log().debug("listening..")
             try:
-                request = rep_socket.recv_json()
+                raw_request = rep_socket.recv()
             except zmq.ZMQError:
                 self._running = False
                 self._system_monitoring_thread.join()
                 break
 
-            log().debug(request)
-
-            try:
-                reply = self.handle_request(request)
-            except errors.RequestMalformed as exc:
-                reply = {"type": "error", "error_type": "request_malformed", "what": str(exc)}
-            except Exception as exc:  # pylint: disable=broad-except
-                reply = {"type": "error", "what": str(exc)}
-
-            rep_socket.send_json(reply)
+            rep_socket.send(self.encoded_reply(raw_request))
 
         if self._system_monitoring_thread:
             self._system_monitoring_thread.join()
@@ -172,6 +217,22 @@ def parse_arguments() -> argparse.Namespace:
     """parse command line arguments and return argument object"""
     parser = argparse.ArgumentParser(description=__doc__)
     common.setup_argument_parser(parser)
+    parser.add_argument(
+        "--category-cache-size",
+        type=int,
+        default=256,
+        help="number of (window title, command line) pairs to remember the category for",
+    )
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="append changes to a journal instead of periodically writing full snapshots",
+    )
+    parser.add_argument(
+        "--verify-persistence",
+        action="store_true",
+        help="re-load and compare tracking data after each save (slow, for development)",
+    )
     return parser.parse_args()
 
 
@@ -10,7 +10,8 @@ import os.path
 import subprocess
 import sys
 from contextlib import suppress
-from typing import Any
+from datetime import date, datetime, timedelta
+from typing import Any, List
 
 try:
     from PyQt5 import QtCore, QtGui, QtWidgets  # type: ignore
@@ -23,7 +24,7 @@ except ImportError:
 
 from pathlib import Path
 
-from ..core import common, errors, util
+from ..core import common, date_range, errors, storage, strings, summary, util
 from ..core.util import log
 from .mainwindow import MainWindow
 from .qreordertableview import ReorderTableView
@@ -47,6 +48,8 @@ def start_server_process(args) -> None:
             args.data_dir,
             "--port",
             str(args.port),
+            "--storage",
+            args.storage,
         ],
         env={**os.environ, **{"PYTHONPATH": module_path.parent}},
     )
@@ -171,6 +174,7 @@ class TrackUI(MainWindow):
         self._endpoint = "tcp://127.0.0.1:%s" % str(args.port)
         self._tracker = TimeTrackerClientQt(self)
         self._tracker.rules_model().rulesChanged.connect(self.on_rules_changed)
+        self._rule_set = common.RuleSet()
 
         font = QtGui.QFont("FreeMono")
         font.setStyleHint(QtGui.QFont.Monospace)
@@ -222,17 +226,38 @@ class TrackUI(MainWindow):
         self.active_applications_spoiler.setExpanded(True)
 
         self.tbl_evaluation = QtWidgets.QListWidget()
-        for filename in common.log_files(args.data_dir, reverse=True, exclude_today=True):
-            myQCustomQWidget = EvaluationWidget(
-                dataprovider=FileDataprovider(os.path.join(args.data_dir, filename))
+        store = storage.open_store(args.data_dir, args.storage)
+        index = summary.SummaryIndex(store)
+        try:
+            index.update()
+        except strings.MissingStringsError as exc:
+            # show the days indexed so far, but don't hide the loss
+            log().error("Could not read recorded days: %s", exc)
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Recorded days can't be read",
+                "Window titles of recorded days are missing:\n\n%s" % exc,
+                buttons=QtWidgets.QMessageBox.Ok,
             )
+        week_begin = datetime.combine(date.today() - timedelta(days=7), datetime.min.time())
+        self._last_week = []  # type: List[FileDataprovider]
+        for name in index.days(reverse=True, exclude_today=True):
+            dataprovider = FileDataprovider(store, name, index.get(name))
+            if dataprovider.date() >= week_begin:
+                self._last_week.append(dataprovider)
+            myQCustomQWidget = EvaluationWidget(dataprovider=dataprovider)
             myQListWidgetItem = QtWidgets.QListWidgetItem(self.tbl_evaluation)
             myQListWidgetItem.setSizeHint(myQCustomQWidget.sizeHint())
             self.tbl_evaluation.addItem(myQListWidgetItem)
             self.tbl_evaluation.setItemWidget(myQListWidgetItem, myQCustomQWidget)
 
+        self.lbl_last_week = QtWidgets.QLabel()
+        self.lbl_last_week.setWordWrap(True)
+        self._update_last_week()
+
         self.evaluation_spoiler.setTitle("Evaluation")
         self.evaluation_spoiler.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.evaluation_spoiler.addWidget(self.lbl_last_week)
         self.evaluation_spoiler.addWidget(self.tbl_evaluation)
 
         self.setWindowIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaSeekForward))
@@ -265,10 +290,37 @@ class TrackUI(MainWindow):
     @QtCore.pyqtSlot()
     def on_rules_changed(self) -> None:
         self.tbl_category_rules.update()
+        self._rule_set = self._rule_set.updated(self._tracker.rules_model().rules())
         for i in range(self.tbl_evaluation.count()):
-            self.tbl_evaluation.itemWidget(self.tbl_evaluation.item(i)).recategorize(
-                self._tracker.rules_model().rules()
+            widget = self.tbl_evaluation.itemWidget(self.tbl_evaluation.item(i))
+            if widget is not None:
+                widget.recategorize(self._rule_set)
+        self._update_last_week()
+
+    def _update_last_week(self) -> None:
+        """Show the totals of the last 7 days (today excluded) - taken from the (clipped
+        and re-categorized) day summaries of the evaluation list"""
+        stats = date_range.RangeStats()
+        for dataprovider in self._last_week:
+            stats.add_summary(dataprovider.day_summary())
+        if not stats.days:
+            self.lbl_last_week.setText("Last 7 days: nothing recorded")
+            return
+        self.lbl_last_week.setText(
+            "Last 7 days (%d recorded): %s active, %s work, %s private, %s breaks - "
+            "top apps: %s"
+            % (
+                stats.days,
+                common.mins_to_dur(stats.active),
+                common.mins_to_dur(stats.time_in_category(common.Category.WORK)),
+                common.mins_to_dur(stats.time_in_category(common.Category.PRIVATE)),
+                common.mins_to_dur(stats.time_in_category(common.Category.BREAK)),
+                ", ".join(
+                    "%s (%s)" % (identifier, common.mins_to_dur(minutes))
+                    for identifier, minutes in stats.top_apps(3)
+                ),
             )
+        )
 
     def update_idle(self) -> None:
         self._tracker.update()
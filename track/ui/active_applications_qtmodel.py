@@ -5,7 +5,7 @@
 """Defines ActiveApplicationsModel
 """
 
-from typing import Any, Dict, Tuple  # pylint: disable=unused-import
+from typing import Any, Dict, Optional, Tuple  # pylint: disable=unused-import
 
 from PyQt5 import QtCore
 
@@ -71,8 +71,7 @@ class ActiveApplicationsModel(QtCore.QAbstractTableModel, ActiveApplications):
     def update_all_categories(self, get_category_from_app) -> None:
         for i in self._apps:
             self._apps[i].set_new_category(get_category_from_app(self._apps[i]))
-        for i in self._minutes:
-            self._minutes[i].rebuild_categories(get_category_from_app)
+        self.categories_changed()
 
     def flags(self, _index):
         return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsDragEnabled
@@ -98,9 +97,9 @@ class ActiveApplicationsModel(QtCore.QAbstractTableModel, ActiveApplications):
         with change_emitter(self):
             super().clear()
 
-    def from_dict(self, data: Dict[str, Any]) -> None:
+    def from_dict(self, data: Dict[str, Any], totals: Optional[Dict[str, Any]] = None) -> None:
         with change_emitter(self):
-            super().from_dict(data)
+            super().from_dict(data, totals)
             self.sort()
 
     def update(self, minute_index, app):
@@ -74,13 +74,17 @@ class TimechartDataprovider(ABC):
         pass
 
     @abstractmethod
-    def clip_from(self, index: str) -> None:
+    def clip_from(self, index: int) -> None:
         pass
 
     @abstractmethod
     def clip_to(self, index: int) -> None:
         pass
 
+    @abstractmethod
+    def undo_clip(self) -> bool:
+        pass
+
 
 class change_emitter:
     def __init__(self, emitter):
@@ -12,7 +12,7 @@ import zmq  # type: ignore
 from PyQt5 import QtWidgets  # type: ignore
 
 from .. import core
-from ..core import errors
+from ..core import codec, errors, segments
 from ..core.util import log
 from .active_applications_qtmodel import ActiveApplicationsModel
 from .qt_common import TimechartDataprovider
@@ -62,7 +62,9 @@ class TimeTrackerClientQt(TimechartDataprovider):
         return self._applications.info_at(minute)
 
     def category_at(self, minute: int):
-        return self._applications.category_at(minute)
+        return segments.segment(self._applications).category_at(
+            minute, self._applications.category_at(minute)
+        )
 
     def current_minute(self):
         return self._current_data.get("minute", 0)
@@ -71,23 +73,26 @@ class TimeTrackerClientQt(TimechartDataprovider):
         return self.end_index() - self.begin_index() + 1
 
     def time_active(self):
-        return len(self._applications._minutes)
+        return self._applications.time_active()
 
     def time_work(self):
-        return sum(minute.main_category() == 2 for _, minute in self._applications._minutes.items())
+        return self._applications.time_in_category(core.Category.WORK)
 
     def time_private(self):
-        return sum(minute.main_category() == 3 for _, minute in self._applications._minutes.items())
+        return self._applications.time_in_category(core.Category.PRIVATE)
 
     def time_idle(self):
-        return self.time_total() - len(self._applications._minutes)
+        return self.time_total() - self._applications.time_active()
 
-    def clip_from(self, index: str) -> None:
+    def clip_from(self, index: int) -> None:
         self._request("clip_from", data={"index": index})
 
     def clip_to(self, index: int) -> None:
         self._request("clip_to", data={"index": index})
 
+    def undo_clip(self) -> bool:
+        return bool(self._request("undo_clip").get("undone"))
+
     def clear(self) -> None:
         self._applications.clear()
 
@@ -95,7 +100,7 @@ class TimeTrackerClientQt(TimechartDataprovider):
         if self._receiving or self._req_socket is None:
             raise Exception("wrong send/recv state!")
         self._receiving = True
-        self._req_socket.send_json(msg)
+        self._req_socket.send(codec.encode(msg))
 
     def _req_recv(self, timeout: int, raise_on_timeout: bool) -> Dict[str, Any]:
         if not self._receiving or self._req_socket is None:
@@ -110,7 +115,8 @@ class TimeTrackerClientQt(TimechartDataprovider):
                 _timeout = 2000
                 continue
             break
-        return self._req_socket.recv_json()
+        message = codec.decode(self._req_socket.recv())  # type: Dict[str, Any]
+        return message
 
     def _request(
         self,
@@ -161,12 +167,14 @@ class TimeTrackerClientQt(TimechartDataprovider):
 
     def update(self) -> None:
         current_data = self._request("current").get("current")
-        apps = self._request("apps").get("apps")
+        reply = self._request("apps")
+        apps = reply.get("apps")
 
         assert current_data is not None and apps is not None
 
         self._current_data = current_data
-        self._applications.from_dict(apps)
+        # totals sent along save recounting them after each poll
+        self._applications.from_dict(apps, reply.get("totals"))
 
         self._initialized = True
 
@@ -192,17 +200,10 @@ class TimeTrackerClientQt(TimechartDataprovider):
         return self._applications.is_active(minute)
 
     def get_time_per_categories(self):
-        # TODO: cache this, so you don't do so many operations per second.
-        # This is pretty inneficient
-        time_dict = {}
-        for app_name in self._applications._apps:
-            app = self._applications._apps[app_name]
-            category = str(app._category)
-            if category in time_dict:
-                time_dict[category] += app.get_count()
-            else:
-                time_dict[category] = app.get_count()
-        return time_dict
+        return {
+            str(category): seconds
+            for category, seconds in self._applications.seconds_per_category().items()
+        }
 
     def get_current_category(self):
         return self._current_data["category"]
@@ -4,29 +4,85 @@
 """Defines daily log visualizer classes
 """
 import json
+import re
+from collections import OrderedDict
 from datetime import datetime
+from typing import Any, List, Optional, Tuple
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 
-from ..core import ActiveApplications, common
+from ..core import ActiveApplications, common, history, segments, summary
 from ..core.util import catch
 from .qt_common import CategoryColor, TimechartDataprovider
 
 
 class FileDataprovider(TimechartDataprovider):
-    """"""
-
-    def __init__(self, filename):
-        def convert(data):
-            return data if "tracker_data" in data else {"tracker_data": data}
-
-        with open(filename) as file:
-            data = catch(
-                lambda: convert(json.load(file)), (FileNotFoundError, json.JSONDecodeError), {}
-            )
-            self.apps = ActiveApplications(data.get("tracker_data"))
-            self._daily_note = data.get("daily_note") or ""
-        self._date = datetime.strptime(filename[-13:-5], "%Y%m%d")
+    """Provides one recorded day from a day store
+
+    Header and totals are taken from @day_summary (if provided), the timeline gets
+    loaded on first access (i.e. when the Timegraph gets painted or hovered). Loaded
+    timelines are kept in an LRU cache of LOADED_DAYS_BUDGET days shared by all
+    instances. Clipping and re-categorization get re-applied after a reload.
+    """
+
+    LOADED_DAYS_BUDGET = 16
+    _loaded = OrderedDict()  # type: OrderedDict[int, FileDataprovider]
+
+    def __init__(
+        self, store: Any, name: str, day_summary: Optional[summary.DaySummary] = None
+    ) -> None:
+        self._store = store
+        self._name = name
+        self._filename = store.path(name)
+        self._model = None  # type: Any
+        self._daily_note = ""
+        # totals read from the summary index - only valid until the day gets clipped
+        self._summary = day_summary
+        self._summary_apps = None  # type: Optional[List[Tuple[common.AppInfo, int]]]
+        self._clip = [None, None]  # type: List[Optional[int]]
+        self._clip_history = []  # type: List[List[Optional[int]]]
+        self._rule_set = None  # type: Optional[common.RuleSet]
+        match = re.search(r"(\d{8})", name)
+        if match is None:
+            raise ValueError("%r is not the name of a recorded day" % name)
+        self._date = datetime.strptime(match.group(1), "%Y%m%d")
+
+    @property
+    def apps(self) -> Any:
+        """The day's timeline model - loaded on demand"""
+        return self._load()
+
+    def _load(self) -> Any:
+        loaded = FileDataprovider._loaded
+        if self._model is not None:
+            loaded.move_to_end(id(self))
+            return self._model
+        self._model, self._daily_note = catch(
+            lambda: self._store.open_day(self._name),
+            (FileNotFoundError, json.JSONDecodeError, ValueError),
+            (ActiveApplications(), ""),
+        )
+        if self._clip[0] is not None:
+            self._model.clip_from(self._clip[0])
+        if self._clip[1] is not None:
+            self._model.clip_to(self._clip[1])
+        if self._rule_set is not None:
+            history.recategorize_day(self._filename, self._model, self._rule_set)
+        loaded[id(self)] = self
+        while len(loaded) > self.LOADED_DAYS_BUDGET:
+            _, evicted = loaded.popitem(last=False)
+            evicted.unload()
+        return self._model
+
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def unload(self) -> None:
+        """Drop the timeline - it will be loaded again when needed"""
+        FileDataprovider._loaded.pop(id(self), None)
+        if self._model is not None and hasattr(self._model, "close"):
+            self._model.close()
+        self._model = None
 
     def date(self) -> datetime:
         return self._date
@@ -37,35 +93,55 @@ class FileDataprovider(TimechartDataprovider):
     def current_minute(self) -> int:
         return self.end_index()
 
-    def clip_from(self, index: str) -> None:
+    def clip_from(self, index: int) -> None:
+        self._summary = None
+        self._clip_history.append(list(self._clip))
+        self._clip[0] = index
         self.apps.clip_from(index)
 
     def clip_to(self, index: int) -> None:
+        self._summary = None
+        self._clip_history.append(list(self._clip))
+        self._clip[1] = index
         self.apps.clip_to(index)
 
+    def undo_clip(self) -> bool:
+        """Restore the clipping before the last clip_from() / clip_to() by reloading the
+        timeline, return False if there's nothing to undo"""
+        if not self._clip_history:
+            return False
+        self._clip = self._clip_history.pop()
+        self.unload()
+        return True
+
     def begin_index(self):
-        return self.apps.begin_index()
+        return self._summary.begin if self._summary else self.apps.begin_index()
 
     def end_index(self):
-        return self.apps.end_index()
+        return self._summary.end if self._summary else self.apps.end_index()
 
     def daily_note(self) -> str:
+        self._load()
         return self._daily_note
 
     def info_at(self, minute: int):
         return self.apps.info_at(minute)
 
     def category_at(self, minute: int):
-        return self.apps.category_at(minute)
+        return segments.segment(self.apps).category_at(minute, self.apps.category_at(minute))
 
     def time_active(self):
-        return len(self.apps._minutes)
+        return self._summary.active if self._summary else self.apps.time_active()
 
     def time_work(self):
-        return sum(minute.main_category() == 2 for _, minute in self.apps._minutes.items())
+        if self._summary:
+            return self._summary.work
+        return self.apps.time_in_category(common.Category.WORK)
 
     def time_private(self):
-        return sum(minute.main_category() == 3 for _, minute in self.apps._minutes.items())
+        if self._summary:
+            return self._summary.private
+        return self.apps.time_in_category(common.Category.PRIVATE)
 
     def time_total(self):
         return self.end_index() - self.begin_index()
@@ -73,13 +149,30 @@ class FileDataprovider(TimechartDataprovider):
     def time_idle(self):
         return self.time_total() - self.time_active()
 
-    def recategorize(self, rules: common.Rules) -> None:
-        common.recategorize(self.apps.apps(), rules)
+    def day_summary(self) -> summary.DaySummary:
+        """Return the summary of the day as shown, i.e. clipped and re-categorized"""
+        if self._summary is not None:
+            return self._summary
+        return summary.summarize(self.apps, self.daily_note())
+
+    def recategorize(self, rules: common.RuleSet) -> bool:
+        self._rule_set = rules
+        if self._summary is not None:
+            if self._summary_apps is None:
+                self._summary_apps = self._summary.app_infos()
+            summary = self._summary.categorized(rules, self._summary_apps)
+            changed = summary != self._summary
+            self._summary = summary
+            if self._model is not None:
+                changed = history.recategorize_day(self._filename, self._model, rules) or changed
+            return changed
+        return history.recategorize_day(self._filename, self.apps, rules)
 
 
 class Timegraph(QtWidgets.QFrame):
     clipFromClicked = QtCore.pyqtSignal(int)
     clipToClicked = QtCore.pyqtSignal(int)
+    undoClipClicked = QtCore.pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -126,11 +219,14 @@ class Timegraph(QtWidgets.QFrame):
         index = self._dataprovider.begin_index() + event.x() - 50 - 1
         clip_from = menu.addAction("clip before %s (erases data!)" % common.mins_to_dur(index))
         clip_to = menu.addAction("clip after %s (erases data!)" % common.mins_to_dur(index))
+        undo_clip = menu.addAction("undo last clip")
         action = menu.exec_(self.mapToGlobal(event.pos()))
         if action == clip_from:
             self.clipFromClicked.emit(index)
         if action == clip_to:
             self.clipToClicked.emit(index)
+        if action == undo_clip:
+            self.undoClipClicked.emit()
 
     def drawPoints(self, qp):
         if not self._dataprovider.initialized():
@@ -185,6 +281,7 @@ class EvaluationWidget(QtWidgets.QFrame):
         self.lbl_totals.setFont(font)
         self.timegraph.clipFromClicked.connect(self.on_timegraph_clipFromClicked)
         self.timegraph.clipToClicked.connect(self.on_timegraph_clipToClicked)
+        self.timegraph.undoClipClicked.connect(self.on_timegraph_undoClipClicked)
 
         self.lbl_active = QtWidgets.QLabel("active")
         self.lbl_work = QtWidgets.QLabel("work")
@@ -216,6 +313,11 @@ class EvaluationWidget(QtWidgets.QFrame):
         self.timegraph.dataprovider().clip_to(index)
         self.update_widgets()
 
+    @QtCore.pyqtSlot()
+    def on_timegraph_undoClipClicked(self) -> None:
+        if self.timegraph.dataprovider().undo_clip():
+            self.update_widgets()
+
     def set_dataprovider(self, dataprovider):
         self.timegraph.set_dataprovider(dataprovider)
         self.update_widgets()
@@ -251,6 +353,6 @@ class EvaluationWidget(QtWidgets.QFrame):
             % (fmt(dp.begin_index()), fmt(dp.current_minute()), common.mins_to_dur(_time_total))
         )
 
-    def recategorize(self, rules: common.Rules):
-        self.timegraph.dataprovider().recategorize(rules)
-        self.update_widgets()
+    def recategorize(self, rules: common.RuleSet) -> None:
+        if self.timegraph.dataprovider().recategorize(rules):
+            self.update_widgets()